@@ -1,12 +1,37 @@
+import asyncio
 import logging
+import time
+from contextlib import asynccontextmanager
 
-from fastapi import FastAPI, HTTPException
+import orjson
+from fastapi import FastAPI, Header, HTTPException, Query, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel
-from typing import List
-from src.recommender import recommend_assessments
+from fastapi.responses import ORJSONResponse, StreamingResponse
+from pydantic import BaseModel, Field
+from starlette.concurrency import run_in_threadpool
+from typing import Dict, List, Optional
+from src import admission, embedding_service, metrics, pages, profiling, timing, typeahead
+from src.config import ADMISSION_OVERFLOW, ADMISSION_RETRY_AFTER_S, MAX_TOP_K, TYPEAHEAD_DEBOUNCE_MS
+from src.recommender import (
+    analyze_query,
+    preload,
+    recommend_assessments,
+    recommend_bundle,
+    recommend_preliminary,
+    suggest_assessments,
+)
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Load indexes and models, and start the embedding workers when EMBEDDING_WORKERS > 0,
+    # before the first request (already done, and a no-op here, under scripts/serve.py)
+    await run_in_threadpool(preload)
+    yield
+    embedding_service.stop()
 
-app = FastAPI(title="SHL Assessment Recommendation API")
+app = FastAPI(
+    title="SHL Assessment Recommendation API", default_response_class=ORJSONResponse, lifespan=lifespan
+)
 
 # Add CORS middleware to allow frontend access
 app.add_middleware(
@@ -15,34 +40,339 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    # Let the frontend read stage timings from fetch() responses
+    expose_headers=["Server-Timing"],
 )
 
+# Paths of the registered routes, for the endpoint label; filled on the first request
+_route_paths: Optional[frozenset] = None
+
+def _endpoint_label(path: str) -> str:
+    global _route_paths
+    if _route_paths is None:
+        _route_paths = frozenset(route.path for route in app.routes)
+    return path if path in _route_paths else "other"
+
+@app.middleware("http")
+async def track_requests(request: Request, call_next):
+    """
+    In-flight gauge, latency histogram and error counter per route.
+
+    Latency runs until the last body chunk is sent, so streamed endpoints
+    (/recommend/stream, /recommend/batch) are measured in full rather than
+    to their headers.
+    """
+    endpoint = _endpoint_label(request.url.path)
+    if endpoint == "/metrics":
+        return await call_next(request)
+    start = time.perf_counter()
+    metrics.IN_FLIGHT.inc()
+
+    def finished():
+        metrics.REQUEST_SECONDS.labels(endpoint).observe(time.perf_counter() - start)
+        metrics.IN_FLIGHT.dec()
+
+    try:
+        response = await call_next(request)
+    except Exception:
+        finished()
+        raise
+    if response.status_code >= 500:
+        metrics.REQUEST_ERRORS.labels(endpoint).inc()
+    body = response.body_iterator
+
+    async def observed_body():
+        try:
+            async for chunk in body:
+                yield chunk
+        finally:
+            finished()
+
+    response.body_iterator = observed_body()
+    return response
+
 class RecommendationRequest(BaseModel):
     query: str
-    top_k: int = 10
+    top_k: int = Field(10, ge=1, le=MAX_TOP_K)
+    # Treat the query's duration as a budget for the whole battery
+    bundle: bool = False
+    # Time allowed for the whole request; optional stages (re-ranking) are
+    # skipped when they would not fit. Also accepted as 'X-Latency-Budget-Ms'
+    latency_budget_ms: Optional[float] = None
+    # Also rank up to PAGINATION_DEPTH results for GET /recommend/page and return
+    # 'next_cursor'; off by default since it widens the search
+    paginate: bool = False
+
+class BatchRecommendationRequest(BaseModel):
+    queries: List[str]
+    top_k: int = Field(10, ge=1, le=MAX_TOP_K)
+
+def server_timing(timings: Dict[str, float], total_ms: float) -> str:
+    """Server-Timing header value, e.g. 'parse;dur=812.4, embed;dur=95.1, total;dur=930.2'."""
+    parts = [f"{name};dur={ms:.1f}" for name, ms in timings.items()]
+    return ", ".join(parts + [f"total;dur={total_ms:.1f}"])
+
+# Bounds concurrent and queued /recommend requests in this worker
+_request_limiter = admission.request_limiter()
+
+def _run_recommend(request: RecommendationRequest, trace: Dict, degraded: bool, force_profile: bool,
+                   more: Optional[List], budget_ms: Optional[float] = None):
+    """Run the recommend path in a worker thread; returns (result, stage timings, tallies)."""
+    with profiling.profile_request(request.query, force=force_profile):
+        if request.bundle:
+            result = recommend_bundle(request.query, top_k=request.top_k, trace=trace, degraded=degraded)
+        else:
+            result = recommend_assessments(
+                request.query, top_k=request.top_k, trace=trace, degraded=degraded, more=more,
+                latency_budget_ms=budget_ms,
+            )
+    return result, timing.current() or {}, timing.counters() or {}
+
+def _timed(fn, *args, **kwargs):
+    """Call fn in a worker thread with stage timing; returns (result, stage timings)."""
+    timings = timing.start()
+    return fn(*args, **kwargs), timings
+
+def _sse(event: str, data: Dict) -> bytes:
+    return b"event: " + event.encode() + b"\ndata: " + orjson.dumps(data) + b"\n\n"
 
 @app.get("/health")
 async def health_check():
     return {"status": "healthy", "message": "API is running"}
 
+@app.get("/metrics")
+async def prometheus_metrics():
+    body, content_type = metrics.render()
+    return Response(content=body, headers={"Content-Type": content_type})
+
 @app.post("/recommend")
-async def recommend(request: RecommendationRequest):
+async def recommend(
+    request: RecommendationRequest,
+    debug: bool = False,
+    x_profile: Optional[str] = Header(default=None),
+    x_latency_budget_ms: Optional[float] = Header(default=None),
+):
+    start = time.perf_counter()
+    budget_ms = request.latency_budget_ms if request.latency_budget_ms is not None else x_latency_budget_ms
+    admitted = _request_limiter is None or await _request_limiter.acquire()
+    if not admitted and ADMISSION_OVERFLOW == "reject":
+        raise HTTPException(
+            status_code=429,
+            detail="Too many requests in flight, retry shortly",
+            headers={"Retry-After": str(ADMISSION_RETRY_AFTER_S)},
+        )
     try:
-        recs = recommend_assessments(request.query, top_k=request.top_k)
-        return {
+        bundle = None
+        trace: Dict = {}
+        more: Optional[List] = [] if request.paginate else None
+        # Over the queue limit: served without LLM, uncached embeddings or re-ranking.
+        # Profiling is sampled, or forced with 'X-Profile: 1' (only when PROFILE_ENABLED)
+        # Time spent waiting for admission counts against the budget
+        remaining_ms = budget_ms - (time.perf_counter() - start) * 1000 if budget_ms is not None else None
+        result, timings, tallies = await run_in_threadpool(
+            _run_recommend, request, trace, not admitted, x_profile in ("1", "true"), more, remaining_ms
+        )
+        if request.bundle:
+            bundle = result
+            recs = bundle["items"]
+        else:
+            recs = result
+        total_ms = (time.perf_counter() - start) * 1000
+        metrics.observe_stages(timings)
+        headers = {"Server-Timing": server_timing(timings, total_ms), "Timing-Allow-Origin": "*"}
+        if not admitted:
+            headers["X-Degraded"] = "1"
+            trace["degraded"] = ["admission"] + trace.get("degraded", [])
+        response = {
             "query": request.query,
-            "recommendations": [
-                {
-                    "assessment_name": r["name"],
-                    "assessment_url": r["url"],
-                    "relevance_score": r["score"],
-                    "test_type": r["type"],
-                    "duration": r.get("duration"),
-                }
-                for r in recs
-            ],
+            "recommendations": [r.to_response() for r in recs],
             "total_results": len(recs),
+            # Later pages come from GET /recommend/page without recomputing anything
+            "next_cursor": pages.store.put(recs + more, page_size=len(recs)) if recs and more else None,
         }
+        if bundle is not None:
+            response["total_duration_minutes"] = bundle["total_minutes"]
+            response["budget_minutes"] = bundle["budget_minutes"]
+        if debug:
+            response["debug"] = {
+                "timings_ms": {**{k: round(v, 1) for k, v in timings.items()}, "total": round(total_ms, 1)},
+                "cache": tallies,
+                **trace,
+            }
+        # Serialized by orjson directly, skipping FastAPI's jsonable_encoder pass
+        return ORJSONResponse(response, headers=headers)
     except Exception as exc:  # noqa: BLE001
         logging.exception("Recommendation failed")
         raise HTTPException(status_code=500, detail=str(exc))
+    finally:
+        if admitted and _request_limiter is not None:
+            _request_limiter.release()
+
+@app.get("/recommend/page")
+async def recommend_page(cursor: str, limit: Optional[int] = None):
+    """
+    The next page of a /recommend result list.
+
+    Slices the ranked list cached when the cursor was issued; no provider
+    or index is queried. Expired or unknown cursors get 410, and the
+    original /recommend request has to be repeated.
+    """
+    page = pages.store.page(cursor, limit)
+    if page is None:
+        raise HTTPException(status_code=410, detail="Cursor expired or unknown; repeat the /recommend request")
+    recs, next_cursor, total = page
+    return {
+        "recommendations": [r.to_response() for r in recs],
+        "total_results": len(recs),
+        "ranked_results": total,
+        "next_cursor": next_cursor,
+    }
+
+@app.post("/recommend/batch")
+async def recommend_batch(request: BatchRecommendationRequest):
+    """
+    Recommendations for many queries, streamed as NDJSON.
+
+    One line per query is written as soon as it is ready, in request order,
+    so the body is never built in memory as a whole. A failed query yields
+    a line with an "error" field instead of failing the stream.
+    """
+    async def lines():
+        for query in request.queries:
+            admitted = _request_limiter is None or await _request_limiter.acquire()
+            try:
+                recs, timings = await run_in_threadpool(
+                    _timed, recommend_assessments, query, top_k=request.top_k, degraded=not admitted
+                )
+                metrics.observe_stages(timings)
+                line = {
+                    "query": query,
+                    "recommendations": [r.to_response() for r in recs],
+                    "total_results": len(recs),
+                }
+            except Exception as exc:  # noqa: BLE001
+                logging.exception("Batch recommendation failed")
+                line = {"query": query, "error": str(exc)}
+            finally:
+                if admitted and _request_limiter is not None:
+                    _request_limiter.release()
+            yield orjson.dumps(line) + b"\n"
+
+    return StreamingResponse(lines(), media_type="application/x-ndjson")
+
+@app.get("/recommend/stream")
+async def recommend_stream(http_request: Request, query: str, top_k: int = Query(10, ge=1, le=MAX_TOP_K)):
+    """
+    Progressive recommendations as server-sent events.
+
+    Events, in order:
+      preliminary  ranked by retrieval similarity alone, sent as soon as the
+                   query is embedded and searched (the LLM parse runs meanwhile)
+      refined      filtered and balanced ranking once the parse is available
+      done         stage timings, time to first result and the refined trace
+    An 'error' event replaces the remaining events if a stage fails.
+    """
+    admitted = _request_limiter is None or await _request_limiter.acquire()
+    if not admitted and ADMISSION_OVERFLOW == "reject":
+        raise HTTPException(
+            status_code=429,
+            detail="Too many requests in flight, retry shortly",
+            headers={"Retry-After": str(ADMISSION_RETRY_AFTER_S)},
+        )
+
+    async def events():
+        start = time.perf_counter()
+        parse = asyncio.ensure_future(run_in_threadpool(_timed, analyze_query, query, not admitted))
+        try:
+            recs, quick_timings = await run_in_threadpool(
+                _timed, recommend_preliminary, query, top_k, degraded=not admitted
+            )
+            first_ms = (time.perf_counter() - start) * 1000
+            yield _sse("preliminary", {
+                "query": query,
+                "recommendations": [r.to_response() for r in recs],
+                "total_results": len(recs),
+                "elapsed_ms": round(first_ms, 1),
+            })
+
+            analysis, parse_timings = await parse
+            if await http_request.is_disconnected():
+                return
+            trace: Dict = {}
+            recs, refined_timings = await run_in_threadpool(
+                _timed, recommend_assessments, query, top_k=top_k, trace=trace, degraded=not admitted,
+                analysis=analysis,
+            )
+            total_ms = (time.perf_counter() - start) * 1000
+            yield _sse("refined", {
+                "query": query,
+                "recommendations": [r.to_response() for r in recs],
+                "total_results": len(recs),
+                "elapsed_ms": round(total_ms, 1),
+            })
+            metrics.observe_stages({**refined_timings, **parse_timings})
+            if not admitted:
+                trace["degraded"] = ["admission"] + trace.get("degraded", [])
+            yield _sse("done", {
+                "timings_ms": {
+                    "preliminary": {k: round(v, 1) for k, v in quick_timings.items()},
+                    "refined": {k: round(v, 1) for k, v in {**parse_timings, **refined_timings}.items()},
+                    "first_result": round(first_ms, 1),
+                    "total": round(total_ms, 1),
+                },
+                **trace,
+            })
+        except Exception as exc:  # noqa: BLE001
+            logging.exception("Streaming recommendation failed")
+            yield _sse("error", {"detail": str(exc)})
+        finally:
+            parse.cancel()
+            # The parse may already have failed while the preliminary pass was
+            # running; fetch its outcome so the error is not reported as unretrieved
+            parse.add_done_callback(lambda task: task.cancelled() or task.exception())
+            if admitted and _request_limiter is not None:
+                _request_limiter.release()
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@app.get("/typeahead")
+async def typeahead_suggestions(
+    q: str, session: Optional[str] = None, top_k: int = Query(5, ge=1, le=MAX_TOP_K), debug: bool = False
+):
+    """
+    Live suggestions while the query is typed.
+
+    Uses only local indexes and cached embeddings, so a keystroke costs a
+    few milliseconds. With a `session` id, each keystroke waits
+    TYPEAHEAD_DEBOUNCE_MS and is answered with `"superseded": true` and no
+    suggestions when a newer keystroke of the same session has arrived, and
+    the previous keystroke's candidates are narrowed instead of recomputed.
+    """
+    start = time.perf_counter()
+    seq = typeahead.sessions.begin(session) if session else 0
+    if session and TYPEAHEAD_DEBOUNCE_MS > 0:
+        await asyncio.sleep(TYPEAHEAD_DEBOUNCE_MS / 1000.0)
+    if session and not typeahead.sessions.is_current(session, seq):
+        return {"query": q, "superseded": True, "suggestions": []}
+    trace: Dict = {}
+    recs, timings = await run_in_threadpool(
+        _timed, suggest_assessments, q, top_k=top_k, session_id=session, trace=trace
+    )
+    if session and not typeahead.sessions.is_current(session, seq):
+        return {"query": q, "superseded": True, "suggestions": []}
+    metrics.observe_stages(timings)
+    total_ms = (time.perf_counter() - start) * 1000
+    response = {"query": q, "superseded": False, "suggestions": [r.to_response() for r in recs]}
+    if debug:
+        response["debug"] = {
+            "timings_ms": {**{k: round(v, 1) for k, v in timings.items()}, "total": round(total_ms, 1)},
+            **trace,
+        }
+    return ORJSONResponse(
+        response, headers={"Server-Timing": server_timing(timings, total_ms), "Timing-Allow-Origin": "*"}
+    )
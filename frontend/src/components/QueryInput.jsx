@@ -1,4 +1,4 @@
-import { useState, useEffect } from 'react'
+import { useState, useEffect, useRef } from 'react'
 import { Card, CardContent, CardDescription, CardHeader, CardTitle } from './ui/Card'
 import { Button } from './ui/Button'
 import { Textarea, Label, Input } from './ui/Input'
@@ -12,6 +12,9 @@ export function QueryInput({ onSubmit, isLoading }) {
   const [testQueries, setTestQueries] = useState([])
   const [selectedTestQuery, setSelectedTestQuery] = useState('')
   const [showSettings, setShowSettings] = useState(false)
+  const [suggestions, setSuggestions] = useState([])
+  // One typeahead session per mounted input lets the API reuse the previous keystroke's matches
+  const sessionId = useRef(Math.random().toString(36).slice(2))
 
   // Load test queries from JSON file (easier parsing than CSV with multiline entries)
   useEffect(() => {
@@ -81,6 +84,26 @@ export function QueryInput({ onSubmit, isLoading }) {
       })
   }, [])
 
+  // Live suggestions while typing; the previous request is aborted and the
+  // API drops keystrokes superseded by a newer one from this session
+  useEffect(() => {
+    if (inputMode !== 'manual' || query.trim().length < 2) {
+      setSuggestions([])
+      return
+    }
+    const controller = new AbortController()
+    const params = new URLSearchParams({ q: query, session: sessionId.current, top_k: '5' })
+    fetch(`${apiUrl}/typeahead?${params}`, { signal: controller.signal })
+      .then(res => res.json())
+      .then(data => {
+        if (!data.superseded) setSuggestions(data.suggestions || [])
+      })
+      .catch(() => {
+        // Aborted by the next keystroke, or typeahead unavailable
+      })
+    return () => controller.abort()
+  }, [query, apiUrl, inputMode])
+
   const handleSubmit = (e) => {
     e.preventDefault()
     if (!query.trim()) return
@@ -207,6 +230,18 @@ export function QueryInput({ onSubmit, isLoading }) {
               placeholder="e.g., We need to assess candidates for analytical thinking and problem-solving skills for a data analyst position..."
               className="min-h-[150px]"
             />
+            {suggestions.length > 0 && (
+              <ul className="rounded-md border bg-background text-sm divide-y">
+                {suggestions.map((s) => (
+                  <li key={s.assessment_url} className="px-3 py-2 flex justify-between gap-4">
+                    <a href={s.assessment_url} target="_blank" rel="noreferrer" className="hover:underline">
+                      {s.assessment_name}
+                    </a>
+                    <span className="text-muted-foreground">{s.duration}</span>
+                  </li>
+                ))}
+              </ul>
+            )}
           </div>
 
           <Button type="submit" disabled={isLoading || !query.trim()} className="w-full">
@@ -5,7 +5,7 @@ Run this after switching embedding models.
 import json
 import os
 import shutil
-from src.embedding import embed_texts
+from scripts.build_index import build_index
 from src import vector_store
 
 def rebuild_index():
@@ -26,32 +26,12 @@ def rebuild_index():
     
     print(f"📊 Found {len(items)} items")
     
-    # Prepare data
-    ids = []
-    docs = []
-    metas = []
+    # Same artifacts as scripts/build_index.py: vectors, projection, BM25, skill
+    # and (with INDEX_FIELDS=multi) field index, plus the mmap export
+    print("🧠 Generating embeddings (this may take a minute)...")
+    build_index(catalog_path)
     
-    for i, it in enumerate(items):
-        body = f"{it.get('name','')}\n{it.get('description','')}\nSkills: {', '.join(it.get('skills', []))}"
-        ids.append(str(i))
-        docs.append(body)
-        metas.append({
-            "name": it.get("name") or "",
-            "url": it.get("url") or "",
-            "type": it.get("type") or "",
-            "duration": it.get("duration") or "",
-            "skills": str(it.get("skills") or []),
-        })
-    
-    # Generate embeddings
-    print("🧠 Generating embeddings using local model (this may take a minute)...")
-    embs = embed_texts(docs)
-    
-    # Add to vector store
-    print("💾 Storing embeddings in ChromaDB...")
-    vector_store.add_items(ids, embs, metas, docs)
-    
-    print(f"✅ Successfully indexed {len(ids)} items!")
+    print(f"✅ Successfully indexed {len(items)} items!")
     print("🚀 Your system is now ready to use without API quota limits!")
 
 if __name__ == "__main__":
@@ -0,0 +1,49 @@
+"""
+Latency benchmark for the time-budgeted bundle optimizer.
+
+Runs optimize_bundle on synthetic candidate pools with catalog-like
+durations and types and reports p50/p99 milliseconds per pool size.
+"""
+import argparse
+import time
+
+import numpy as np
+
+from src.bundle import optimize_bundle
+from src.ranking import TYPE_CODES
+from src.selection import Quota
+
+DURATIONS = [10, 15, 20, 25, 30, 45, 60]
+
+
+def bench(pool: int, budget: float, top_k: int, repeats: int, required: int = 2, seed: int = 0):
+    rng = np.random.default_rng(seed)
+    scores = rng.random(pool)
+    minutes = rng.choice(DURATIONS, pool).astype(np.float32)
+    types = rng.integers(0, max(3, required), pool).astype(np.int8)
+    quotas = {letter: Quota(1) for letter in TYPE_CODES[:required]}
+
+    optimize_bundle(scores, minutes, types, budget, top_k, quotas, max_candidates=pool)  # warm-up
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        bundle = optimize_bundle(scores, minutes, types, budget, top_k, quotas, max_candidates=pool)
+        timings.append((time.perf_counter() - start) * 1000)
+    return np.percentile(timings, 50), np.percentile(timings, 99), bundle
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--pools", default="50,100,200,300,500", help="Comma-separated candidate pool sizes")
+    ap.add_argument("--budget", type=float, default=40, help="Total time budget in minutes")
+    ap.add_argument("--top_k", type=int, default=10)
+    ap.add_argument("--repeats", type=int, default=50)
+    ap.add_argument("--required", type=int, default=2,
+                    help="Number of required test types (above BUNDLE_MAX_REQUIRED_TYPES the greedy pass runs)")
+    args = ap.parse_args()
+
+    print(f"Budget {args.budget:g} min, top_k {args.top_k}, {args.required} required type(s)")
+    print(f"{'pool':>6} {'p50 ms':>8} {'p99 ms':>8} {'items':>6} {'minutes':>8}")
+    for pool in [int(p) for p in args.pools.split(",")]:
+        p50, p99, bundle = bench(pool, args.budget, args.top_k, args.repeats, args.required)
+        print(f"{pool:>6} {p50:>8.2f} {p99:>8.2f} {len(bundle.positions):>6} {bundle.total_minutes:>8g}")
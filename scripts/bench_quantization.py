@@ -0,0 +1,70 @@
+"""
+Recall-versus-memory report for quantized vector storage.
+
+Builds a synthetic low-rank corpus of unit vectors (default: OpenAI's
+3072 dimensions), answers queries exactly and with int8 / binary codes
+plus exact re-scoring of the top `k * rescore` candidates, and prints
+Recall@k, in-memory bytes per vector and query latency for each mode.
+"""
+import argparse
+import time
+
+import numpy as np
+
+from src.quantization import QuantizedVectors, rescore
+
+
+def corpus(n: int, dim: int, rank: int, seed: int = 0):
+    """Unit vectors with low-rank structure, like real text embeddings."""
+    rng = np.random.default_rng(seed)
+    basis = rng.normal(size=(rank, dim)).astype(np.float32)
+    latent = rng.normal(size=(n, rank)).astype(np.float32)
+    vectors = latent @ basis + 0.1 * np.sqrt(rank) * rng.normal(size=(n, dim)).astype(np.float32)
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+    q_latent = latent[rng.integers(0, n, 200)] + 0.3 * rng.normal(size=(200, rank)).astype(np.float32)
+    queries = q_latent @ basis
+    queries /= np.linalg.norm(queries, axis=1, keepdims=True)
+    return vectors, queries
+
+
+def top(scores: np.ndarray, k: int) -> np.ndarray:
+    part = np.argpartition(-scores, k - 1)[:k]
+    return part[np.argsort(-scores[part])]
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--n", type=int, default=5000, help="Number of stored vectors")
+    ap.add_argument("--dim", type=int, default=3072)
+    ap.add_argument("--rank", type=int, default=64, help="Intrinsic dimensionality of the synthetic corpus")
+    ap.add_argument("--k", type=int, default=10)
+    ap.add_argument("--rescore", type=int, default=4, help="Re-score k * rescore approximate candidates")
+    args = ap.parse_args()
+
+    vectors, queries = corpus(args.n, args.dim, args.rank)
+    truth = [set(top(vectors @ q, args.k)) for q in queries]
+    print(f"{args.n} vectors x {args.dim}D, {len(queries)} queries, Recall@{args.k}, rescore x{args.rescore}")
+    print(f"{'mode':>8} {'bytes/vec':>10} {'ratio':>6} {'recall':>7} {'approx':>7} {'ms/query':>9}")
+
+    start = time.perf_counter()
+    for q in queries:
+        top(vectors @ q, args.k)
+    exact_ms = (time.perf_counter() - start) * 1000 / len(queries)
+    print(f"{'float32':>8} {vectors.nbytes / args.n:>10.0f} {1:>6.1f} {1:>7.3f} {1:>7.3f} {exact_ms:>9.2f}")
+
+    for mode in ("int8", "binary"):
+        codes = QuantizedVectors.encode(vectors, mode)
+        hits = approx_hits = 0
+        start = time.perf_counter()
+        for q, expected in zip(queries, truth):
+            approx = codes.approximate_scores(q)
+            approx_hits += len(expected & set(top(approx, args.k)))
+            candidates = top(approx, args.k * args.rescore)
+            exact = rescore(vectors, candidates, q)
+            hits += len(expected & set(candidates[top(exact, args.k)]))
+        ms = (time.perf_counter() - start) * 1000 / len(queries)
+        total = args.k * len(queries)
+        print(
+            f"{mode:>8} {codes.nbytes / args.n:>10.0f} {vectors.nbytes / codes.nbytes:>6.1f} "
+            f"{hits / total:>7.3f} {approx_hits / total:>7.3f} {ms:>9.2f}"
+        )
@@ -0,0 +1,83 @@
+"""
+Recall@k versus dimension for index-time embedding reduction.
+
+Embeds the indexed catalog documents and the labelled queries once with the
+raw provider (one batch each), then for every target dimension and method
+(truncate / pca) reports:
+  - overlap: share of the full-dimension top-k that the reduced index returns
+  - recall:  Recall@k against the labelled URLs (scripts/evaluate.py)
+  - bytes per vector and ms per query for the similarity scan
+
+--synthetic runs the overlap measurement on the low-rank corpus from
+bench_quantization.py instead, with no provider calls. That corpus is not
+Matryoshka-trained, so only its PCA rows say anything.
+"""
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+from src import vector_store
+from src.projection import Projection
+from src.providers import get_embedding_provider
+from scripts.bench_quantization import corpus, top
+from scripts.evaluate import evaluate_model
+
+
+def unit(x) -> np.ndarray:
+    x = np.asarray(x, dtype=np.float32)
+    return x / np.linalg.norm(x, axis=1, keepdims=True).clip(min=1e-12)
+
+
+def rankings(docs: np.ndarray, queries: np.ndarray, k: int):
+    """Top-k rows per query and the mean scan time in ms."""
+    start = time.perf_counter()
+    scores = queries @ docs.T
+    out = [top(s, k) for s in scores]
+    return out, (time.perf_counter() - start) * 1000 / len(queries)
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--truth", default="data/train-set.csv")
+    ap.add_argument("--k", type=int, default=10)
+    ap.add_argument("--dims", default="32,64,128,256,512,1024", help="Comma-separated target dimensions")
+    ap.add_argument("--synthetic", action="store_true", help="Use a synthetic corpus instead of the provider")
+    ap.add_argument("--n", type=int, default=2000, help="Synthetic corpus size")
+    args = ap.parse_args()
+
+    urls, truth, queries = None, None, None
+    if args.synthetic:
+        docs, q_embs = corpus(args.n, 3072, 64)
+    else:
+        catalog = vector_store.get_all()
+        urls = [(m or {}).get("url") or "" for m in catalog["metadatas"]]
+        truth = pd.read_csv(args.truth)
+        queries = truth["Query"].astype(str).unique().tolist()
+        provider = get_embedding_provider(reduced=False)
+        print(f"Embedding {len(urls)} documents and {len(queries)} queries with {provider.signature}")
+        docs = unit(provider.embed_documents(catalog["documents"]))
+        q_embs = unit(provider.embed_queries(queries))
+
+    k = min(args.k, len(docs))
+    full, full_ms = rankings(docs, q_embs, k)
+
+    def report(label: str, dim: int, ranked, ms: float):
+        overlap = np.mean([len(set(a) & set(b)) / k for a, b in zip(ranked, full)])
+        recall = ""
+        if truth is not None:
+            rows = [{"Query": q, "Assessment_url": urls[i]} for q, r in zip(queries, ranked) for i in r]
+            recall = f"{evaluate_model(pd.DataFrame(rows), truth, k=k)[0]:.4f}"
+        print(f"{label:>9} {dim:>6} {dim * 4:>10} {overlap:>8.3f} {recall:>8} {ms:>9.3f}")
+
+    print(f"{len(docs)} documents x {docs.shape[1]}D, {len(q_embs)} queries, k={k}")
+    print(f"{'method':>9} {'dim':>6} {'bytes/vec':>10} {'overlap':>8} {'recall':>8} {'ms/query':>9}")
+    report("full", docs.shape[1], full, full_ms)
+    for method in ("truncate", "pca"):
+        for dim in sorted(int(d) for d in args.dims.split(",") if d.strip()):
+            if dim >= docs.shape[1]:
+                continue
+            proj = Projection.fit(docs, method, dim)
+            ranked, ms = rankings(proj.apply(docs), proj.apply(q_embs), k)
+            report(method, proj.dim, ranked, ms)
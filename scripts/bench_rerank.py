@@ -0,0 +1,54 @@
+"""
+Recall and latency benchmark for the cross-encoder re-ranking stage.
+
+For each candidate budget N, runs every unique query of a labelled CSV
+through recommend_assessments with rerank_top_n=N and reports Recall@k and
+mean/p95 latency, with the added milliseconds relative to N=0. The score
+cache is cleared between settings so the numbers reflect cold queries.
+"""
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+from src import reranker
+from src.recommender import recommend_assessments
+from scripts.evaluate import evaluate_model
+
+
+def run(queries, k: int, top_n: int):
+    reranker.clear_cache()
+    rows = []
+    timings = []
+    for q in queries:
+        start = time.perf_counter()
+        recs = recommend_assessments(q, top_k=k, rerank_top_n=top_n)
+        timings.append((time.perf_counter() - start) * 1000)
+        rows.extend({"Query": q, "Assessment_url": r.get("url")} for r in recs)
+    return pd.DataFrame(rows, columns=["Query", "Assessment_url"]), np.array(timings)
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--truth", default="data/train-set.csv")
+    ap.add_argument("--k", type=int, default=10)
+    ap.add_argument("--top_n", default="0,10,20,40", help="Comma-separated re-rank budgets to compare")
+    args = ap.parse_args()
+
+    truth = pd.read_csv(args.truth)
+    queries = truth["Query"].astype(str).unique().tolist()
+    print(f"{len(queries)} unique queries from {args.truth}")
+    print(f"{'N':>4} {'Recall@' + str(args.k):>10} {'mean ms':>9} {'p95 ms':>8} {'added ms':>9}")
+
+    baseline = None
+    for top_n in [int(n) for n in args.top_n.split(",")]:
+        pred, timings = run(queries, args.k, top_n)
+        mean_recall, _ = evaluate_model(pred, truth, k=args.k)
+        mean_ms = timings.mean()
+        if baseline is None:
+            baseline = mean_ms
+        print(
+            f"{top_n:>4} {mean_recall:>10.4f} {mean_ms:>9.1f} "
+            f"{np.percentile(timings, 95):>8.1f} {mean_ms - baseline:>+9.1f}"
+        )
@@ -0,0 +1,199 @@
+"""
+Memory and throughput of scripts/serve.py from 1 to N workers.
+
+For each worker count the launcher is started on a free port, warmed up
+and loaded with concurrent keep-alive clients for a fixed time. The report
+lists requests/s, latency percentiles and, per worker, RSS next to PSS
+and USS from /proc/<pid>/smaps_rollup: RSS counts shared pages in every
+process, PSS splits them between the processes sharing them, and USS is
+what each worker holds alone. Flat USS as workers are added means the
+preloaded index and models stay shared.
+
+The default endpoint (GET /typeahead) needs only the lexical and skill
+indexes. 'recommend' drives POST /recommend, which needs the embedding
+provider (and LLM_PROVIDER, unless set to a name without a backend such
+as 'none' to measure the heuristic path). The load generator runs on
+the same machine, so leave it spare cores for clean scaling numbers.
+
+Usage:
+    VECTOR_BACKEND=mmap PYTHONPATH=. python scripts/bench_workers.py --workers 1 2 4 --seconds 20
+"""
+import argparse
+import http.client
+import json
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import threading
+import time
+import urllib.parse
+from typing import Dict, List
+
+QUERIES = [
+    "java developer",
+    "sql server",
+    "python data analyst with sql",
+    "sales representative personality",
+    "customer service english communication",
+    "numerical reasoning for finance graduates",
+    "selenium automation testing",
+    "leadership report for managers",
+]
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def _children(pid: int) -> List[int]:
+    out = []
+    for entry in os.listdir("/proc"):
+        if entry.isdigit():
+            try:
+                with open(f"/proc/{entry}/stat") as f:
+                    # Field 4 is the parent pid; the command name may contain spaces
+                    ppid = int(f.read().rsplit(")", 1)[1].split()[1])
+            except (OSError, IndexError, ValueError):
+                continue
+            if ppid == pid:
+                out.append(int(entry))
+    return sorted(out)
+
+
+def memory_mb(pid: int) -> Dict[str, float]:
+    """RSS, PSS and USS (private clean + dirty) of a process in MB."""
+    fields = {}
+    with open(f"/proc/{pid}/smaps_rollup") as f:
+        for line in f:
+            parts = line.split()
+            if len(parts) >= 2 and parts[1].isdigit():
+                fields[parts[0].rstrip(":")] = int(parts[1]) / 1024.0
+    return {
+        "rss": fields.get("Rss", 0.0),
+        "pss": fields.get("Pss", 0.0),
+        "uss": fields.get("Private_Clean", 0.0) + fields.get("Private_Dirty", 0.0),
+    }
+
+
+def _request(conn: http.client.HTTPConnection, endpoint: str, query: str):
+    if endpoint == "recommend":
+        body = json.dumps({"query": query, "top_k": 10})
+        conn.request("POST", "/recommend", body=body, headers={"Content-Type": "application/json"})
+    else:
+        # Without a session id, so the debounce wait does not dominate latency
+        params = urllib.parse.urlencode({"q": query})
+        conn.request("GET", f"/typeahead?{params}")
+    resp = conn.getresponse()
+    resp.read()
+    return resp.status
+
+
+def load(host: str, port: int, endpoint: str, clients: int, seconds: float) -> Dict[str, float]:
+    """Closed-loop load: each client sends its next request as soon as the last one returns."""
+    latencies: List[float] = []
+    errors = [0]
+    lock = threading.Lock()
+    deadline = time.perf_counter() + seconds
+
+    def client(n: int):
+        conn = http.client.HTTPConnection(host, port, timeout=30)
+        mine, failed, i = [], 0, 0
+        while time.perf_counter() < deadline:
+            query = QUERIES[(n + i) % len(QUERIES)]
+            i += 1
+            start = time.perf_counter()
+            try:
+                status = _request(conn, endpoint, query)
+            except (OSError, http.client.HTTPException):
+                conn.close()
+                conn = http.client.HTTPConnection(host, port, timeout=30)
+                status = 0
+            if status == 200:
+                mine.append((time.perf_counter() - start) * 1000)
+            else:
+                failed += 1
+        conn.close()
+        with lock:
+            latencies.extend(mine)
+            errors[0] += failed
+
+    threads = [threading.Thread(target=client, args=(n,)) for n in range(clients)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    latencies.sort()
+    pick = lambda q: latencies[min(int(q * len(latencies)), len(latencies) - 1)] if latencies else float("nan")
+    return {
+        "rps": len(latencies) / seconds,
+        "p50": pick(0.50),
+        "p99": pick(0.99),
+        "errors": errors[0],
+    }
+
+
+def _wait_healthy(port: int, proc: subprocess.Popen, timeout: float = 300.0):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if proc.poll() is not None:
+            raise RuntimeError(f"serve.py exited with status {proc.returncode}")
+        try:
+            conn = http.client.HTTPConnection("127.0.0.1", port, timeout=2)
+            conn.request("GET", "/health")
+            if conn.getresponse().status == 200:
+                return
+        except OSError:
+            pass
+        time.sleep(0.5)
+    raise RuntimeError("serve.py did not become healthy")
+
+
+def bench(workers: int, args) -> Dict:
+    port = _free_port()
+    cmd = [sys.executable, "scripts/serve.py", "--workers", str(workers), "--port", str(port),
+           "--host", "127.0.0.1", "--log-level", "warning"]
+    if args.no_preload:
+        cmd.append("--no-preload")
+    proc = subprocess.Popen(cmd, env=os.environ.copy(), stdout=subprocess.DEVNULL)
+    try:
+        _wait_healthy(port, proc)
+        # Warm every worker (lazy loads, caches) before measuring
+        load("127.0.0.1", port, args.endpoint, args.clients_per_worker * workers, args.warmup)
+        result = load("127.0.0.1", port, args.endpoint, args.clients_per_worker * workers, args.seconds)
+        worker_mem = [memory_mb(pid) for pid in _children(proc.pid)]
+        result.update(
+            workers=workers,
+            parent=memory_mb(proc.pid),
+            rss=statistics.mean(m["rss"] for m in worker_mem),
+            pss=statistics.mean(m["pss"] for m in worker_mem),
+            uss=statistics.mean(m["uss"] for m in worker_mem),
+            total_pss=sum(m["pss"] for m in worker_mem) + memory_mb(proc.pid)["pss"],
+        )
+        return result
+    finally:
+        proc.terminate()
+        proc.wait(timeout=30)
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, os.cpu_count() or 1])
+    ap.add_argument("--endpoint", choices=["typeahead", "recommend"], default="typeahead")
+    ap.add_argument("--clients-per-worker", type=int, default=4)
+    ap.add_argument("--seconds", type=float, default=15.0)
+    ap.add_argument("--warmup", type=float, default=3.0)
+    ap.add_argument("--no-preload", action="store_true", help="Fork before loading, for comparison")
+    args = ap.parse_args()
+
+    rows = [bench(n, args) for n in sorted(set(args.workers))]
+    base = rows[0]["rps"] or 1.0
+    print(f"endpoint={args.endpoint} preload={not args.no_preload} cpus={os.cpu_count()}")
+    print(f"{'workers':>7} {'req/s':>8} {'speedup':>7} {'p50 ms':>7} {'p99 ms':>7} {'err':>4} "
+          f"{'RSS/wkr':>8} {'PSS/wkr':>8} {'USS/wkr':>8} {'total PSS':>9}")
+    for r in rows:
+        print(f"{r['workers']:>7} {r['rps']:>8.1f} {r['rps'] / base:>6.2f}x {r['p50']:>7.1f} {r['p99']:>7.1f} "
+              f"{r['errors']:>4} {r['rss']:>7.0f}M {r['pss']:>7.0f}M {r['uss']:>7.0f}M {r['total_pss']:>8.0f}M")
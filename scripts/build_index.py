@@ -1,11 +1,13 @@
 import argparse
 import json
 from typing import List
-from src.embedding import embed_texts
-from src import vector_store
+from src.providers import get_embedding_provider
+from src import field_index, lexical, projection, skill_index, vector_store
+from src.config import EMBEDDING_REDUCED_DIM, EMBEDDING_REDUCTION, INDEX_FIELDS
 
 
-def build_index(path: str):
+def build_index(path: str, fields: str = INDEX_FIELDS, reduction: str = EMBEDDING_REDUCTION,
+                reduced_dim: int = EMBEDDING_REDUCED_DIM):
     with open(path, "r") as f:
         items = json.load(f)
     ids = []
@@ -23,8 +25,23 @@ def build_index(path: str):
             "duration": it.get("duration") or "",
             "skills": str(it.get("skills") or []),
         })
-    embs = embed_texts(docs)
+    provider = get_embedding_provider(reduced=False)
+    embs = provider.embed_documents(docs)
+    # The projection is part of the signature the collection records
+    proj = projection.fit_projection(embs, reduction, reduced_dim)
+    if proj is not None:
+        provider = proj.wrap(provider)
+        embs = proj.apply(embs).tolist()
+    vector_store.get_collection(signature=provider.signature)
+    vector_store.verify_signature(provider.signature)
+    projection.save_projection(proj)
     vector_store.add_items(ids, embs, metas, docs)
+    lexical.build_and_save(ids, docs)
+    skill_index.build_and_save(ids, [it.get("skills") or [] for it in items])
+    # Read-only copy that VECTOR_BACKEND=mmap workers share (see scripts/serve.py)
+    vector_store.export_flat()
+    if fields == "multi":
+        field_index.build_and_save(ids, items, provider.embed_documents, provider.signature)
     print(f"Indexed {len(ids)} items")
 
 
@@ -32,8 +49,13 @@ if __name__ == "__main__":
     ap = argparse.ArgumentParser()
     ap.add_argument("--in", dest="inp", required=True, help="Path to scraped JSON")
     ap.add_argument("--persist", dest="persist", default=None, help="Chroma persist dir (optional)")
+    ap.add_argument("--fields", choices=["single", "multi"], default=INDEX_FIELDS,
+                    help="Also store separate name/description/skills vectors (multi)")
+    ap.add_argument("--reduce", choices=list(projection.METHODS), default=EMBEDDING_REDUCTION,
+                    help="Project embeddings down by truncation or PCA before indexing")
+    ap.add_argument("--dim", type=int, default=EMBEDDING_REDUCED_DIM, help="Target dimensions for --reduce")
     args = ap.parse_args()
     if args.persist:
         import os
         os.environ["CHROMA_PERSIST_DIR"] = args.persist
-    build_index(args.inp)
+    build_index(args.inp, args.fields, args.reduce, args.dim)
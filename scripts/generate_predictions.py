@@ -1,25 +1,213 @@
+"""
+Predictions for an evaluation CSV, in the Query,Assessment_url format
+scripts/evaluate.py reads.
+
+The labelled sets repeat each query once per ground-truth URL, so queries
+are deduplicated (in first-seen order) before anything is sent to the
+recommender. Unique queries are spread over a thread or process pool, and
+provider calls are kept under --rate queries per second across all
+workers. Each finished query is appended to a JSONL checkpoint and its rows
+to the output CSV as soon as it completes; a rerun with the same --out
+skips the queries already in the checkpoint, so an interrupted run picks up
+where it stopped. When every query is done the CSV is rewritten in input
+order and the checkpoint removed. Queries that fail after --retries
+attempts are left out and retried by the next run.
+
+A result that fell back to a cheaper path (heuristic parse because the LLM
+call failed, lexical-only retrieval because embedding failed) counts as a
+failure too, so degraded predictions are never frozen into the checkpoint;
+--allow-degraded accepts them, e.g. when no LLM provider is configured.
+The API's admission limits (ADMISSION_LIMITS) would degrade queries beyond
+their per-stage queue, so they are lifted for this run unless
+--admission-limits is given; --workers and --rate bound the load instead.
+
+Usage:
+    PYTHONPATH=. python scripts/generate_predictions.py --in data/test-set.csv --out predictions.csv \
+        --workers 8 --rate 4
+"""
 import argparse
+import csv
+import json
+import logging
+import os
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, ThreadPoolExecutor, wait
+from typing import Dict, List, Optional
+
 import pandas as pd
-from src.recommender import recommend_assessments
-
-def main(inp: str, outp: str, k: int):
-    df = pd.read_csv(inp)
-    rows = []
-    for q in df['Query'].astype(str).tolist():
-        recs = recommend_assessments(q, top_k=k)
-        for r in recs:
-            rows.append({
-                'Query': q,
-                'Assessment_url': r.get('url')
-            })
-    out_df = pd.DataFrame(rows)
-    out_df.to_csv(outp, index=False)
-    print(f"Saved {len(out_df)} rows to {outp}")
+
+logger = logging.getLogger("generate_predictions")
+
+# Per-process limiter; set by _init_worker in process pools
+_limiter: Optional["RateLimiter"] = None
+
+
+class RateLimiter:
+    """Token bucket: at most `rate` acquisitions per second, in bursts of up to `burst`."""
+
+    def __init__(self, rate: float, burst: int = 1):
+        self.rate = rate
+        self.burst = max(burst, 1)
+        self.tokens = float(self.burst)
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        if self.rate <= 0:
+            return
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait_s = (1 - self.tokens) / self.rate
+            time.sleep(wait_s)
+
+
+def _init_worker(rate: float, admission_limits: str):
+    global _limiter
+    from src import admission
+
+    admission.set_limits(admission_limits)
+    _limiter = RateLimiter(rate)
+
+
+class DegradedResult(RuntimeError):
+    """The recommender answered, but through a fallback stage."""
+
+
+def predict(query: str, top_k: int, retries: int = 2, allow_degraded: bool = False) -> List[str]:
+    """
+    Recommended URLs for one query.
+
+    Provider errors and degraded results are retried with exponential
+    backoff; the last attempt's error is raised.
+    """
+    from src.recommender import recommend_assessments
+
+    for attempt in range(retries + 1):
+        if _limiter is not None:
+            _limiter.acquire()
+        try:
+            trace: Dict = {}
+            recs = recommend_assessments(query, top_k=top_k, trace=trace)
+            if trace.get("degraded") and not allow_degraded:
+                raise DegradedResult(f"Degraded stages: {', '.join(trace['degraded'])} (parser: {trace.get('parser')})")
+            return [r.get("url") for r in recs]
+        except Exception:
+            if attempt == retries:
+                raise
+            time.sleep(2 ** attempt)
+    return []
+
+
+def unique_queries(path: str) -> List[str]:
+    """Queries of an evaluation CSV, without the per-URL repeats, in first-seen order."""
+    df = pd.read_csv(path)
+    return list(dict.fromkeys(df["Query"].astype(str).tolist()))
+
+
+def load_checkpoint(path: str, top_k: int) -> Dict[str, List[str]]:
+    """Finished queries of an earlier run; empty when there is none or it used another top_k."""
+    done: Dict[str, List[str]] = {}
+    if not os.path.exists(path):
+        return done
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                # The last line of an interrupted run may be cut short
+                continue
+            if record.get("top_k") != top_k:
+                logger.warning("Checkpoint %s was written with top_k=%s; starting over", path, record.get("top_k"))
+                return {}
+            done[record["query"]] = record["urls"]
+    return done
+
+
+def write_csv(path: str, queries: List[str], results: Dict[str, List[str]]):
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(["Query", "Assessment_url"])
+        for q in queries:
+            for url in results.get(q, []):
+                writer.writerow([q, url])
+
+
+def main(inp: str, outp: str, k: int, workers: int = 4, executor: str = "thread", rate: float = 0.0,
+         retries: int = 2, checkpoint: Optional[str] = None, allow_degraded: bool = False,
+         admission_limits: str = ""):
+    queries = unique_queries(inp)
+    checkpoint = checkpoint or outp + ".partial.jsonl"
+    results = load_checkpoint(checkpoint, k)
+    if not results and os.path.exists(checkpoint):
+        os.remove(checkpoint)
+    todo = [q for q in queries if q not in results]
+    logger.info("%d unique queries, %d already done, %d to run with %d %s worker(s)",
+                len(queries), len(queries) - len(todo), len(todo), workers, executor)
+
+    # Rows already in the checkpoint first, then each query's rows as it finishes
+    write_csv(outp, queries, results)
+    if executor == "process":
+        pool = ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                   initargs=(rate / workers, admission_limits))
+    else:
+        _init_worker(rate, admission_limits)
+        pool = ThreadPoolExecutor(max_workers=workers)
+
+    failed = 0
+    start = time.perf_counter()
+    with pool, open(checkpoint, "a", encoding="utf-8") as ckpt, open(outp, "a", newline="", encoding="utf-8") as out:
+        writer = csv.writer(out)
+        pending = {pool.submit(predict, q, k, retries, allow_degraded): q for q in todo}
+        while pending:
+            finished, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in finished:
+                q = pending.pop(future)
+                try:
+                    urls = future.result()
+                except Exception:
+                    failed += 1
+                    logger.exception("Query failed; it will be retried on the next run: %.80s", q)
+                    continue
+                results[q] = urls
+                ckpt.write(json.dumps({"query": q, "top_k": k, "urls": urls}) + "\n")
+                ckpt.flush()
+                writer.writerows([q, url] for url in urls)
+                out.flush()
+            done = len(todo) - len(pending) - failed
+            logger.info("%d/%d queries (%.1f/s)", done, len(todo), done / max(time.perf_counter() - start, 1e-9))
+
+    if failed:
+        print(f"{failed} queries failed; rerun the same command to retry them (checkpoint: {checkpoint})")
+        return
+    write_csv(outp, queries, results)
+    os.remove(checkpoint)
+    print(f"Saved {sum(len(results[q]) for q in queries)} rows for {len(queries)} queries to {outp}")
+
 
 if __name__ == '__main__':
     ap = argparse.ArgumentParser()
     ap.add_argument('--in', dest='inp', required=True)
     ap.add_argument('--out', dest='outp', required=True)
     ap.add_argument('--top_k', type=int, default=10)
+    ap.add_argument('--workers', type=int, default=4)
+    ap.add_argument('--executor', choices=['thread', 'process'], default='thread',
+                    help="Threads share one copy of the models; processes avoid the GIL for local embeddings")
+    ap.add_argument('--rate', type=float, default=0.0,
+                    help="Max queries started per second across all workers (0 = unlimited)")
+    ap.add_argument('--retries', type=int, default=2)
+    ap.add_argument('--checkpoint', help="Defaults to <out>.partial.jsonl")
+    ap.add_argument('--allow-degraded', action='store_true',
+                    help="Keep results from fallback paths (heuristic parse, lexical-only retrieval)")
+    ap.add_argument('--admission-limits', default="",
+                    help="ADMISSION_LIMITS for this run (default: none; queries beyond a limit would be degraded)")
     args = ap.parse_args()
-    main(args.inp, args.outp, args.top_k)
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(name)s %(levelname)s %(message)s")
+    main(args.inp, args.outp, args.top_k, args.workers, args.executor, args.rate, args.retries, args.checkpoint,
+         args.allow_degraded, args.admission_limits)
@@ -0,0 +1,160 @@
+"""
+Preload-then-fork launcher: N uvicorn workers sharing one copy of the
+index data and model weights.
+
+The parent imports the app, loads the catalog features, the indexes and
+the embedding / re-ranking weights (recommender.preload), freezes the GC
+so those objects are never written to again, binds the listening socket
+and forks the workers, which accept on the shared socket. Read-only pages
+stay shared copy-on-write; with VECTOR_BACKEND=mmap the vectors are shared
+through the page cache as well instead of one HNSW graph per worker.
+Workers that die are replaced; SIGINT/SIGTERM stops them all.
+
+One worker (the default) runs uvicorn in this process without forking.
+More than one requires VECTOR_BACKEND=mmap: the Chroma client and its
+sqlite connection must not be opened before a fork and shared with the
+children.
+
+Limitation: in-memory state (query embedding cache, /recommend/page
+cursors, typeahead sessions, admission limits) is per worker, and the
+shared socket hands each connection to whichever worker accepts it. With
+N workers a cursor from /recommend is answered with 410 and a typeahead
+keystroke misses its session's previous candidates (N-1)/N of the time.
+Use several workers only when clients do not page or type ahead, or run
+one worker per port behind a load balancer with sticky sessions.
+
+With more than one worker, Prometheus runs in multiprocess mode
+(PROMETHEUS_MULTIPROC_DIR, a fresh temporary directory unless set) so
+/metrics aggregates every worker.
+
+Usage:
+    PYTHONPATH=. python scripts/serve.py --port 8000
+    VECTOR_BACKEND=mmap PYTHONPATH=. python scripts/serve.py --workers 4 --port 8000
+"""
+import argparse
+import gc
+import logging
+import os
+import random
+import signal
+import socket
+import sys
+import tempfile
+
+logger = logging.getLogger("serve")
+
+
+def _bind(host: str, port: int) -> socket.socket:
+    # An explicit IPPROTO_TCP is inherited by accepted sockets, and asyncio only
+    # enables TCP_NODELAY on those (otherwise every response waits ~40 ms on Nagle)
+    family = socket.AF_INET6 if ":" in host else socket.AF_INET
+    sock = socket.socket(family, socket.SOCK_STREAM, socket.IPPROTO_TCP)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((host, port))
+    sock.listen(2048)
+    sock.set_inheritable(True)
+    return sock
+
+
+def _metrics_dir(path: str) -> str:
+    """Prepare PROMETHEUS_MULTIPROC_DIR; it must be set before prometheus_client is imported."""
+    path = path or tempfile.mkdtemp(prefix="shl-metrics-")
+    os.makedirs(path, exist_ok=True)
+    for name in os.listdir(path):
+        if name.endswith(".db"):
+            os.remove(os.path.join(path, name))
+    os.environ["PROMETHEUS_MULTIPROC_DIR"] = path
+    return path
+
+
+def serve(host: str, port: int, workers: int, preload: bool = True, log_level: str = "info"):
+    from src.config import VECTOR_BACKEND
+
+    if workers > 1 and VECTOR_BACKEND != "mmap":
+        raise SystemExit("--workers > 1 needs VECTOR_BACKEND=mmap (the Chroma client cannot be shared across a fork)")
+    if workers > 1:
+        logger.warning("%d workers: /recommend/page cursors and typeahead sessions are per worker and "
+                       "will miss on other workers (see the scripts/serve.py docstring)", workers)
+        logger.info("Prometheus multiprocess dir: %s", _metrics_dir(os.environ.get("PROMETHEUS_MULTIPROC_DIR", "")))
+
+    import uvicorn
+
+    from api.main import app
+    from src import metrics, recommender
+
+    if preload:
+        recommender.preload()
+    if workers == 1:
+        # Nothing to share, so no fork: the process that loaded everything serves
+        config = uvicorn.Config(app, host=host, port=port, log_level=log_level, timeout_keep_alive=5)
+        uvicorn.Server(config).run(sockets=[_bind(host, port)])
+        return
+    sock = _bind(host, port)
+    # Move everything loaded so far out of the GC's reach, so collections in
+    # the workers do not write to (and un-share) those pages
+    gc.collect()
+    gc.freeze()
+
+    children = {}
+    stopping = False
+
+    def spawn():
+        pid = os.fork()
+        if pid == 0:
+            signal.signal(signal.SIGINT, signal.SIG_DFL)
+            signal.signal(signal.SIGTERM, signal.SIG_DFL)
+            random.seed()
+            code = 0
+            try:
+                config = uvicorn.Config(app, log_level=log_level, timeout_keep_alive=5)
+                uvicorn.Server(config).run(sockets=[sock])
+            except BaseException:
+                logger.exception("Worker %d failed", os.getpid())
+                code = 1
+            os._exit(code)
+        children[pid] = True
+
+    def stop(signum, frame):
+        nonlocal stopping
+        stopping = True
+        for pid in list(children):
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    signal.signal(signal.SIGINT, stop)
+    signal.signal(signal.SIGTERM, stop)
+    for _ in range(workers):
+        spawn()
+    logger.info("Serving on %s:%d with %d worker(s): %s", host, port, workers, sorted(children))
+
+    while children:
+        try:
+            pid, status = os.wait()
+        except ChildProcessError:
+            break
+        if children.pop(pid, None) is None:
+            # An embedding worker (EMBEDDING_WORKERS); embedding_service restarts it
+            continue
+        metrics.mark_dead(pid)
+        if not stopping:
+            logger.warning("Worker %d exited with status %d; starting a new one", pid, status)
+            spawn()
+    sock.close()
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description="Serve the API with preloaded, forked workers")
+    ap.add_argument("--host", default="0.0.0.0")
+    ap.add_argument("--port", type=int, default=int(os.getenv("PORT", "8000")))
+    ap.add_argument("--workers", type=int, default=1,
+                    help="Forked workers; more than 1 needs VECTOR_BACKEND=mmap and gives per-worker cursors/sessions")
+    ap.add_argument("--no-preload", action="store_true",
+                    help="Fork first and let each worker load indexes and models itself (for comparison)")
+    ap.add_argument("--log-level", default="info")
+    args = ap.parse_args()
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(name)s %(levelname)s %(message)s")
+    if not hasattr(os, "fork"):
+        sys.exit("scripts/serve.py needs os.fork(); use uvicorn directly on this platform")
+    serve(args.host, args.port, args.workers, preload=not args.no_preload, log_level=args.log_level)
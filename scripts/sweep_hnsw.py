@@ -0,0 +1,126 @@
+"""
+Sweep Chroma HNSW parameters and recommend a setting.
+
+For every (M, construction_ef, search_ef) in the grid a throwaway persistent
+collection is built in a temporary directory from the same vectors, and the
+sweep records:
+  - build time and on-disk size of the collection
+  - Recall@k of the HNSW results against exact cosine top-k (NumPy)
+  - p50 / p99 latency of single-query searches
+
+Vectors come from the built index (document embeddings, with the labelled
+queries embedded in one batch) or from the synthetic low-rank corpus of
+bench_quantization.py, which is how larger catalogs are simulated. The
+recommendation is the lowest-p99 setting whose recall reaches --min-recall,
+printed as HNSW_* environment values for the next build_index.py run.
+"""
+import argparse
+import itertools
+import os
+import shutil
+import tempfile
+import time
+
+import chromadb
+import numpy as np
+import pandas as pd
+from chromadb.config import Settings
+
+from src import vector_store
+from src.providers import get_embedding_provider
+from scripts.bench_quantization import corpus, top
+
+
+def ints(spec: str):
+    return [int(v) for v in spec.split(",") if v.strip()]
+
+
+def disk_size(path: str) -> int:
+    return sum(os.path.getsize(os.path.join(root, f)) for root, _, files in os.walk(path) for f in files)
+
+
+def index_vectors(truth_path: str):
+    """Document embeddings from the built index and the labelled queries, unit-normalized."""
+    res = vector_store.get_collection().get(include=["embeddings"])
+    docs = np.asarray(res["embeddings"], dtype=np.float32)
+    queries = pd.read_csv(truth_path)["Query"].astype(str).unique().tolist()
+    q_embs = np.asarray(get_embedding_provider().embed_queries(queries), dtype=np.float32)
+    return docs, q_embs
+
+
+def measure(docs: np.ndarray, queries: np.ndarray, truth, k: int, m: int, construction_ef: int,
+            search_ef: int, batch: int = 5000):
+    path = tempfile.mkdtemp(prefix="hnsw_sweep_")
+    try:
+        client = chromadb.PersistentClient(path=path, settings=Settings(anonymized_telemetry=False))
+        col = client.create_collection(
+            "sweep", metadata=vector_store.hnsw_metadata(m, construction_ef, search_ef), embedding_function=None
+        )
+        ids = [str(i) for i in range(len(docs))]
+        start = time.perf_counter()
+        for lo in range(0, len(docs), batch):
+            col.add(ids=ids[lo:lo + batch], embeddings=docs[lo:lo + batch].tolist())
+        build_s = time.perf_counter() - start
+
+        latencies, hits = [], 0
+        for q, expected in zip(queries, truth):
+            start = time.perf_counter()
+            res = col.query(query_embeddings=[q.tolist()], n_results=k, include=["distances"])
+            latencies.append((time.perf_counter() - start) * 1000)
+            hits += len(expected & {int(i) for i in res["ids"][0]})
+        return {
+            "M": m,
+            "construction_ef": construction_ef,
+            "search_ef": search_ef,
+            "recall": hits / (k * len(queries)),
+            "p50_ms": float(np.percentile(latencies, 50)),
+            "p99_ms": float(np.percentile(latencies, 99)),
+            "build_s": build_s,
+            "disk_mb": disk_size(path) / 2**20,
+        }
+    finally:
+        shutil.rmtree(path, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--source", choices=["index", "synthetic"], default="synthetic")
+    ap.add_argument("--truth", default="data/train-set.csv", help="Labelled queries for --source index")
+    ap.add_argument("--n", type=int, default=20000, help="Synthetic corpus size")
+    ap.add_argument("--dim", type=int, default=768, help="Synthetic vector dimensions")
+    ap.add_argument("--k", type=int, default=10)
+    ap.add_argument("--m", default="8,16,32")
+    ap.add_argument("--construction-ef", default="64,100,200")
+    ap.add_argument("--search-ef", default="10,20,50,100")
+    ap.add_argument("--min-recall", type=float, default=0.95)
+    args = ap.parse_args()
+
+    if args.source == "index":
+        docs, queries = index_vectors(args.truth)
+    else:
+        docs, queries = corpus(args.n, args.dim, 64)
+    docs /= np.linalg.norm(docs, axis=1, keepdims=True).clip(min=1e-12)
+    queries /= np.linalg.norm(queries, axis=1, keepdims=True).clip(min=1e-12)
+    k = min(args.k, len(docs))
+    truth = [set(top(docs @ q, k).tolist()) for q in queries]
+
+    print(f"{len(docs)} vectors x {docs.shape[1]}D, {len(queries)} queries, Recall@{k} vs exact")
+    print(f"{'M':>4} {'c_ef':>5} {'s_ef':>5} {'recall':>7} {'p50 ms':>7} {'p99 ms':>7} {'build s':>8} {'disk MB':>8}")
+    results = []
+    for m, c_ef, s_ef in itertools.product(ints(args.m), ints(args.construction_ef), ints(args.search_ef)):
+        r = measure(docs, queries, truth, k, m, c_ef, s_ef)
+        results.append(r)
+        print(
+            f"{m:>4} {c_ef:>5} {s_ef:>5} {r['recall']:>7.3f} {r['p50_ms']:>7.2f} {r['p99_ms']:>7.2f} "
+            f"{r['build_s']:>8.2f} {r['disk_mb']:>8.1f}"
+        )
+
+    good = [r for r in results if r["recall"] >= args.min_recall]
+    if good:
+        best = min(good, key=lambda r: (r["p99_ms"], r["build_s"]))
+        print(f"\nFastest setting with recall >= {args.min_recall}:")
+    else:
+        best = max(results, key=lambda r: (r["recall"], -r["p99_ms"]))
+        print(f"\nNo setting reached recall {args.min_recall}; highest recall:")
+    print(f"  HNSW_M={best['M']} HNSW_CONSTRUCTION_EF={best['construction_ef']} HNSW_SEARCH_EF={best['search_ef']}")
+    print(f"  recall {best['recall']:.3f}, p50 {best['p50_ms']:.2f} ms, p99 {best['p99_ms']:.2f} ms")
@@ -0,0 +1,63 @@
+"""
+Grid-search multi-field fusion weights against labelled queries.
+
+Each unique query is embedded once (in one batch); every weight/fusion
+combination is then scored with NumPy against the persisted field index,
+so the sweep costs no extra provider calls. Prints the best settings as
+FIELD_WEIGHTS / FIELD_FUSION values.
+"""
+import argparse
+import itertools
+
+import numpy as np
+import pandas as pd
+
+from src import field_index, vector_store
+from src.providers import get_embedding_provider
+from scripts.evaluate import evaluate_model
+
+
+def weight_grid(step: float):
+    n = int(round(1 / step))
+    for a, b in itertools.product(range(n + 1), repeat=2):
+        if a + b <= n:
+            yield {"name": a * step, "description": b * step, "skills": (n - a - b) * step}
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--truth", default="data/train-set.csv")
+    ap.add_argument("--k", type=int, default=10)
+    ap.add_argument("--step", type=float, default=0.1, help="Weight grid resolution")
+    args = ap.parse_args()
+
+    index = field_index.get_index()
+    if index is None:
+        raise SystemExit("No field index found; run build_index.py --fields multi first")
+    provider = get_embedding_provider()
+    catalog = vector_store.get_all()
+    urls = {i: (m or {}).get("url") or "" for i, m in zip(catalog["ids"], catalog["metadatas"])}
+
+    truth = pd.read_csv(args.truth)
+    queries = truth["Query"].astype(str).unique().tolist()
+    q_embs = provider.embed_queries(queries)
+
+    results = []
+    for fusion in ("sum", "max"):
+        for weights in weight_grid(args.step):
+            rows = []
+            for q, emb in zip(queries, q_embs):
+                ids, _ = index.search(emb, args.k, weights=weights, fusion=fusion)
+                rows.extend({"Query": q, "Assessment_url": urls.get(i, "")} for i in ids)
+            recall, _ = evaluate_model(pd.DataFrame(rows), truth, k=args.k)
+            results.append((recall, fusion, weights))
+
+    results.sort(key=lambda r: r[0], reverse=True)
+    print(f"{len(queries)} queries, {len(results)} settings, Recall@{args.k}")
+    for recall, fusion, w in results[:10]:
+        spec = ",".join(f"{f}={w[f]:.2f}" for f in field_index.FIELDS)
+        print(f"  {recall:.4f}  FIELD_FUSION={fusion}  FIELD_WEIGHTS={spec}")
+    baseline = [r for r in results if r[1] == "sum" and np.allclose(
+        [r[2][f] for f in field_index.FIELDS], [field_index.DEFAULT_WEIGHTS[f] for f in field_index.FIELDS])]
+    if baseline:
+        print(f"Current default: {baseline[0][0]:.4f}")
@@ -0,0 +1,148 @@
+"""
+Admission control for the request path and its provider-bound stages.
+
+Each limited stage has a concurrency limit and a queue-depth limit
+(ADMISSION_LIMITS, e.g. 'request=8/32,parse=4/8,embed=8/16'). A caller
+runs immediately while fewer than `concurrency` are active, waits up to
+ADMISSION_WAIT_S while fewer than `queue` are waiting, and is turned away
+otherwise. The API answers turned-away requests with 429 + Retry-After or
+serves them degraded (ADMISSION_OVERFLOW); turned-away 'parse' and 'embed'
+stages fall back to the heuristic parser and cached embeddings.
+"""
+import asyncio
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Optional, Tuple
+
+from . import metrics
+from .config import ADMISSION_LIMITS, ADMISSION_WAIT_S
+
+
+def parse_limits(spec: str) -> Dict[str, Tuple[int, int]]:
+    """Parse 'request=8/32,parse=4/8' into {stage: (concurrency, queue)}."""
+    limits = {}
+    for part in (spec or "").split(","):
+        if "=" not in part:
+            continue
+        stage, value = part.split("=", 1)
+        concurrency, _, queue = value.partition("/")
+        limits[stage.strip()] = (max(int(concurrency), 1), int(queue or 0))
+    return limits
+
+
+class Limiter:
+    """Thread-safe concurrency limit with a bounded wait queue, for worker threads."""
+
+    def __init__(self, name: str, concurrency: int, queue: int):
+        self.name = name
+        self.concurrency = concurrency
+        self.queue = queue
+        self.active = 0
+        self.waiting = 0
+        self._cond = threading.Condition()
+
+    def acquire(self, timeout: float = ADMISSION_WAIT_S) -> bool:
+        """Take a slot, waiting at most `timeout` seconds; False if turned away."""
+        with self._cond:
+            if self.active < self.concurrency:
+                self.active += 1
+                return True
+            if self.waiting >= self.queue:
+                return False
+            self.waiting += 1
+            try:
+                deadline = time.monotonic() + timeout
+                while self.active >= self.concurrency:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        return False
+                    self._cond.wait(remaining)
+                self.active += 1
+                return True
+            finally:
+                self.waiting -= 1
+
+    def release(self):
+        with self._cond:
+            self.active -= 1
+            self._cond.notify()
+
+    @contextmanager
+    def slot(self, timeout: float = ADMISSION_WAIT_S):
+        """Yields whether a slot was granted; the slot is released on exit."""
+        granted = self.acquire(timeout)
+        if not granted:
+            metrics.ADMISSION_REJECTED.labels(self.name).inc()
+        try:
+            yield granted
+        finally:
+            if granted:
+                self.release()
+
+
+class AsyncLimiter:
+    """The same policy for coroutines on the event loop (one instance per worker)."""
+
+    def __init__(self, name: str, concurrency: int, queue: int):
+        self.name = name
+        self.concurrency = concurrency
+        self.queue = queue
+        self.waiting = 0
+        self._sem: Optional[asyncio.Semaphore] = None
+
+    async def acquire(self, timeout: float = ADMISSION_WAIT_S) -> bool:
+        if self._sem is None:
+            self._sem = asyncio.Semaphore(self.concurrency)
+        if not self._sem.locked():
+            # Completes without suspending while a permit is free
+            await self._sem.acquire()
+            return True
+        if self.waiting >= self.queue:
+            metrics.ADMISSION_REJECTED.labels(self.name).inc()
+            return False
+        self.waiting += 1
+        try:
+            await asyncio.wait_for(self._sem.acquire(), timeout)
+            return True
+        except asyncio.TimeoutError:
+            metrics.ADMISSION_REJECTED.labels(self.name).inc()
+            return False
+        finally:
+            self.waiting -= 1
+
+    def release(self):
+        self._sem.release()
+
+
+_LIMITS = parse_limits(ADMISSION_LIMITS)
+_stage_limiters = {stage: Limiter(stage, c, q) for stage, (c, q) in _LIMITS.items() if stage != "request"}
+
+
+def set_limits(spec: str):
+    """
+    Replace the limits for this process (e.g. '' for none in offline batch
+    runs, where every query should get the full path). Request limiters
+    already handed out by request_limiter() keep their old limits.
+    """
+    global _LIMITS, _stage_limiters
+    _LIMITS = parse_limits(spec)
+    _stage_limiters = {stage: Limiter(stage, c, q) for stage, (c, q) in _LIMITS.items() if stage != "request"}
+
+
+def request_limiter() -> Optional[AsyncLimiter]:
+    """Limiter for whole requests, or None when 'request' is not limited."""
+    if "request" not in _LIMITS:
+        return None
+    return AsyncLimiter("request", *_LIMITS["request"])
+
+
+@contextmanager
+def stage_slot(stage: str):
+    """Yields whether the stage may run now; unlimited stages always may."""
+    limiter = _stage_limiters.get(stage)
+    if limiter is None:
+        yield True
+        return
+    with limiter.slot() as granted:
+        yield granted
@@ -0,0 +1,203 @@
+"""
+Time-budgeted assessment bundles.
+
+A query such as "can be completed in 40 minutes" describes the whole
+battery, not each test. optimize_bundle treats selection as a 0/1 knapsack
+over catalog duration_max minutes: maximize summed relevance subject to the
+total time budget, an item cap and at least one item of every type the
+query asks for. The dynamic program runs over NumPy state arrays and its
+size is bounded by the candidate cap and by bucketing minutes, so latency
+stays flat regardless of how large the budget is. The state also doubles
+with every required type, so beyond BUNDLE_MAX_REQUIRED_TYPES of them a
+greedy pass (one item per required type, then the rest, by score per minute)
+replaces the DP.
+"""
+import math
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from .config import BUNDLE_MAX_BUCKETS, BUNDLE_MAX_CANDIDATES, BUNDLE_MAX_REQUIRED_TYPES
+from .ranking import TYPE_CODES
+from .selection import Quota
+
+_NOT_TAKEN = 0
+_TAKEN_SAME_MASK = 1
+_TAKEN_NEW_BIT = 2
+
+
+class Bundle:
+    """Result of a bundle optimization."""
+
+    def __init__(self, positions: np.ndarray, total_minutes: float, total_score: float, unmet: List[str]):
+        self.positions = positions
+        self.total_minutes = total_minutes
+        self.total_score = total_score
+        # Required type letters that no feasible bundle could include
+        self.unmet = unmet
+
+    @property
+    def satisfied(self) -> bool:
+        return not self.unmet
+
+
+def optimize_bundle(
+    scores: np.ndarray,
+    minutes: np.ndarray,
+    type_codes: np.ndarray,
+    budget_minutes: float,
+    max_items: int,
+    quotas: Optional[Dict[str, Quota]] = None,
+    max_candidates: int = BUNDLE_MAX_CANDIDATES,
+    max_buckets: int = BUNDLE_MAX_BUCKETS,
+    max_required_types: int = BUNDLE_MAX_REQUIRED_TYPES,
+) -> Bundle:
+    """
+    Choose the highest-scoring set of candidates whose total time fits the budget.
+
+    Args:
+        scores: Final relevance score per candidate (-inf to exclude)
+        minutes: Upper-bound duration per candidate in minutes (NaN if unknown)
+        type_codes: Type code per candidate (index into TYPE_CODES, -1 unknown)
+        budget_minutes: Total time available for the bundle
+        max_items: Maximum number of assessments in the bundle
+        quotas: Type letter -> Quota; types with a minimum must appear at
+            least once and types with a zero maximum are excluded
+        max_candidates: Only the best-scoring candidates enter the DP
+        max_buckets: Budget resolution; minutes are rounded up to buckets of
+            ceil(budget / max_buckets) so the DP never exceeds this width
+        max_required_types: Use the greedy fallback when more types than
+            this are required
+
+    Returns:
+        Bundle with positions ordered best first
+    """
+    quotas = quotas or {}
+    banned = [TYPE_CODES.index(t) for t, q in quotas.items() if q.maximum == 0 and t in TYPE_CODES]
+    required = [TYPE_CODES.index(t) for t, q in quotas.items() if q.minimum > 0 and t in TYPE_CODES]
+
+    eligible = np.isfinite(scores) & (minutes <= budget_minutes)
+    if banned:
+        eligible &= ~np.isin(type_codes, banned)
+    cand = np.flatnonzero(eligible)
+    if cand.size > max_candidates:
+        cand = cand[np.argpartition(-scores[cand], max_candidates - 1)[:max_candidates]]
+    if cand.size == 0 or max_items <= 0 or budget_minutes <= 0:
+        return Bundle(cand[:0], 0.0, 0.0, [TYPE_CODES[c] for c in required])
+
+    if len(required) > max_required_types:
+        return _greedy_bundle(scores, minutes, type_codes, cand, budget_minutes, max_items, required)
+
+    step = max(1, math.ceil(budget_minutes / max_buckets))
+    capacity = int(budget_minutes // step)
+    weights = np.ceil(minutes[cand] / step).astype(np.int64)
+    values = scores[cand].astype(np.float64)
+    bits = np.zeros(cand.size, dtype=np.int64)
+    for j, code in enumerate(required):
+        bits[type_codes[cand] == code] = 1 << j
+    # No bundle can hold more items than the budget fits of the shortest one
+    max_items = min(max_items, capacity // max(1, int(weights.min())))
+    n_masks = 1 << len(required)
+    full_mask = n_masks - 1
+
+    # dp[count, mask, weight] = best total score; -inf marks unreachable states
+    dp = np.full((max_items + 1, n_masks, capacity + 1), -np.inf)
+    dp[0, 0, 0] = 0.0
+    choice = np.zeros((cand.size, max_items + 1, n_masks, capacity + 1), dtype=np.int8)
+
+    # Masks that already contain each required bit; an item of that type
+    # moves a state from (mask without bit) or (mask with bit) to the latter
+    with_bit = {1 << j: np.array([m for m in range(n_masks) if m >> j & 1]) for j in range(len(required))}
+
+    for i in range(cand.size):
+        w, v, b = int(weights[i]), values[i], int(bits[i])
+        if w > capacity:
+            continue
+        new = dp.copy()
+        width = capacity + 1 - w
+        if b == 0:
+            gained = dp[:-1, :, :width] + v
+            current = new[1:, :, w:]
+            better = gained > current
+            np.maximum(current, gained, out=current)
+            choice[i, 1:, :, w:][better] = _TAKEN_SAME_MASK
+        else:
+            hi = with_bit[b]
+            same = dp[:-1, hi, :width] + v
+            moved = dp[:-1, hi ^ b, :width] + v
+            gained = np.maximum(same, moved)
+            current = dp[1:, hi, w:]
+            better = gained > current
+            new[1:, hi, w:] = np.where(better, gained, current)
+            choice[i][1:, hi, w:] = np.where(
+                better, np.where(moved > same, _TAKEN_NEW_BIT, _TAKEN_SAME_MASK), _NOT_TAKEN
+            )
+        dp = new
+
+    unmet: List[str] = []
+    final = dp[:, full_mask, :]
+    if not np.isfinite(final).any():
+        # No bundle covers every required type; report it and take the best
+        # bundle covering as many of them as possible
+        covered = [bin(m).count("1") for m in range(n_masks)]
+        reachable = [m for m in range(n_masks) if np.isfinite(dp[:, m, :]).any()]
+        best_mask = max(reachable, key=lambda m: (covered[m], np.max(dp[:, m, :])))
+        unmet = [TYPE_CODES[code] for j, code in enumerate(required) if not best_mask >> j & 1]
+        final = dp[:, best_mask, :]
+        full_mask = best_mask
+    count, weight = np.unravel_index(np.argmax(final), final.shape)
+
+    picked: List[int] = []
+    mask = full_mask
+    for i in range(cand.size - 1, -1, -1):
+        if count == 0:
+            break
+        taken = choice[i, count, mask, weight]
+        if taken == _NOT_TAKEN:
+            continue
+        picked.append(int(cand[i]))
+        count -= 1
+        weight -= int(weights[i])
+        if taken == _TAKEN_NEW_BIT:
+            mask &= ~int(bits[i])
+
+    positions = np.array(picked, dtype=np.int64)
+    positions = positions[np.argsort(-scores[positions], kind="stable")]
+    return Bundle(
+        positions,
+        float(minutes[positions].sum()),
+        float(scores[positions].sum()),
+        unmet,
+    )
+
+
+def _greedy_bundle(scores: np.ndarray, minutes: np.ndarray, type_codes: np.ndarray, cand: np.ndarray,
+                   budget_minutes: float, max_items: int, required: List[int]) -> Bundle:
+    """
+    Approximate bundle for many required types: one item per required type,
+    then the rest, each time taking the best score per minute that still fits.
+    """
+    density = scores[cand] / np.maximum(minutes[cand], 1.0)
+    by_density = cand[np.argsort(-density, kind="stable")]
+    picked: List[int] = []
+    used = 0.0
+    unmet: List[str] = []
+
+    def fits(pos) -> bool:
+        return len(picked) < max_items and used + minutes[pos] <= budget_minutes
+
+    for code in required:
+        pos = next((p for p in by_density[type_codes[by_density] == code] if fits(p)), None)
+        if pos is None:
+            unmet.append(TYPE_CODES[code])
+            continue
+        picked.append(int(pos))
+        used += float(minutes[pos])
+    for pos in by_density:
+        if pos not in picked and fits(pos):
+            picked.append(int(pos))
+            used += float(minutes[pos])
+
+    positions = np.array(picked, dtype=np.int64)
+    positions = positions[np.argsort(-scores[positions], kind="stable")]
+    return Bundle(positions, float(minutes[positions].sum()), float(scores[positions].sum()), unmet)
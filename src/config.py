@@ -10,6 +10,11 @@ GOOGLE_API_KEY = os.getenv("GOOGLE_API_KEY")
 
 # Paths and directories
 CHROMA_PERSIST_DIR = os.getenv("CHROMA_PERSIST_DIR", ".chroma")
+LEXICAL_INDEX_PATH = os.getenv("LEXICAL_INDEX_PATH", os.path.join(CHROMA_PERSIST_DIR, "bm25.json"))
+SKILL_INDEX_PATH = os.getenv("SKILL_INDEX_PATH", os.path.join(CHROMA_PERSIST_DIR, "skills.json"))
+FIELD_INDEX_PATH = os.getenv("FIELD_INDEX_PATH", os.path.join(CHROMA_PERSIST_DIR, "fields.npz"))
+PROJECTION_PATH = os.getenv("PROJECTION_PATH", os.path.join(CHROMA_PERSIST_DIR, "projection.npz"))
+FLAT_INDEX_PATH = os.getenv("FLAT_INDEX_PATH", os.path.join(CHROMA_PERSIST_DIR, "flat.json"))
 SCRAPE_OUTPUT_PATH = os.getenv("SCRAPE_OUTPUT_PATH", "data/shl_catalog.json")
 
 # Model configurations
@@ -27,3 +32,135 @@ GEMINI_EMBEDDING_MODEL = "models/text-embedding-004"
 LLM_PROVIDER = os.getenv("LLM_PROVIDER", "gemini")  # Default to Gemini
 # Options: 'gemini', 'local', 'openai'
 EMBEDDING_PROVIDER = os.getenv("EMBEDDING_PROVIDER", "gemini")  # Default to Gemini embeddings
+
+# Re-ranking weights for the final score (see ranking.py)
+RANK_WEIGHT_SIMILARITY = float(os.getenv("RANK_WEIGHT_SIMILARITY", "1.0"))
+RANK_WEIGHT_SKILLS = float(os.getenv("RANK_WEIGHT_SKILLS", "0.1"))
+RANK_WEIGHT_TYPE = float(os.getenv("RANK_WEIGHT_TYPE", "0.05"))
+
+# Time-budgeted bundle optimizer (see bundle.py)
+BUNDLE_MAX_CANDIDATES = int(os.getenv("BUNDLE_MAX_CANDIDATES", "300"))
+BUNDLE_MAX_BUCKETS = int(os.getenv("BUNDLE_MAX_BUCKETS", "120"))
+# The DP state grows as 2^(required types); above this many a greedy pass is used
+BUNDLE_MAX_REQUIRED_TYPES = int(os.getenv("BUNDLE_MAX_REQUIRED_TYPES", "3"))
+
+# Adaptive retrieval: the first candidate pool is sized from top_k and the
+# estimated filter selectivity, then grown geometrically while short
+RETRIEVAL_POOL_HEADROOM = float(os.getenv("RETRIEVAL_POOL_HEADROOM", "2.0"))
+RETRIEVAL_POOL_GROWTH = float(os.getenv("RETRIEVAL_POOL_GROWTH", "2.0"))
+RETRIEVAL_POOL_MIN = int(os.getenv("RETRIEVAL_POOL_MIN", "20"))
+
+# Optional cross-encoder re-ranking of the top candidates (see reranker.py)
+RERANK_ENABLED = os.getenv("RERANK_ENABLED", "false").lower() == "true"
+RERANK_MODEL = os.getenv("RERANK_MODEL", "cross-encoder/ms-marco-MiniLM-L-6-v2")
+RERANK_TOP_N = int(os.getenv("RERANK_TOP_N", "20"))
+RERANK_BATCH_SIZE = int(os.getenv("RERANK_BATCH_SIZE", "16"))
+RERANK_CACHE_SIZE = int(os.getenv("RERANK_CACHE_SIZE", "10000"))
+# Factor applied to the per-pair cost estimate each time the budget skips re-ranking
+RERANK_SKIP_DECAY = float(os.getenv("RERANK_SKIP_DECAY", "0.9"))
+RANK_WEIGHT_RERANK = float(os.getenv("RANK_WEIGHT_RERANK", "1.0"))
+
+# Sub-queries built from the LLM parse (role, skill groups, competencies),
+# embedded with the query in one batch and fused with its results (0 disables)
+QUERY_EXPANSION_MAX = int(os.getenv("QUERY_EXPANSION_MAX", "3"))
+
+# Retrieval mode: 'hybrid' (vector + BM25 fused with RRF), 'vector' or 'lexical'.
+# Hybrid falls back to vector-only when no BM25 index has been built.
+RETRIEVAL_MODE = os.getenv("RETRIEVAL_MODE", "hybrid")
+RRF_K = int(os.getenv("RRF_K", "60"))
+# Answer from BM25 alone, without an embedding call, when the best lexical
+# hit covers at least this share of the query's IDF mass. Off (0) by default:
+# it trades ranking quality for latency and has not been measured on the
+# labelled set; try 0.9 with scripts/evaluate.py before enabling it
+LEXICAL_FAST_PATH_MIN_COVERAGE = float(os.getenv("LEXICAL_FAST_PATH_MIN_COVERAGE", "0"))
+
+# How skills extracted from the query use the skill index:
+# 'boost' merges skill-matched assessments into the candidate pool,
+# 'filter' restricts candidates to them, 'off' ignores the index
+SKILL_FILTER_MODE = os.getenv("SKILL_FILTER_MODE", "boost")
+
+# Index mode: 'single' embeds one name/description/skills blob per assessment,
+# 'multi' also stores separate field vectors fused at query time (field_index.py)
+INDEX_FIELDS = os.getenv("INDEX_FIELDS", "single")
+FIELD_WEIGHTS = os.getenv("FIELD_WEIGHTS", "name=0.5,description=0.2,skills=0.3")
+# 'sum' (weighted mean of field similarities) or 'max' (best weighted field)
+FIELD_FUSION = os.getenv("FIELD_FUSION", "sum")
+# In-memory codes for the field vectors: 'none' (float32), 'int8' or 'binary';
+# the approximate top (top_k * FIELD_RESCORE_FACTOR) is re-scored exactly.
+# Applies to the multi-field index only (INDEX_FIELDS=multi); the default
+# single-vector index is always searched in float32. Set it at build time too:
+# only the codes for this mode are written
+FIELD_QUANTIZATION = os.getenv("FIELD_QUANTIZATION", "none")
+FIELD_RESCORE_FACTOR = int(os.getenv("FIELD_RESCORE_FACTOR", "4"))
+
+# Index-time dimensionality reduction (see projection.py): 'none', 'truncate'
+# (Matryoshka models such as text-embedding-3) or 'pca' fitted on the catalog.
+# Queries are projected the same way automatically.
+EMBEDDING_REDUCTION = os.getenv("EMBEDDING_REDUCTION", "none")
+EMBEDDING_REDUCED_DIM = int(os.getenv("EMBEDDING_REDUCED_DIM", "256"))
+
+# HNSW graph parameters, stored in the collection metadata when it is created
+# (Chroma's defaults; tune with scripts/sweep_hnsw.py)
+HNSW_M = int(os.getenv("HNSW_M", "16"))
+HNSW_CONSTRUCTION_EF = int(os.getenv("HNSW_CONSTRUCTION_EF", "100"))
+HNSW_SEARCH_EF = int(os.getenv("HNSW_SEARCH_EF", "10"))
+
+# Sampled request profiling (see profiling.py): a PROFILE_SAMPLE_RATE share of
+# requests, or any request with an 'X-Profile: 1' header, is profiled with
+# 'cprofile' (.prof) or 'pyinstrument' (.html) into PROFILE_DIR
+PROFILE_ENABLED = os.getenv("PROFILE_ENABLED", "false").lower() == "true"
+PROFILE_SAMPLE_RATE = float(os.getenv("PROFILE_SAMPLE_RATE", "0.0"))
+PROFILE_MODE = os.getenv("PROFILE_MODE", "cprofile")
+PROFILE_DIR = os.getenv("PROFILE_DIR", "profiles")
+PROFILE_MAX_MB = float(os.getenv("PROFILE_MAX_MB", "200"))
+
+# Admission control (see admission.py): 'stage=concurrency/queue' per limited
+# stage. 'request' bounds whole /recommend requests per worker; 'parse' and
+# 'embed' bound provider calls and fall back to the heuristic parser and
+# cached query embeddings when their queue is full.
+ADMISSION_LIMITS = os.getenv("ADMISSION_LIMITS", "request=8/32,parse=4/8,embed=8/16")
+ADMISSION_WAIT_S = float(os.getenv("ADMISSION_WAIT_S", "10"))
+# What happens to requests beyond the 'request' queue: 'reject' (429 with
+# Retry-After) or 'degrade' (served with the heuristic parser and cached embeddings)
+ADMISSION_OVERFLOW = os.getenv("ADMISSION_OVERFLOW", "degrade")
+ADMISSION_RETRY_AFTER_S = int(os.getenv("ADMISSION_RETRY_AFTER_S", "2"))
+# Query embeddings kept in memory (also what degraded requests can use)
+QUERY_EMBED_CACHE_SIZE = int(os.getenv("QUERY_EMBED_CACHE_SIZE", "2048"))
+
+# Search-as-you-type (see typeahead.py): only the lexical index, the skill
+# index and already-cached query embeddings are used, never a provider
+TYPEAHEAD_MIN_CHARS = int(os.getenv("TYPEAHEAD_MIN_CHARS", "2"))
+# The word being typed is matched as a prefix once it has this many characters
+TYPEAHEAD_MIN_PREFIX = int(os.getenv("TYPEAHEAD_MIN_PREFIX", "2"))
+# A keystroke waits this long and is dropped if a newer one from the same session arrives
+TYPEAHEAD_DEBOUNCE_MS = float(os.getenv("TYPEAHEAD_DEBOUNCE_MS", "30"))
+TYPEAHEAD_SESSIONS = int(os.getenv("TYPEAHEAD_SESSIONS", "4096"))
+TYPEAHEAD_SESSION_TTL_S = float(os.getenv("TYPEAHEAD_SESSION_TTL_S", "600"))
+
+# Cursor pagination (see pages.py): /recommend with "paginate": true keeps up
+# to PAGINATION_DEPTH ranked results per query for PAGE_CACHE_TTL_S (ranking
+# that many costs a wider search); the store holds at most
+# PAGE_CACHE_MAX_ITEMS results in total (about 150 bytes each)
+# Largest top_k an API request may ask for
+MAX_TOP_K = int(os.getenv("MAX_TOP_K", "50"))
+PAGINATION_DEPTH = int(os.getenv("PAGINATION_DEPTH", "100"))
+PAGE_CACHE_TTL_S = float(os.getenv("PAGE_CACHE_TTL_S", "900"))
+PAGE_CACHE_MAX_ITEMS = int(os.getenv("PAGE_CACHE_MAX_ITEMS", "200000"))
+
+# Vector search backend: 'chroma' (HNSW graph in each process) or 'mmap'
+# (exact search over a read-only vector file that forked workers share
+# through the page cache; see flat_index.py and scripts/serve.py)
+VECTOR_BACKEND = os.getenv("VECTOR_BACKEND", "chroma")
+
+# Out-of-process local embeddings (see embedding_service.py): with
+# EMBEDDING_WORKERS > 0 the sentence-transformers model runs in that many
+# dedicated processes, each with its own thread count and micro-batching,
+# and API workers send texts over a local socket (0 keeps it in-process)
+LOCAL_EMBEDDING_MODEL = os.getenv("LOCAL_EMBEDDING_MODEL", "all-MiniLM-L6-v2")
+EMBEDDING_WORKERS = int(os.getenv("EMBEDDING_WORKERS", "0"))
+EMBEDDING_WORKER_THREADS = int(os.getenv("EMBEDDING_WORKER_THREADS", "2"))
+EMBEDDING_BATCH_SIZE = int(os.getenv("EMBEDDING_BATCH_SIZE", "32"))
+# How long a worker waits for more texts to fill a batch once one has arrived
+EMBEDDING_BATCH_WAIT_MS = float(os.getenv("EMBEDDING_BATCH_WAIT_MS", "5"))
+EMBEDDING_SERVICE_TIMEOUT_S = float(os.getenv("EMBEDDING_SERVICE_TIMEOUT_S", "30"))
+EMBEDDING_SERVICE_START_TIMEOUT_S = float(os.getenv("EMBEDDING_SERVICE_START_TIMEOUT_S", "300"))
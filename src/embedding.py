@@ -4,10 +4,12 @@ Unified embedding module that supports multiple backends:
 - Local: sentence-transformers (384 dimensions, no API calls)
 - OpenAI: text-embedding-3-large (3072 dimensions, high quality)
 
-The backend is configured via EMBEDDING_PROVIDER in config.py
+The backend is configured via EMBEDDING_PROVIDER in config.py and resolved
+once through the provider registry in providers.py.
 """
 from typing import List
 from .config import EMBEDDING_PROVIDER
+from .providers import get_embedding_provider
 
 
 def embed_texts(texts: List[str]) -> List[List[float]]:
@@ -20,15 +22,7 @@ def embed_texts(texts: List[str]) -> List[List[float]]:
     Returns:
         List of embedding vectors
     """
-    if EMBEDDING_PROVIDER == "gemini":
-        from .gemini_client import get_embeddings
-        return get_embeddings(texts)
-    elif EMBEDDING_PROVIDER == "openai":
-        from .openai_client import get_embeddings
-        return get_embeddings(texts)
-    else:  # default to local
-        from .local_embeddings import get_embeddings
-        return get_embeddings(texts)
+    return get_embedding_provider().embed_documents(texts)
 
 
 def embed_text(text: str) -> List[float]:
@@ -41,15 +35,7 @@ def embed_text(text: str) -> List[float]:
     Returns:
         Embedding vector
     """
-    if EMBEDDING_PROVIDER == "gemini":
-        from .gemini_client import get_embedding
-        return get_embedding(text)
-    elif EMBEDDING_PROVIDER == "openai":
-        from .openai_client import get_embedding
-        return get_embedding(text)
-    else:  # default to local
-        from .local_embeddings import get_embedding
-        return get_embedding(text)
+    return get_embedding_provider().embed_documents([text])[0]
 
 
 def embed_query(text: str) -> List[float]:
@@ -63,15 +49,7 @@ def embed_query(text: str) -> List[float]:
     Returns:
         Query embedding vector
     """
-    if EMBEDDING_PROVIDER == "gemini":
-        from .gemini_client import get_query_embedding
-        return get_query_embedding(text)
-    elif EMBEDDING_PROVIDER == "openai":
-        from .openai_client import get_query_embedding
-        return get_query_embedding(text)
-    else:  # default to local
-        from .local_embeddings import get_query_embedding
-        return get_query_embedding(text)
+    return get_embedding_provider().embed_queries([text])[0]
 
 
 def get_embedding_dimensions() -> int:
@@ -81,12 +59,7 @@ def get_embedding_dimensions() -> int:
     Returns:
         Number of dimensions in the embedding vector
     """
-    if EMBEDDING_PROVIDER == "gemini":
-        return 768  # Gemini text-embedding-004
-    elif EMBEDDING_PROVIDER == "openai":
-        return 3072  # OpenAI text-embedding-3-large
-    else:  # local
-        return 384  # sentence-transformers all-MiniLM-L6-v2
+    return get_embedding_provider().dimensions
 
 
 def get_provider_info() -> dict:
@@ -96,9 +69,12 @@ def get_provider_info() -> dict:
     Returns:
         Dictionary with provider details
     """
+    provider = get_embedding_provider()
     return {
         "provider": EMBEDDING_PROVIDER,
-        "dimensions": get_embedding_dimensions(),
+        "model": provider.model,
+        "dimensions": provider.dimensions,
+        "signature": provider.signature,
         "description": {
             "gemini": "Google Gemini text-embedding-004 (768D, API-based)",
             "openai": "OpenAI text-embedding-3-large (3072D, API-based)",
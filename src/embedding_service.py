@@ -0,0 +1,347 @@
+"""
+Local embedding inference in dedicated worker processes.
+
+With EMBEDDING_WORKERS > 0 the sentence-transformers model does not run
+inside the API process, where torch's threads compete with request
+handling and can starve the event loop. start() spawns that many worker
+processes instead (`python -m src.embedding_service`). Each loads the model
+once and serves on a Unix socket (multiprocessing.connection,
+authenticated with a per-start key). Requests
+from all connections go through one micro-batcher per worker: a batch is
+sent to the model when it reaches EMBEDDING_BATCH_SIZE texts or
+EMBEDDING_BATCH_WAIT_MS after its first request, with
+EMBEDDING_WORKER_THREADS torch threads. API processes, including workers
+forked by scripts/serve.py, open their own connections and send each
+request to the worker with the fewest requests outstanding. Inference
+throughput is tuned by the worker count, threads and batch settings;
+API latency is tuned by the API's own worker count. Neither affects the
+other.
+
+The process that started the workers watches them and restarts any that
+exit (e.g. killed for memory), on the same socket path. Clients connect
+to each worker separately and skip the ones that are down, so a crashed
+worker only removes its share of capacity until it is back.
+"""
+import argparse
+import atexit
+import itertools
+import logging
+import multiprocessing
+import os
+import queue
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import Future
+from multiprocessing.connection import Client, Listener
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from .config import (
+    EMBEDDING_BATCH_SIZE,
+    EMBEDDING_BATCH_WAIT_MS,
+    EMBEDDING_SERVICE_START_TIMEOUT_S,
+    EMBEDDING_SERVICE_TIMEOUT_S,
+    EMBEDDING_WORKER_THREADS,
+    EMBEDDING_WORKERS,
+)
+
+logger = logging.getLogger(__name__)
+
+# Set by start() in the process that owns the workers and inherited by forked API workers
+_addresses: List[str] = []
+_authkey: Optional[bytes] = None
+_owner_pid: Optional[int] = None
+_processes: List[subprocess.Popen] = []
+_commands: List[List[str]] = []
+_env: Dict[str, str] = {}
+_start_lock = threading.Lock()
+_stopping = threading.Event()
+# Seconds between liveness checks of the workers in the owner process
+_WATCH_INTERVAL_S = 1.0
+
+# Per-process client state, rebuilt after a fork
+_connections: Dict[str, "_Connection"] = {}
+_connections_pid: Optional[int] = None
+_connections_lock = threading.Lock()
+
+
+def _serve(address: str, authkey: bytes, threads: int, batch_size: int, wait_ms: float):
+    """Worker process: load the model, then batch and answer requests until the parent exits."""
+    try:
+        import torch
+
+        torch.set_num_threads(threads)
+    except ImportError:
+        pass
+    from . import local_embeddings
+
+    model = local_embeddings.get_model()
+    requests: "queue.Queue" = queue.Queue()
+    threading.Thread(target=_batcher, args=(model, requests, batch_size, wait_ms), daemon=True).start()
+    threading.Thread(target=_exit_with_parent, args=(os.getppid(),), daemon=True).start()
+    # The socket file appearing is the parent's signal that the model is loaded
+    listener = Listener(address, family="AF_UNIX", authkey=authkey)
+    while True:
+        try:
+            conn = listener.accept()
+        except (OSError, EOFError, multiprocessing.AuthenticationError):
+            continue
+        threading.Thread(target=_reader, args=(conn, requests), daemon=True).start()
+
+
+def _exit_with_parent(parent_pid: int):
+    while os.getppid() == parent_pid:
+        time.sleep(1.0)
+    os._exit(0)
+
+
+def _reader(conn, requests: "queue.Queue"):
+    send_lock = threading.Lock()
+    try:
+        while True:
+            req_id, texts = conn.recv()
+            requests.put((conn, send_lock, req_id, texts))
+    except (EOFError, OSError):
+        conn.close()
+
+
+def _batcher(model, requests: "queue.Queue", batch_size: int, wait_ms: float):
+    while True:
+        batch = [requests.get()]
+        size = len(batch[0][3])
+        deadline = time.monotonic() + wait_ms / 1000.0
+        while size < batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                item = requests.get(timeout=remaining)
+            except queue.Empty:
+                break
+            batch.append(item)
+            size += len(item[3])
+        texts = [t for item in batch for t in item[3]]
+        vectors, error = None, None
+        try:
+            vectors = np.asarray(
+                model.encode(texts, convert_to_numpy=True, show_progress_bar=False, batch_size=batch_size),
+                dtype=np.float32,
+            )
+        except Exception as exc:  # noqa: BLE001
+            error = f"{type(exc).__name__}: {exc}"
+        offset = 0
+        for conn, send_lock, req_id, item_texts in batch:
+            part = vectors[offset:offset + len(item_texts)] if vectors is not None else None
+            offset += len(item_texts)
+            try:
+                with send_lock:
+                    conn.send((req_id, part, error))
+            except OSError:
+                pass
+
+
+def _root() -> str:
+    return os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _launch(i: int) -> subprocess.Popen:
+    # A stale socket file would look like a ready worker
+    if os.path.exists(_addresses[i]):
+        os.remove(_addresses[i])
+    return subprocess.Popen(_commands[i], env=_env, cwd=_root())
+
+
+def start(workers: int = EMBEDDING_WORKERS, threads: int = EMBEDDING_WORKER_THREADS,
+          batch_size: int = EMBEDDING_BATCH_SIZE, wait_ms: float = EMBEDDING_BATCH_WAIT_MS,
+          timeout: float = EMBEDDING_SERVICE_START_TIMEOUT_S):
+    """
+    Start the embedding workers and wait until each has loaded the model.
+
+    Workers run as `python -m src.embedding_service` in a clean interpreter,
+    so they inherit no API state, and the thread settings are in place
+    before torch is imported. Does nothing when they are already running in
+    this process or were started by the parent this process was forked from.
+    """
+    global _authkey, _owner_pid
+    with _start_lock:
+        if _processes:
+            return
+        directory = tempfile.mkdtemp(prefix="shl-embed-")
+        _authkey = os.urandom(16)
+        _owner_pid = os.getpid()
+        _stopping.clear()
+        root = _root()
+        _env.clear()
+        _env.update(
+            os.environ,
+            PYTHONPATH=os.pathsep.join(p for p in (root, os.environ.get("PYTHONPATH")) if p),
+            OMP_NUM_THREADS=str(threads),
+            MKL_NUM_THREADS=str(threads),
+            OPENBLAS_NUM_THREADS=str(threads),
+            TOKENIZERS_PARALLELISM="false",
+            EMBEDDING_SERVICE_AUTHKEY=_authkey.hex(),
+        )
+        for i in range(max(workers, 1)):
+            address = os.path.join(directory, f"worker-{i}.sock")
+            _addresses.append(address)
+            _commands.append([sys.executable, "-m", "src.embedding_service", "--address", address,
+                              "--threads", str(threads), "--batch-size", str(batch_size), "--wait-ms", str(wait_ms)])
+            _processes.append(_launch(i))
+        atexit.register(stop)
+        deadline = time.monotonic() + timeout
+        for proc, address in zip(_processes, _addresses):
+            while not os.path.exists(address):
+                if proc.poll() is not None or time.monotonic() > deadline:
+                    stop()
+                    raise RuntimeError(f"Embedding worker for {address} did not start (exit code {proc.poll()})")
+                time.sleep(0.1)
+        threading.Thread(target=_watch, daemon=True).start()
+        logger.info("Started %d embedding worker(s) with %d thread(s) each", len(_processes), threads)
+
+
+def _watch():
+    """Owner process: restart workers that have exited, on the same address."""
+    while not _stopping.wait(_WATCH_INTERVAL_S):
+        with _start_lock:
+            if _stopping.is_set() or _owner_pid != os.getpid():
+                return
+            for i, proc in enumerate(_processes):
+                if proc.poll() is not None:
+                    logger.warning("Embedding worker %d exited with status %s; restarting it", proc.pid, proc.returncode)
+                    _processes[i] = _launch(i)
+
+
+def stop():
+    """Terminate the workers started by this process."""
+    _stopping.set()
+    with _start_lock:
+        if _owner_pid == os.getpid():
+            for proc in _processes:
+                if proc.poll() is None:
+                    proc.terminate()
+            for proc in _processes:
+                try:
+                    proc.wait(timeout=5)
+                except subprocess.TimeoutExpired:
+                    proc.kill()
+        _processes.clear()
+        _addresses.clear()
+        _commands.clear()
+
+
+class _Connection:
+    """One client connection to a worker, with responses matched to requests by id."""
+
+    def __init__(self, address: str, authkey: bytes):
+        self.address = address
+        self.conn = Client(address, family="AF_UNIX", authkey=authkey)
+        self.pending: Dict[int, Future] = {}
+        self.closed = False
+        self._ids = itertools.count()
+        self._lock = threading.Lock()
+        threading.Thread(target=self._read, daemon=True).start()
+
+    def submit(self, texts: List[str]) -> Tuple[int, Future]:
+        future: Future = Future()
+        with self._lock:
+            if self.closed:
+                raise ConnectionError(f"Embedding worker at {self.address} is gone")
+            req_id = next(self._ids)
+            self.pending[req_id] = future
+            try:
+                self.conn.send((req_id, texts))
+            except OSError as exc:
+                del self.pending[req_id]
+                self.closed = True
+                raise ConnectionError(f"Embedding worker at {self.address} is gone") from exc
+        return req_id, future
+
+    def discard(self, req_id: int):
+        """Forget a request whose caller gave up; a late response is ignored."""
+        with self._lock:
+            self.pending.pop(req_id, None)
+
+    def _read(self):
+        try:
+            while True:
+                req_id, vectors, error = self.conn.recv()
+                with self._lock:
+                    future = self.pending.pop(req_id, None)
+                if future is None:
+                    continue
+                if error is not None:
+                    future.set_exception(RuntimeError(f"Embedding worker failed: {error}"))
+                else:
+                    future.set_result(vectors)
+        except (EOFError, OSError):
+            with self._lock:
+                self.closed = True
+                pending, self.pending = self.pending, {}
+            for future in pending.values():
+                future.set_exception(ConnectionError(f"Embedding worker at {self.address} is gone"))
+
+
+def _get_connections() -> List[_Connection]:
+    """Open connections to the workers that are up, reconnecting to any that were down."""
+    global _connections, _connections_pid
+    with _connections_lock:
+        if _connections_pid != os.getpid():
+            # Connections inherited through fork belong to the parent
+            _connections, _connections_pid = {}, os.getpid()
+        if not _addresses:
+            raise RuntimeError("Embedding workers are not running; call embedding_service.start() first")
+        for address in _addresses:
+            conn = _connections.get(address)
+            if conn is None or conn.closed:
+                try:
+                    _connections[address] = _Connection(address, _authkey)
+                except (OSError, EOFError, multiprocessing.AuthenticationError):
+                    # Down or restarting; tried again on the next call
+                    _connections.pop(address, None)
+        live = [c for c in _connections.values() if not c.closed]
+        if not live:
+            raise ConnectionError("No embedding worker is reachable")
+        return live
+
+
+def embed(texts: List[str]) -> List[List[float]]:
+    """Embed texts in the worker with the fewest outstanding requests."""
+    if not texts:
+        return []
+    if not _addresses:
+        start()
+    tried = set()
+    while True:
+        candidates = [c for c in _get_connections() if c.address not in tried]
+        if not candidates:
+            raise ConnectionError("Every embedding worker failed this request")
+        conn = min(candidates, key=lambda c: len(c.pending))
+        tried.add(conn.address)
+        try:
+            req_id, future = conn.submit(list(texts))
+        except ConnectionError:
+            continue
+        try:
+            vectors = future.result(timeout=EMBEDDING_SERVICE_TIMEOUT_S)
+        except TimeoutError:
+            conn.discard(req_id)
+            raise
+        except ConnectionError:
+            # The worker died with this request in flight; try another one
+            continue
+        return vectors.tolist()
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description="One embedding worker (started by embedding_service.start)")
+    ap.add_argument("--address", required=True, help="Unix socket path to serve on")
+    ap.add_argument("--threads", type=int, default=EMBEDDING_WORKER_THREADS)
+    ap.add_argument("--batch-size", type=int, default=EMBEDDING_BATCH_SIZE)
+    ap.add_argument("--wait-ms", type=float, default=EMBEDDING_BATCH_WAIT_MS)
+    args = ap.parse_args()
+    _serve(args.address, bytes.fromhex(os.environ["EMBEDDING_SERVICE_AUTHKEY"]), args.threads, args.batch_size,
+           args.wait_ms)
@@ -0,0 +1,58 @@
+"""
+Multi-query expansion from the structured query parse.
+
+A long job description embeds as one averaged vector, so assessments for
+its secondary skills rank poorly. The LLM parse already separates the role,
+technical skills, soft skills and key competencies; each group becomes a
+short sub-query. The recommender embeds the original query and the
+sub-queries in one batched call, searches them with one multi-vector query
+and fuses the result lists.
+"""
+from typing import Dict, List
+
+from .config import QUERY_EXPANSION_MAX
+
+# Skills per sub-query; long lists dilute the sub-query the same way
+MAX_TERMS = 8
+
+
+def _terms(analysis: Dict, field: str) -> List[str]:
+    values = analysis.get(field) or []
+    if isinstance(values, str):
+        values = [values]
+    return [str(v).strip() for v in values if str(v).strip()][:MAX_TERMS]
+
+
+def sub_queries(analysis: Dict, max_queries: int = QUERY_EXPANSION_MAX) -> List[str]:
+    """
+    Build short sub-queries from the parsed fields.
+
+    Args:
+        analysis: Output of the query parser
+        max_queries: Upper bound on sub-queries (0 disables expansion)
+
+    Returns:
+        Distinct sub-queries, most specific first; empty when the parse has
+        no role or skill fields (e.g. the heuristic fallback parser)
+    """
+    if max_queries <= 0:
+        return []
+    role = str(analysis.get("job_role") or "").strip()
+    prefix = f"{role}: " if role else ""
+    candidates = []
+    for field in ("technical_skills", "soft_skills", "key_competencies"):
+        terms = _terms(analysis, field)
+        if terms:
+            candidates.append(prefix + ", ".join(terms))
+    if role:
+        candidates.append(role)
+
+    raw = str(analysis.get("raw") or "").strip().lower()
+    out: List[str] = []
+    seen = {raw}
+    for q in candidates:
+        key = q.lower()
+        if key not in seen:
+            seen.add(key)
+            out.append(q)
+    return out[:max_queries]
@@ -0,0 +1,245 @@
+"""
+Multi-field embeddings per assessment with weighted score fusion.
+
+The single-vector index embeds one "name / description / skills" blob per
+assessment, so a long description dilutes the name and skill signal. In
+multi-field mode build_index.py also embeds each field separately and
+stores them in one float32 matrix with a field column, saved next to the
+vector store. A query is scored against every field vector with a single
+matrix-vector product and the per-field similarities are fused with
+configurable weights (weighted sum or weighted max). The field vectors can
+be held as int8 or binary codes with exact re-scoring (FIELD_QUANTIZATION).
+"""
+import os
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from .config import FIELD_FUSION, FIELD_INDEX_PATH, FIELD_QUANTIZATION, FIELD_RESCORE_FACTOR, FIELD_WEIGHTS
+from .quantization import QuantizedVectors, rescore
+from .ranking import top_k as top_k_positions
+
+FIELDS = ("name", "description", "skills")
+
+_index = None
+_loaded = False
+
+
+def parse_weights(spec: str) -> Dict[str, float]:
+    """Parse 'name=0.5,description=0.2,skills=0.3' into a weight per field."""
+    weights = {f: 0.0 for f in FIELDS}
+    for part in (spec or "").split(","):
+        if "=" in part:
+            field, value = part.split("=", 1)
+            if field.strip() in weights:
+                weights[field.strip()] = float(value)
+    return weights
+
+
+DEFAULT_WEIGHTS = parse_weights(FIELD_WEIGHTS)
+
+
+def field_texts(item: Dict) -> Dict[str, str]:
+    """The text embedded for each field of a catalog item."""
+    return {
+        "name": item.get("name") or "",
+        "description": item.get("description") or "",
+        "skills": ", ".join(item.get("skills") or []),
+    }
+
+
+def fuse(sims: np.ndarray, weights: Dict[str, float], fusion: str = FIELD_FUSION) -> np.ndarray:
+    """Fuse a (items, fields) similarity matrix with NaN for empty fields."""
+    w = np.array([weights.get(f, 0.0) for f in FIELDS], dtype=np.float32)
+    present = ~np.isnan(sims)
+    if fusion == "max":
+        weighted = np.where(present, sims * (w / (w.max() or 1.0)), -np.inf)
+        out = weighted.max(axis=1)
+        return np.where(np.isfinite(out), out, 0.0).astype(np.float32)
+    # Weighted sum, renormalized over the fields each assessment has
+    total = (present * w).sum(axis=1)
+    return (np.nan_to_num(sims) * w).sum(axis=1) / np.where(total > 0, total, 1.0)
+
+
+def _vectors_path(path: str) -> str:
+    return os.path.splitext(path)[0] + ".npy"
+
+
+class FieldIndex:
+    """
+    Field vectors for every assessment, stored as one (rows, dim) matrix.
+
+    With quantization 'int8' or 'binary' only the compact codes are held in
+    memory; the float32 matrix is memory-mapped and read just for the rows
+    re-scored exactly after the approximate pass.
+    """
+
+    def __init__(self, ids: Sequence[str], item_row: np.ndarray, field: np.ndarray, vectors: np.ndarray,
+                 signature: str = "", quantized: Optional[QuantizedVectors] = None):
+        self.ids = list(ids)
+        self.item_row = item_row.astype(np.int32)
+        self.field = field.astype(np.int8)
+        self.vectors = vectors
+        self.signature = signature
+        self.quantized = quantized
+
+    @classmethod
+    def build(cls, ids: Sequence[str], items: Sequence[Dict],
+              embed: Callable[[List[str]], List[List[float]]], signature: str = "") -> "FieldIndex":
+        item_row, field, texts = [], [], []
+        for row, item in enumerate(items):
+            for code, text in enumerate(field_texts(item).values()):
+                if text.strip():
+                    item_row.append(row)
+                    field.append(code)
+                    texts.append(text)
+        vectors = np.asarray(embed(texts), dtype=np.float32) if texts else np.zeros((0, 0), dtype=np.float32)
+        if vectors.size:
+            vectors /= np.linalg.norm(vectors, axis=1, keepdims=True).clip(min=1e-12)
+        return cls(ids, np.asarray(item_row), np.asarray(field), vectors, signature)
+
+    def save(self, path: str, quantization: str = FIELD_QUANTIZATION):
+        """
+        Write metadata to `path` and float32 vectors beside it (.npy).
+
+        Only the codes for `quantization` are stored, so the index has to be
+        rebuilt to switch FIELD_QUANTIZATION.
+        """
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        vectors = np.asarray(self.vectors, dtype=np.float32)
+        codes = {}
+        if quantization in ("int8", "binary"):
+            encoded = QuantizedVectors.encode(vectors, quantization)
+            codes[f"{quantization}_codes"] = encoded.codes
+            if encoded.scales is not None:
+                codes[f"{quantization}_scales"] = encoded.scales
+        np.save(_vectors_path(path), vectors)
+        np.savez(
+            path,
+            ids=np.asarray(self.ids),
+            item_row=self.item_row,
+            field=self.field,
+            signature=np.asarray(self.signature),
+            quantization=np.asarray(quantization),
+            **codes,
+        )
+
+    @classmethod
+    def load(cls, path: str, quantization: str = FIELD_QUANTIZATION) -> "FieldIndex":
+        with np.load(path) as data:
+            built = str(data["quantization"]) if "quantization" in data else "none"
+            if quantization in ("int8", "binary") and built != quantization:
+                raise ValueError(
+                    f"{path} was built with FIELD_QUANTIZATION={built}, not {quantization}; "
+                    "rebuild it with build_index.py"
+                )
+            quantized = None
+            if quantization == "int8":
+                quantized = QuantizedVectors("int8", data["int8_codes"], data["int8_scales"])
+            elif quantization == "binary":
+                quantized = QuantizedVectors("binary", data["binary_codes"])
+            # Mapped read-only: resident pages are shared by every worker process
+            vectors = np.load(_vectors_path(path), mmap_mode="r")
+            if quantized is not None:
+                quantized.dim = vectors.shape[1]
+            return cls(
+                data["ids"].tolist(),
+                data["item_row"],
+                data["field"],
+                vectors,
+                str(data["signature"]),
+                quantized,
+            )
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def _normalized(self, q_emb: Sequence[float]) -> np.ndarray:
+        q = np.asarray(q_emb, dtype=np.float32)
+        return q / (np.linalg.norm(q) or 1.0)
+
+    def field_similarities(self, q_emb: Sequence[float]) -> np.ndarray:
+        """
+        Similarity per (assessment, field); NaN where a field is empty.
+
+        Exact cosine without quantization, otherwise the approximate score
+        scaled to roughly the cosine range.
+        """
+        q = self._normalized(q_emb)
+        sims = np.full((len(self.ids), len(FIELDS)), np.nan, dtype=np.float32)
+        if self.item_row.size:
+            if self.quantized is None:
+                sims[self.item_row, self.field] = np.asarray(self.vectors) @ q
+            else:
+                approx = self.quantized.approximate_scores(q)
+                if self.quantized.mode == "binary":
+                    approx = approx / max(self.quantized.dim, 1)
+                sims[self.item_row, self.field] = approx
+        return sims
+
+    def scores(self, q_emb: Sequence[float], weights: Optional[Dict[str, float]] = None,
+               fusion: str = FIELD_FUSION) -> np.ndarray:
+        """Fuse per-field similarities into one score per assessment."""
+        return fuse(self.field_similarities(q_emb), DEFAULT_WEIGHTS if weights is None else weights, fusion)
+
+    def search(self, q_emb: Sequence[float], top_k: int, weights: Optional[Dict[str, float]] = None,
+               fusion: str = FIELD_FUSION, rescore_factor: int = FIELD_RESCORE_FACTOR) -> Tuple[List[str], np.ndarray]:
+        """
+        Best assessments for a query, best first.
+
+        With quantization, the top `top_k * rescore_factor` assessments of
+        the approximate pass are re-scored exactly from the float32 vectors.
+        """
+        weights = DEFAULT_WEIGHTS if weights is None else weights
+        scores = fuse(self.field_similarities(q_emb), weights, fusion)
+        if self.quantized is None:
+            top = top_k_positions(scores, top_k)
+            return [self.ids[i] for i in top], scores[top]
+
+        candidates = top_k_positions(scores, top_k * max(rescore_factor, 1))
+        rows = np.flatnonzero(np.isin(self.item_row, candidates))
+        sims = np.full((len(self.ids), len(FIELDS)), np.nan, dtype=np.float32)
+        sims[self.item_row[rows], self.field[rows]] = rescore(self.vectors, rows, self._normalized(q_emb))
+        exact = fuse(sims[candidates], weights, fusion)
+        top = top_k_positions(exact, top_k)
+        return [self.ids[candidates[i]] for i in top], exact[top]
+
+    def search_many(self, q_embs: Sequence[Sequence[float]], top_k: int, weights: Optional[Dict[str, float]] = None,
+                    fusion: str = FIELD_FUSION,
+                    rescore_factor: int = FIELD_RESCORE_FACTOR) -> List[Tuple[List[str], np.ndarray]]:
+        """
+        search() for several queries, scoring float32 vectors with one matrix product.
+
+        Returns:
+            One (ids, scores) pair per query
+        """
+        if self.quantized is not None or not self.item_row.size:
+            return [self.search(q, top_k, weights, fusion, rescore_factor) for q in q_embs]
+        weights = DEFAULT_WEIGHTS if weights is None else weights
+        q = np.asarray(q_embs, dtype=np.float32)
+        q /= np.linalg.norm(q, axis=1, keepdims=True).clip(min=1e-12)
+        all_sims = np.asarray(self.vectors) @ q.T
+        out = []
+        for j in range(q.shape[0]):
+            sims = np.full((len(self.ids), len(FIELDS)), np.nan, dtype=np.float32)
+            sims[self.item_row, self.field] = all_sims[:, j]
+            scores = fuse(sims, weights, fusion)
+            top = top_k_positions(scores, top_k)
+            out.append(([self.ids[i] for i in top], scores[top]))
+        return out
+
+
+def build_and_save(ids: Sequence[str], items: Sequence[Dict], embed, signature: str = "",
+                   path: str = FIELD_INDEX_PATH) -> FieldIndex:
+    index = FieldIndex.build(ids, items, embed, signature)
+    index.save(path)
+    return index
+
+
+def get_index() -> Optional[FieldIndex]:
+    """Load the persisted field index once; None if it has not been built."""
+    global _index, _loaded
+    if not _loaded:
+        _index = FieldIndex.load(FIELD_INDEX_PATH) if os.path.exists(FIELD_INDEX_PATH) else None
+        _loaded = True
+    return _index
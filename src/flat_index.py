@@ -0,0 +1,116 @@
+"""
+Read-only, memory-mapped copy of the vector store for multi-worker serving.
+
+Chroma keeps its HNSW graph on each process's heap, so N workers hold N
+copies of it. With VECTOR_BACKEND=mmap the catalog vectors are read from
+a .npy file mapped read-only, which every worker shares through the page
+cache, and searched exactly with one matrix product (for a catalog of a
+few thousand items that is as fast as the graph). Ids, metadata,
+documents and the collection metadata (embedding signature, HNSW
+parameters) live in a JSON file beside it. build_index.py exports both
+after filling the collection.
+"""
+import json
+import os
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+
+from .config import FLAT_INDEX_PATH
+from .ranking import top_k as top_k_positions
+
+_index = None
+_loaded = False
+
+
+def _vectors_path(path: str) -> str:
+    return os.path.splitext(path)[0] + ".npy"
+
+
+class FlatIndex:
+    def __init__(self, ids: Sequence[str], metadatas: Sequence[Dict], documents: Sequence[str],
+                 vectors: np.ndarray, metadata: Optional[Dict] = None):
+        self.ids = list(ids)
+        self.metadatas = list(metadatas)
+        self.documents = list(documents)
+        self.vectors = vectors
+        self.metadata = metadata or {}
+        self.row_of = {item_id: row for row, item_id in enumerate(self.ids)}
+
+    def save(self, path: str):
+        """Write unit-normalized float32 vectors to a .npy beside `path` and the rest to `path`."""
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        vectors = np.asarray(self.vectors, dtype=np.float32)
+        if vectors.size:
+            vectors = vectors / np.linalg.norm(vectors, axis=1, keepdims=True).clip(min=1e-12)
+        np.save(_vectors_path(path), vectors)
+        with open(path, "w") as f:
+            json.dump({
+                "ids": self.ids,
+                "metadatas": self.metadatas,
+                "documents": self.documents,
+                "metadata": self.metadata,
+            }, f)
+
+    @classmethod
+    def load(cls, path: str) -> "FlatIndex":
+        with open(path, "r") as f:
+            data = json.load(f)
+        vectors = np.load(_vectors_path(path), mmap_mode="r")
+        return cls(data["ids"], data["metadatas"], data["documents"], vectors, data.get("metadata"))
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def _allowed(self, where: Optional[Dict]) -> Optional[np.ndarray]:
+        """Rows matching an equality-only metadata filter ({"type": "K"})."""
+        if not where:
+            return None
+        for key, value in where.items():
+            if key.startswith("$") or isinstance(value, dict):
+                raise ValueError(f"The mmap backend supports equality filters only, got {where}")
+        return np.array(
+            [all((meta or {}).get(k) == v for k, v in where.items()) for meta in self.metadatas], dtype=bool
+        )
+
+    def query_many(
+        self,
+        embeddings: Sequence[Sequence[float]],
+        top_k: int = 20,
+        where: Optional[Dict] = None,
+        include: Sequence[str] = ("documents", "metadatas", "distances"),
+    ) -> Dict[str, List]:
+        """Exact cosine search in the same result shape as Chroma's collection.query."""
+        q = np.asarray(embeddings, dtype=np.float32)
+        q /= np.linalg.norm(q, axis=1, keepdims=True).clip(min=1e-12)
+        sims = q @ self.vectors.T
+        allowed = self._allowed(where)
+        if allowed is not None:
+            sims[:, ~allowed] = -np.inf
+        out: Dict[str, List] = {"ids": [], **{key: [] for key in include}}
+        for row_sims in sims:
+            top = top_k_positions(row_sims, top_k)
+            out["ids"].append([self.ids[i] for i in top])
+            if "documents" in include:
+                out["documents"].append([self.documents[i] for i in top])
+            if "metadatas" in include:
+                out["metadatas"].append([self.metadatas[i] for i in top])
+            if "distances" in include:
+                out["distances"].append((1.0 - row_sims[top]).tolist())
+        return out
+
+    def get_all(self) -> Dict[str, List]:
+        return {"ids": self.ids, "metadatas": self.metadatas, "documents": self.documents}
+
+    def get_embeddings(self, ids: List[str]) -> Dict[str, List[float]]:
+        rows = {i: self.row_of[i] for i in ids if i in self.row_of}
+        return {i: self.vectors[row].tolist() for i, row in rows.items()}
+
+
+def get_index() -> Optional[FlatIndex]:
+    """Load the exported index once; None if it has not been exported."""
+    global _index, _loaded
+    if not _loaded:
+        _index = FlatIndex.load(FLAT_INDEX_PATH) if os.path.exists(FLAT_INDEX_PATH) else None
+        _loaded = True
+    return _index
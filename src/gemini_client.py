@@ -23,6 +23,9 @@ genai.configure(api_key=GOOGLE_API_KEY)
 CHAT_MODEL = "gemini-pro"  # Stable and efficient for chat
 EMBEDDING_MODEL = "models/text-embedding-004"  # Latest embedding model
 
+# Texts per batchEmbedContents request (API limit)
+EMBED_BATCH_SIZE = 100
+
 # REST API endpoints
 GEMINI_API_BASE = "https://generativelanguage.googleapis.com/v1beta"
 
@@ -169,10 +172,24 @@ def get_embedding(text: str) -> List[float]:
         raise RuntimeError(f"Gemini embedding error: {str(e)}")
 
 
+def _embed_batch(texts: List[str], task_type: str) -> List[List[float]]:
+    """Embed texts with one batchEmbedContents request per EMBED_BATCH_SIZE texts."""
+    embeddings = []
+    for i in range(0, len(texts), EMBED_BATCH_SIZE):
+        # A list as content makes the SDK send a single batch request
+        result = genai.embed_content(
+            model=EMBEDDING_MODEL,
+            content=texts[i:i + EMBED_BATCH_SIZE],
+            task_type=task_type
+        )
+        embeddings.extend(result['embedding'])
+    return embeddings
+
+
 def get_embeddings(texts: List[str]) -> List[List[float]]:
     """
     Generate embeddings for multiple texts using Gemini.
-    Uses batch processing for efficiency.
+    Uses batch requests for efficiency.
     
     Args:
         texts: List of texts to embed
@@ -181,29 +198,28 @@ def get_embeddings(texts: List[str]) -> List[List[float]]:
         List of embedding vectors
     """
     try:
-        embeddings = []
-        # Process in batches of 100 (Gemini API limit)
-        batch_size = 100
-        for i in range(0, len(texts), batch_size):
-            batch = texts[i:i + batch_size]
-            
-            # Embed each text in the batch
-            batch_embeddings = []
-            for text in batch:
-                result = genai.embed_content(
-                    model=EMBEDDING_MODEL,
-                    content=text,
-                    task_type="retrieval_document"
-                )
-                batch_embeddings.append(result['embedding'])
-            
-            embeddings.extend(batch_embeddings)
-        
-        return embeddings
+        return _embed_batch(texts, "retrieval_document")
     except Exception as e:
         raise RuntimeError(f"Gemini embeddings error: {str(e)}")
 
 
+def get_query_embeddings(texts: List[str]) -> List[List[float]]:
+    """
+    Generate query embeddings for several texts (e.g. a query and its
+    expansions) in one batch request, with the retrieval_query task type.
+    
+    Args:
+        texts: The query texts to embed
+        
+    Returns:
+        List of embedding vectors
+    """
+    try:
+        return _embed_batch(texts, "retrieval_query")
+    except Exception as e:
+        raise RuntimeError(f"Gemini query embedding error: {str(e)}")
+
+
 def get_query_embedding(text: str) -> List[float]:
     """
     Generate embedding for a query using Gemini.
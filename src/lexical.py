@@ -0,0 +1,177 @@
+"""
+In-memory BM25 lexical index over the same documents as the vector store.
+
+Assessment names carry exact tokens ("Java 8", "SQL", "Automata") that
+embeddings blur. The index is built by build_index.py, persisted next to
+the Chroma directory and loaded once per process. Search results can be
+fused with vector hits through reciprocal rank fusion, or used on their
+own when the lexical match is strong enough to skip the embedding call.
+"""
+import bisect
+import json
+import math
+import os
+import re
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from .config import LEXICAL_INDEX_PATH
+
+_TOKEN_RE = re.compile(r"[a-z0-9][a-z0-9+#]*")
+STOPWORDS = frozenset(
+    "a an and are as at be by for from has have i in is it looking of on or "
+    "our that the their this to we who will with you your can also".split()
+)
+
+_index = None
+_loaded = False
+
+
+def tokenize(text: str) -> List[str]:
+    return [t for t in _TOKEN_RE.findall((text or "").lower()) if t not in STOPWORDS]
+
+
+class BM25Index:
+    """Okapi BM25 over a fixed document set, with postings as NumPy arrays."""
+
+    def __init__(self, ids: Sequence[str], doc_len: np.ndarray, postings: Dict[str, Tuple[np.ndarray, np.ndarray]],
+                 k1: float = 1.2, b: float = 0.75):
+        self.ids = list(ids)
+        self.row_of = {doc_id: row for row, doc_id in enumerate(self.ids)}
+        self.doc_len = doc_len.astype(np.float32)
+        self.postings = postings
+        self.k1 = k1
+        self.b = b
+        n = len(self.ids)
+        self.avg_len = float(self.doc_len.mean()) if n else 0.0
+        self.idf = {
+            term: math.log(1.0 + (n - rows.size + 0.5) / (rows.size + 0.5))
+            for term, (rows, _) in postings.items()
+        }
+        # Unknown query terms weigh as much as the rarest indexed term
+        self.max_idf = max(self.idf.values()) if self.idf else 0.0
+        # Sorted vocabulary for prefix lookups (typeahead)
+        self.vocab = sorted(postings)
+
+    @classmethod
+    def build(cls, ids: Sequence[str], docs: Sequence[str], k1: float = 1.2, b: float = 0.75) -> "BM25Index":
+        raw: Dict[str, Dict[int, int]] = {}
+        doc_len = np.zeros(len(docs), dtype=np.float32)
+        for row, doc in enumerate(docs):
+            tokens = tokenize(doc)
+            doc_len[row] = len(tokens)
+            for t in tokens:
+                counts = raw.setdefault(t, {})
+                counts[row] = counts.get(row, 0) + 1
+        postings = {
+            term: (np.fromiter(counts.keys(), dtype=np.int32), np.fromiter(counts.values(), dtype=np.float32))
+            for term, counts in raw.items()
+        }
+        return cls(ids, doc_len, postings, k1, b)
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def save(self, path: str):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        data = {
+            "k1": self.k1,
+            "b": self.b,
+            "ids": self.ids,
+            "doc_len": self.doc_len.tolist(),
+            "postings": {t: [rows.tolist(), tf.tolist()] for t, (rows, tf) in self.postings.items()},
+        }
+        with open(path, "w") as f:
+            json.dump(data, f)
+
+    @classmethod
+    def load(cls, path: str) -> "BM25Index":
+        with open(path, "r") as f:
+            data = json.load(f)
+        postings = {
+            t: (np.asarray(rows, dtype=np.int32), np.asarray(tf, dtype=np.float32))
+            for t, (rows, tf) in data["postings"].items()
+        }
+        return cls(data["ids"], np.asarray(data["doc_len"]), postings, data["k1"], data["b"])
+
+    def term_scores(self, term: str) -> Tuple[np.ndarray, np.ndarray]:
+        """(rows containing the term, their BM25 contribution for it)."""
+        post = self.postings.get(term)
+        if post is None:
+            return np.empty(0, dtype=np.int32), np.empty(0, dtype=np.float32)
+        rows, tf = post
+        norm = tf + self.k1 * (1.0 - self.b + self.b * self.doc_len[rows] / self.avg_len)
+        return rows, self.idf[term] * tf * (self.k1 + 1.0) / norm
+
+    def terms_with_prefix(self, prefix: str) -> List[str]:
+        """Indexed terms starting with prefix, in lexical order."""
+        lo = bisect.bisect_left(self.vocab, prefix)
+        hi = bisect.bisect_left(self.vocab, prefix + "\uffff")
+        return self.vocab[lo:hi]
+
+    def scores(self, query: str) -> np.ndarray:
+        """BM25 score of every document for the query."""
+        out = np.zeros(len(self.ids), dtype=np.float32)
+        for term in set(tokenize(query)):
+            rows, contrib = self.term_scores(term)
+            out[rows] += contrib
+        return out
+
+    def search(self, query: str, top_k: int) -> Tuple[List[str], np.ndarray]:
+        """Top documents with a positive score, best first."""
+        scores = self.scores(query)
+        hits = np.flatnonzero(scores > 0)
+        if hits.size > top_k:
+            hits = hits[np.argpartition(-scores[hits], top_k - 1)[:top_k]]
+        hits = hits[np.argsort(-scores[hits], kind="stable")]
+        return [self.ids[i] for i in hits], scores[hits]
+
+    def coverage(self, query: str, doc_id: str) -> float:
+        """Share of the query's IDF mass whose terms occur in the given document."""
+        terms = set(tokenize(query))
+        row = self.row_of.get(doc_id)
+        if not terms or row is None:
+            return 0.0
+        total = matched = 0.0
+        for term in terms:
+            idf = self.idf.get(term, self.max_idf)
+            total += idf
+            post = self.postings.get(term)
+            if post is not None and row in post[0]:
+                matched += idf
+        return matched / total if total else 0.0
+
+
+def build_and_save(ids: Sequence[str], docs: Sequence[str], path: str = LEXICAL_INDEX_PATH) -> BM25Index:
+    index = BM25Index.build(ids, docs)
+    index.save(path)
+    return index
+
+
+def get_index() -> Optional[BM25Index]:
+    """Load the persisted index once; None if it has not been built."""
+    global _index, _loaded
+    if not _loaded:
+        _index = BM25Index.load(LEXICAL_INDEX_PATH) if os.path.exists(LEXICAL_INDEX_PATH) else None
+        _loaded = True
+    return _index
+
+
+def reciprocal_rank_fusion(rankings: Sequence[Sequence[str]], k: int = 60) -> Tuple[List[str], np.ndarray]:
+    """
+    Fuse ranked id lists with RRF.
+
+    Scores are divided by the best achievable score (rank 1 in every list)
+    so they fall in 0-1 like cosine similarity.
+
+    Returns:
+        (ids best first, normalized fused scores)
+    """
+    fused: Dict[str, float] = {}
+    for ranked in rankings:
+        for rank, doc_id in enumerate(ranked, start=1):
+            fused[doc_id] = fused.get(doc_id, 0.0) + 1.0 / (k + rank)
+    ids = sorted(fused, key=fused.get, reverse=True)
+    best = len(rankings) / (k + 1.0) if rankings else 1.0
+    return ids, np.array([fused[i] / best for i in ids], dtype=np.float32)
@@ -8,7 +8,9 @@ The provider is configured via LLM_PROVIDER in config.py
 """
 import json
 from typing import Dict
+from . import metrics
 from .config import LLM_PROVIDER
+from .providers import get_llm_provider
 
 EXTRACTION_PROMPT = """Analyze this job query/description and extract structured information.
 
@@ -30,17 +32,11 @@ Return ONLY the JSON, no other text."""
 
 def _extract_with_provider(prompt: str) -> str:
     """Extract structured data using the configured LLM provider."""
-    if LLM_PROVIDER == "gemini":
-        from .gemini_client import extract_structured_data
-        return extract_structured_data(prompt, temperature=0.3, use_pro_model=False)
-    elif LLM_PROVIDER == "groq":
-        from .groq_client import extract_structured_data
-        return extract_structured_data(prompt, temperature=0.3)
-    elif LLM_PROVIDER == "openai":
-        from .openai_client import generate_text
-        return generate_text(prompt, temperature=0.3)
-    else:
-        raise ValueError(f"Unknown LLM provider: {LLM_PROVIDER}")
+    try:
+        return get_llm_provider().extract(prompt)
+    except Exception:
+        metrics.PROVIDER_ERRORS.labels(LLM_PROVIDER, "extract").inc()
+        raise
 
 
 def parse_query_with_llm(query: str) -> Dict:
@@ -79,6 +75,7 @@ def parse_query_with_llm(query: str) -> Dict:
         return parsed
     except Exception as e:
         print(f"LLM parsing failed ({LLM_PROVIDER}): {e}, falling back to heuristic")
+        metrics.LLM_FALLBACKS.labels(LLM_PROVIDER).inc()
         # Fallback to heuristic parser
         from .query_parser import parse_query
         return parse_query(query)
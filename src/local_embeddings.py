@@ -5,11 +5,12 @@ No API calls, no quota limits - perfect for Vercel deployment.
 from typing import List
 from sentence_transformers import SentenceTransformer
 import numpy as np
+from .config import LOCAL_EMBEDDING_MODEL
 
 # Using a lightweight, high-quality model
 # all-MiniLM-L6-v2: 384 dimensions, fast, good quality
 _model = None
-MODEL_NAME = "all-MiniLM-L6-v2"
+MODEL_NAME = LOCAL_EMBEDDING_MODEL
 
 
 def get_model():
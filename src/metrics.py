@@ -0,0 +1,78 @@
+"""
+Prometheus metrics for the recommend path, served at GET /metrics.
+
+Stage latencies come from the per-request timings in timing.py and are
+observed once per request, labelled with the backend that served the
+stage (the LLM provider for 'parse', the embedding provider for 'embed').
+Fallbacks, cache lookups and provider errors are counted where they
+happen.
+
+Under scripts/serve.py every worker writes its samples to
+PROMETHEUS_MULTIPROC_DIR (prometheus_client's multiprocess mode) and
+/metrics, whichever worker answers, aggregates all of them.
+"""
+import os
+from typing import Dict
+
+from prometheus_client import CONTENT_TYPE_LATEST, CollectorRegistry, Counter, Gauge, Histogram, generate_latest
+from prometheus_client import multiprocess
+
+from . import timing
+from .config import EMBEDDING_PROVIDER, LLM_PROVIDER
+
+# 1 ms to 30 s; LLM parsing dominates the upper buckets
+_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+STAGE_SECONDS = Histogram(
+    "shl_stage_duration_seconds", "Time spent in each recommend stage", ["stage", "provider"], buckets=_BUCKETS
+)
+REQUEST_SECONDS = Histogram(
+    "shl_request_duration_seconds", "End-to-end request latency", ["endpoint"], buckets=_BUCKETS
+)
+IN_FLIGHT = Gauge("shl_requests_in_flight", "Requests currently being served", multiprocess_mode="livesum")
+REQUEST_ERRORS = Counter("shl_request_errors_total", "Requests that failed with a server error", ["endpoint"])
+LLM_FALLBACKS = Counter(
+    "shl_llm_fallbacks_total", "Queries parsed by the heuristic parser after the LLM failed", ["provider"]
+)
+PROVIDER_ERRORS = Counter("shl_provider_errors_total", "Failed provider calls", ["provider", "operation"])
+ADMISSION_REJECTED = Counter(
+    "shl_admission_rejected_total", "Callers turned away by a full admission queue", ["stage"]
+)
+CACHE_LOOKUPS = Counter("shl_cache_lookups_total", "Cache lookups by cache and outcome", ["cache", "result"])
+
+STAGE_PROVIDERS = {"parse": LLM_PROVIDER, "embed": EMBEDDING_PROVIDER}
+
+
+def observe_stages(timings: Dict[str, float]):
+    """Record one request's stage durations (ms) in the stage histogram."""
+    for stage, ms in timings.items():
+        STAGE_SECONDS.labels(stage, STAGE_PROVIDERS.get(stage, "local")).observe(ms / 1000.0)
+
+
+def record_cache(cache: str, hits: int, misses: int):
+    """Count lookups globally and in the current request's tallies."""
+    timing.count(f"{cache}_cache_hits", hits)
+    timing.count(f"{cache}_cache_misses", misses)
+    if hits:
+        CACHE_LOOKUPS.labels(cache, "hit").inc(hits)
+    if misses:
+        CACHE_LOOKUPS.labels(cache, "miss").inc(misses)
+
+
+def _multiprocess() -> bool:
+    return bool(os.environ.get("PROMETHEUS_MULTIPROC_DIR"))
+
+
+def mark_dead(pid: int):
+    """Drop a finished worker's live gauges (multiprocess mode only)."""
+    if _multiprocess():
+        multiprocess.mark_process_dead(pid)
+
+
+def render():
+    """(body, content type) of the Prometheus text exposition."""
+    if _multiprocess():
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        return generate_latest(registry), CONTENT_TYPE_LATEST
+    return generate_latest(), CONTENT_TYPE_LATEST
@@ -0,0 +1,101 @@
+"""
+Cursor pagination over cached ranked result lists.
+
+/recommend stores the full ranked list of a query (up to PAGINATION_DEPTH
+results) when the request asks to paginate, and returns an opaque cursor for the next page. Following a
+cursor only slices the stored list, so deeper pages never reach the LLM,
+the embedding provider or the vector store. Lists expire after
+PAGE_CACHE_TTL_S and the oldest are evicted once the store holds more
+than PAGE_CACHE_MAX_ITEMS results. Result records share their strings with
+the catalog features, so the item count bounds memory closely.
+"""
+import secrets
+import threading
+import time
+from collections import OrderedDict
+from typing import List, Optional, Tuple
+
+from .config import PAGE_CACHE_MAX_ITEMS, PAGE_CACHE_TTL_S
+from .results import Recommendation
+
+
+class _Entry:
+    __slots__ = ("items", "page_size", "expires")
+
+    def __init__(self, items: List[Recommendation], page_size: int, expires: float):
+        self.items = items
+        self.page_size = page_size
+        self.expires = expires
+
+
+class PageStore:
+    """Ranked lists by id with a TTL, bounded by the total number of stored results."""
+
+    def __init__(self, max_items: int = PAGE_CACHE_MAX_ITEMS, ttl_s: float = PAGE_CACHE_TTL_S):
+        self.max_items = max_items
+        self.ttl_s = ttl_s
+        self.total_items = 0
+        self._lists: "OrderedDict[str, _Entry]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._lists)
+
+    def _evict(self, now: float):
+        # Entries are in insertion order and share one TTL, so expired ones come first
+        while self._lists:
+            list_id, entry = next(iter(self._lists.items()))
+            if entry.expires > now and self.total_items <= self.max_items:
+                break
+            del self._lists[list_id]
+            self.total_items -= len(entry.items)
+
+    def put(self, items: List[Recommendation], page_size: int) -> Optional[str]:
+        """
+        Store a ranked list whose first page_size results were already served.
+
+        Returns:
+            Cursor for the second page, or None when there is none
+
+        Raises:
+            ValueError: page_size is not positive (the cursor could not advance)
+        """
+        if page_size <= 0:
+            raise ValueError(f"page_size must be positive, got {page_size}")
+        if len(items) <= page_size or len(items) > self.max_items:
+            return None
+        list_id = secrets.token_urlsafe(12)
+        now = time.monotonic()
+        with self._lock:
+            self._lists[list_id] = _Entry(items, page_size, now + self.ttl_s)
+            self.total_items += len(items)
+            self._evict(now)
+        return f"{list_id}.{page_size}"
+
+    def page(self, cursor: str, limit: Optional[int] = None) -> Optional[Tuple[List[Recommendation], Optional[str], int]]:
+        """
+        The page a cursor points to.
+
+        Args:
+            cursor: Cursor from /recommend or a previous page
+            limit: Page size (defaults to the first page's size)
+
+        Returns:
+            (results, cursor for the next page or None, length of the whole list),
+            or None when the cursor is malformed, expired or evicted
+        """
+        list_id, _, offset = (cursor or "").rpartition(".")
+        if not offset.isdigit():
+            return None
+        with self._lock:
+            self._evict(time.monotonic())
+            entry = self._lists.get(list_id)
+        if entry is None:
+            return None
+        start = int(offset)
+        end = start + (limit if limit and limit > 0 else entry.page_size)
+        next_cursor = f"{list_id}.{end}" if end < len(entry.items) else None
+        return entry.items[start:end], next_cursor, len(entry.items)
+
+
+store = PageStore()
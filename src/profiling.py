@@ -0,0 +1,138 @@
+"""
+Opt-in, sampled profiling of individual recommend requests.
+
+With PROFILE_ENABLED=true, a share of requests (PROFILE_SAMPLE_RATE) or any
+request sent with an `X-Profile: 1` header is profiled end to end:
+deterministically with cProfile (.prof, for pstats / snakeviz / gprof2dot)
+or statistically with pyinstrument (.html) when PROFILE_MODE=pyinstrument
+and it is installed. Files go to PROFILE_DIR named after the time, query
+hash and stage timings, and the oldest are deleted past PROFILE_MAX_MB.
+"""
+import cProfile
+import hashlib
+import logging
+import os
+import random
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict
+
+from . import timing
+from .config import PROFILE_DIR, PROFILE_ENABLED, PROFILE_MAX_MB, PROFILE_MODE, PROFILE_SAMPLE_RATE
+
+logger = logging.getLogger(__name__)
+
+# Only one profiler can be attached at a time; concurrent requests are not profiled
+_lock = threading.Lock()
+
+
+def should_sample(rate: float = PROFILE_SAMPLE_RATE) -> bool:
+    return rate > 0 and random.random() < rate
+
+
+def query_hash(query: str) -> str:
+    return hashlib.sha1((query or "").encode("utf-8")).hexdigest()[:12]
+
+
+def profile_name(query: str, timings: Dict[str, float], total_ms: float, ext: str) -> str:
+    """e.g. 20250101T120000.123_3f2a9c1b7d4e_1234ms_parse=800_embed=300.prof"""
+    now = time.time()
+    stamp = time.strftime("%Y%m%dT%H%M%S", time.localtime(now)) + f".{int(now * 1000) % 1000:03d}"
+    stages = "_".join(f"{name}={ms:.0f}" for name, ms in timings.items())
+    return f"{stamp}_{query_hash(query)}_{total_ms:.0f}ms" + (f"_{stages}" if stages else "") + ext
+
+
+def enforce_cap(directory: str = PROFILE_DIR, max_mb: float = PROFILE_MAX_MB):
+    """Delete the oldest profiles until the directory fits in max_mb."""
+    paths = [os.path.join(directory, f) for f in os.listdir(directory)]
+    paths = sorted((p for p in paths if os.path.isfile(p)), key=os.path.getmtime)
+    total = sum(os.path.getsize(p) for p in paths)
+    limit = max_mb * 2**20
+    for path in paths:
+        if total <= limit:
+            break
+        total -= os.path.getsize(path)
+        os.remove(path)
+
+
+class _Profiler:
+    """cProfile or pyinstrument behind one start/stop/save interface."""
+
+    def __init__(self, mode: str):
+        self.mode = "cprofile"
+        if mode == "pyinstrument":
+            try:
+                from pyinstrument import Profiler
+
+                self._impl = Profiler()
+                self.mode = mode
+            except ImportError:
+                logger.warning("pyinstrument is not installed; profiling with cProfile")
+        if self.mode == "cprofile":
+            self._impl = cProfile.Profile()
+
+    @property
+    def ext(self) -> str:
+        return ".html" if self.mode == "pyinstrument" else ".prof"
+
+    def start(self):
+        if self.mode == "pyinstrument":
+            self._impl.start()
+        else:
+            self._impl.enable()
+
+    def stop(self):
+        if self.mode == "pyinstrument":
+            self._impl.stop()
+        else:
+            self._impl.disable()
+
+    def save(self, path: str):
+        if self.mode == "pyinstrument":
+            with open(path, "w") as f:
+                f.write(self._impl.output_html())
+        else:
+            self._impl.dump_stats(path)
+
+
+@contextmanager
+def profile_request(query: str, force: bool = False):
+    """
+    Record stage timings for a request and profile it when sampled.
+
+    Args:
+        query: The request's query, hashed into the profile filename
+        force: Profile regardless of the sample rate (e.g. X-Profile header)
+
+    Yields:
+        Whether this request is being profiled
+    """
+    timings = timing.start()
+    if not PROFILE_ENABLED or not (force or should_sample()) or not _lock.acquire(blocking=False):
+        yield False
+        return
+    profiler = _Profiler(PROFILE_MODE)
+    try:
+        profiler.start()
+    except ValueError:
+        # Another profiler or debugger already owns the hook
+        _lock.release()
+        yield False
+        return
+    start = time.perf_counter()
+    try:
+        yield True
+    finally:
+        profiler.stop()
+        total_ms = (time.perf_counter() - start) * 1000
+        try:
+            os.makedirs(PROFILE_DIR, exist_ok=True)
+            path = os.path.join(PROFILE_DIR, profile_name(query, timings, total_ms, profiler.ext))
+            profiler.save(path)
+            enforce_cap()
+            logger.info("Wrote request profile %s", path)
+        except OSError:
+            logger.warning("Could not write request profile", exc_info=True)
+        finally:
+            _lock.release()
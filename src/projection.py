@@ -0,0 +1,135 @@
+"""
+Index-time dimensionality reduction for large embedding providers.
+
+OpenAI's text-embedding-3-large returns 3072 dimensions, far more than a
+catalog of a few hundred assessments needs. build_index.py can project
+document vectors down to EMBEDDING_REDUCED_DIM, either by truncation
+(Matryoshka-trained models keep most of their quality in the leading
+dimensions) or with a PCA basis fitted on the catalog. The projection is
+saved next to the vector store and applied to every query embedding, and
+its tag is part of the provider signature so a mismatched index is caught.
+"""
+import os
+from typing import List, Optional
+
+import numpy as np
+
+from .config import PROJECTION_PATH
+from .providers import Provider
+
+METHODS = ("none", "truncate", "pca")
+
+_projection = None
+_loaded = False
+
+
+class Projection:
+    """A linear map from the provider's dimensions to `dim`, followed by re-normalization."""
+
+    def __init__(self, method: str, dim: int, source_dim: int,
+                 mean: Optional[np.ndarray] = None, components: Optional[np.ndarray] = None):
+        if method not in ("truncate", "pca"):
+            raise ValueError(f"Unknown projection method: {method}")
+        self.method = method
+        self.dim = dim
+        self.source_dim = source_dim
+        self.mean = mean
+        self.components = components
+
+    @classmethod
+    def fit(cls, vectors: np.ndarray, method: str, dim: int) -> "Projection":
+        """
+        Fit a projection on the catalog's document vectors.
+
+        Args:
+            vectors: (n, source_dim) embeddings from the provider
+            method: 'truncate' or 'pca'
+            dim: Target dimensionality (capped at what the data supports)
+
+        Returns:
+            Projection ready to apply to documents and queries
+        """
+        vectors = np.asarray(vectors, dtype=np.float32)
+        source_dim = vectors.shape[1]
+        if method == "truncate":
+            return cls(method, min(dim, source_dim), source_dim)
+        # PCA basis from the SVD of the centered catalog; a catalog of n
+        # documents spans at most n - 1 directions
+        dim = min(dim, source_dim, max(len(vectors) - 1, 1))
+        mean = vectors.mean(axis=0)
+        _, _, vt = np.linalg.svd(vectors - mean, full_matrices=False)
+        return cls(method, dim, source_dim, mean.astype(np.float32), vt[:dim].astype(np.float32))
+
+    @property
+    def tag(self) -> str:
+        """Short label appended to the provider model in the signature, e.g. 'pca256'."""
+        return f"{self.method}{self.dim}"
+
+    def apply(self, vectors) -> np.ndarray:
+        """Project (n, source_dim) vectors to unit-length (n, dim) vectors."""
+        x = np.asarray(vectors, dtype=np.float32)
+        if x.shape[-1] != self.source_dim:
+            raise ValueError(f"Projection expects {self.source_dim}-dimensional vectors, got {x.shape[-1]}")
+        if self.method == "truncate":
+            out = x[..., :self.dim]
+        else:
+            out = (x - self.mean) @ self.components.T
+        return out / np.linalg.norm(out, axis=-1, keepdims=True).clip(min=1e-12)
+
+    def wrap(self, provider: Provider) -> Provider:
+        """A Provider whose embeddings come out already projected."""
+        return Provider(
+            provider.name,
+            model=f"{provider.model}+{self.tag}",
+            dimensions=self.dim,
+            embed_documents=lambda texts: self.apply(provider.embed_documents(texts)).tolist(),
+            embed_queries=lambda texts: self.apply(provider.embed_queries(texts)).tolist(),
+            extract=provider._extract,
+            preload=provider._preload,
+        )
+
+    def save(self, path: str):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        arrays = {"method": np.asarray(self.method), "dim": self.dim, "source_dim": self.source_dim}
+        if self.method == "pca":
+            arrays.update(mean=self.mean, components=self.components)
+        np.savez(path, **arrays)
+
+    @classmethod
+    def load(cls, path: str) -> "Projection":
+        with np.load(path) as data:
+            method = str(data["method"])
+            return cls(
+                method,
+                int(data["dim"]),
+                int(data["source_dim"]),
+                data["mean"] if method == "pca" else None,
+                data["components"] if method == "pca" else None,
+            )
+
+
+def fit_projection(vectors: List[List[float]], method: str, dim: int) -> Optional[Projection]:
+    """Fit the projection for a new index; None when method is 'none'."""
+    if method == "none":
+        return None
+    return Projection.fit(np.asarray(vectors, dtype=np.float32), method, dim)
+
+
+def save_projection(projection: Optional[Projection], path: str = PROJECTION_PATH):
+    """Persist the index's projection, or remove a stale one when it has none."""
+    global _projection, _loaded
+    if projection is None:
+        if os.path.exists(path):
+            os.remove(path)
+    else:
+        projection.save(path)
+    _projection, _loaded = projection, True
+
+
+def get_projection() -> Optional[Projection]:
+    """Load the projection the index was built with once; None if it was built unreduced."""
+    global _projection, _loaded
+    if not _loaded:
+        _projection = Projection.load(PROJECTION_PATH) if os.path.exists(PROJECTION_PATH) else None
+        _loaded = True
+    return _projection
@@ -0,0 +1,210 @@
+"""
+Provider registry for embedding and LLM backends.
+
+Each backend name ('gemini', 'openai', 'groq', 'local') maps to a loader that
+imports its client module and returns a Provider object. Loaders run once per
+process; afterwards callers hold the resolved Provider and make direct method
+calls instead of re-dispatching on the configured provider string.
+
+New backends can be plugged in with register_provider() without touching
+embedding.py or llm_query_parser.py.
+"""
+from typing import Callable, Dict, List, Optional, Union
+from .config import EMBEDDING_PROVIDER, EMBEDDING_WORKERS, LLM_PROVIDER, LOCAL_EMBEDDING_MODEL
+
+
+class Provider:
+    """
+    A resolved backend with bound embedding and/or extraction callables.
+
+    Capabilities a backend does not offer are left as None and raise
+    NotImplementedError when called.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        model: str = "",
+        dimensions: Union[int, Callable[[], int]] = 0,
+        embed_documents: Optional[Callable[[List[str]], List[List[float]]]] = None,
+        embed_queries: Optional[Callable[[List[str]], List[List[float]]]] = None,
+        extract: Optional[Callable[[str], str]] = None,
+        preload: Optional[Callable[[], object]] = None,
+    ):
+        self.name = name
+        self.model = model
+        # An int, or a callable asked once on first access (e.g. the loaded model)
+        self._dimensions = dimensions
+        self._embed_documents = embed_documents
+        self._embed_queries = embed_queries or embed_documents
+        self._extract = extract
+        self._preload = preload
+
+    @property
+    def dimensions(self) -> int:
+        if callable(self._dimensions):
+            self._dimensions = int(self._dimensions())
+        return self._dimensions
+
+    @property
+    def signature(self) -> str:
+        """Identifier stored with the index so mismatched providers are detected."""
+        return f"{self.name}:{self.model}:{self.dimensions}"
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        if self._embed_documents is None:
+            raise NotImplementedError(f"Provider '{self.name}' does not support embeddings")
+        return self._embed_documents(texts)
+
+    def embed_queries(self, texts: List[str]) -> List[List[float]]:
+        if self._embed_queries is None:
+            raise NotImplementedError(f"Provider '{self.name}' does not support embeddings")
+        return self._embed_queries(texts)
+
+    def extract(self, prompt: str) -> str:
+        if self._extract is None:
+            raise NotImplementedError(f"Provider '{self.name}' does not support text extraction")
+        return self._extract(prompt)
+
+    def preload(self):
+        """Load model weights now (e.g. before forking workers) instead of on first use."""
+        if self._preload is not None:
+            self._preload()
+
+    def __repr__(self) -> str:
+        return f"Provider({self.signature})"
+
+
+def _load_gemini() -> Provider:
+    from . import gemini_client
+
+    return Provider(
+        "gemini",
+        model=gemini_client.EMBEDDING_MODEL,
+        dimensions=gemini_client.get_dimensions(),
+        embed_documents=gemini_client.get_embeddings,
+        embed_queries=gemini_client.get_query_embeddings,
+        extract=lambda prompt: gemini_client.extract_structured_data(
+            prompt, temperature=0.3, use_pro_model=False
+        ),
+    )
+
+
+def _load_openai() -> Provider:
+    from . import openai_client
+
+    return Provider(
+        "openai",
+        model=openai_client.EMBEDDING_MODEL,
+        dimensions=3072,  # text-embedding-3-large
+        embed_documents=openai_client.get_embeddings,
+        extract=lambda prompt: openai_client.generate_text(prompt, temperature=0.3),
+    )
+
+
+def _load_groq() -> Provider:
+    from . import groq_client
+
+    return Provider(
+        "groq",
+        model=groq_client.CHAT_MODEL,
+        extract=lambda prompt: groq_client.extract_structured_data(prompt, temperature=0.3),
+    )
+
+
+def _load_local() -> Provider:
+    if EMBEDDING_WORKERS > 0:
+        # Inference runs in dedicated processes; this process never imports torch
+        from . import embedding_service
+
+        return Provider(
+            "local",
+            model=LOCAL_EMBEDDING_MODEL,
+            dimensions=lambda: len(embedding_service.embed(["dimension probe"])[0]),
+            embed_documents=embedding_service.embed,
+            preload=embedding_service.start,
+        )
+
+    from . import local_embeddings
+
+    return Provider(
+        "local",
+        model=local_embeddings.MODEL_NAME,
+        dimensions=lambda: local_embeddings.get_model().get_sentence_embedding_dimension(),
+        embed_documents=local_embeddings.get_embeddings,
+        preload=local_embeddings.get_model,
+    )
+
+
+_LOADERS: Dict[str, Callable[[], Provider]] = {
+    "gemini": _load_gemini,
+    "openai": _load_openai,
+    "groq": _load_groq,
+    "local": _load_local,
+}
+# Backends that can serve EMBEDDING_PROVIDER; any other name falls back to local
+_EMBEDDING_BACKENDS = {"gemini", "openai", "local"}
+_resolved: Dict[str, Provider] = {}
+
+
+def register_provider(name: str, loader: Callable[[], Provider], embeddings: bool = True):
+    """
+    Register (or replace) the loader for a backend name.
+
+    Args:
+        name: Backend name used in EMBEDDING_PROVIDER / LLM_PROVIDER
+        loader: Returns the Provider; called once, on first use
+        embeddings: Whether the backend can be used as the embedding provider
+    """
+    _LOADERS[name] = loader
+    if embeddings:
+        _EMBEDDING_BACKENDS.add(name)
+    else:
+        _EMBEDDING_BACKENDS.discard(name)
+    for key in [k for k in _resolved if k == name or k.startswith(name + "+")]:
+        del _resolved[key]
+
+
+def resolve_provider(name: str) -> Provider:
+    """Return the Provider for a backend name, loading it on first use."""
+    provider = _resolved.get(name)
+    if provider is None:
+        loader = _LOADERS.get(name)
+        if loader is None:
+            raise ValueError(f"Unknown provider: {name}")
+        provider = loader()
+        _resolved[name] = provider
+    return provider
+
+
+def get_embedding_provider(reduced: bool = True) -> Provider:
+    """
+    Resolve the configured embedding backend.
+
+    Unknown names and LLM-only backends such as 'groq' fall back to local.
+
+    Args:
+        reduced: Apply the dimensionality reduction the index was built with,
+            if any (see projection.py); False returns the raw provider
+
+    Returns:
+        Provider for embedding documents and queries
+    """
+    name = EMBEDDING_PROVIDER if EMBEDDING_PROVIDER in _EMBEDDING_BACKENDS else "local"
+    provider = resolve_provider(name)
+    if not reduced:
+        return provider
+    from .projection import get_projection
+
+    projection = get_projection()
+    if projection is None:
+        return provider
+    key = f"{name}+{projection.tag}"
+    if key not in _resolved:
+        _resolved[key] = projection.wrap(provider)
+    return _resolved[key]
+
+
+def get_llm_provider() -> Provider:
+    """Resolve the configured LLM backend."""
+    return resolve_provider(LLM_PROVIDER)
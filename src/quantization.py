@@ -0,0 +1,63 @@
+"""
+Compressed vector codes for a fast approximate first pass.
+
+int8 stores each unit-normalized vector as signed bytes with a per-vector
+scale (4x smaller than float32); binary keeps only the sign of each
+dimension packed into bits (32x smaller) and ranks by Hamming distance.
+Callers re-score the best approximate candidates exactly against the
+full-precision vectors, which stay on disk in a memory-mapped .npy file
+and are paged in only for the rows that are touched.
+"""
+from typing import Optional
+
+import numpy as np
+
+MODES = ("none", "int8", "binary")
+
+# Popcount of every byte value, for Hamming distances between packed codes
+_POPCOUNT = np.array([bin(i).count("1") for i in range(256)], dtype=np.uint8)
+
+
+class QuantizedVectors:
+    """Approximate codes for a (rows, dim) float32 matrix."""
+
+    def __init__(self, mode: str, codes: np.ndarray, scales: Optional[np.ndarray] = None, dim: int = 0):
+        if mode not in ("int8", "binary"):
+            raise ValueError(f"Unknown quantization mode: {mode}")
+        self.mode = mode
+        self.codes = codes
+        self.scales = scales
+        self.dim = dim
+
+    @classmethod
+    def encode(cls, vectors: np.ndarray, mode: str) -> "QuantizedVectors":
+        vectors = np.asarray(vectors, dtype=np.float32)
+        dim = vectors.shape[1] if vectors.ndim == 2 else 0
+        if mode == "int8":
+            scales = np.abs(vectors).max(axis=1) / 127.0 if vectors.size else np.zeros(0, np.float32)
+            scales = np.where(scales > 0, scales, 1.0).astype(np.float32)
+            codes = np.round(vectors / scales[:, None]).astype(np.int8)
+            return cls(mode, codes, scales, dim)
+        return cls(mode, np.packbits(vectors > 0, axis=1), None, dim)
+
+    @property
+    def nbytes(self) -> int:
+        return self.codes.nbytes + (self.scales.nbytes if self.scales is not None else 0)
+
+    def approximate_scores(self, q: np.ndarray) -> np.ndarray:
+        """Higher is more similar; comparable across rows, not to cosine."""
+        q = np.asarray(q, dtype=np.float32)
+        if self.mode == "int8":
+            return (self.codes @ q) * self.scales
+        q_bits = np.packbits(q > 0)
+        hamming = _POPCOUNT[np.bitwise_xor(self.codes, q_bits)].sum(axis=1, dtype=np.int32)
+        return (self.dim - 2 * hamming).astype(np.float32)
+
+
+def rescore(full: np.ndarray, rows: np.ndarray, q: np.ndarray) -> np.ndarray:
+    """Exact dot products for selected rows of a (possibly memory-mapped) matrix."""
+    order = np.argsort(rows)
+    exact = np.empty(rows.size, dtype=np.float32)
+    # Sorted gathers keep memory-mapped reads sequential
+    exact[order] = np.asarray(full[rows[order]], dtype=np.float32) @ np.asarray(q, dtype=np.float32)
+    return exact
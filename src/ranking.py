@@ -0,0 +1,221 @@
+"""
+Vectorized re-ranking over catalog-aligned feature arrays.
+
+CatalogFeatures is built once from the index metadata and holds one row per
+assessment: type code, duration bounds and a packed skill bitset. Ranking a
+candidate pool is then a handful of NumPy operations over the gathered rows
+instead of per-dict Python loops.
+"""
+import ast
+import re
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from .config import RANK_WEIGHT_SIMILARITY, RANK_WEIGHT_SKILLS, RANK_WEIGHT_TYPE
+
+# SHL test type letters; the index into this tuple is the stored type code
+TYPE_CODES = ("K", "P", "A", "B", "C", "D", "E", "S")
+UNKNOWN_TYPE = -1
+TYPE_TECH = TYPE_CODES.index("K")
+TYPE_BEHAVIORAL = TYPE_CODES.index("P")
+
+# Popcount of every byte value, for counting set bits in packed bitsets
+_POPCOUNT = np.array([bin(i).count("1") for i in range(256)], dtype=np.uint8)
+_NUMBER_RE = re.compile(r"\d+")
+
+
+def parse_duration_bounds(text: str) -> Tuple[float, float]:
+    """
+    Parse a catalog duration such as '30 minutes', '20-30 minutes' or '1 hour'.
+
+    Returns:
+        (min_minutes, max_minutes), NaN for both when no number is present
+    """
+    if not text:
+        return float("nan"), float("nan")
+    s = text.lower()
+    nums = [int(x) for x in _NUMBER_RE.findall(s)]
+    if not nums:
+        if "hour" in s:
+            return 60.0, 60.0
+        return float("nan"), float("nan")
+    if "hour" in s:
+        if "min" in s and len(nums) >= 2:  # e.g. '1 hour 30 minutes'
+            total = float(nums[0] * 60 + nums[1])
+            return total, total
+        return float(min(nums) * 60), float(max(nums) * 60)
+    return float(min(nums)), float(max(nums))
+
+
+def normalize_skill(skill: str) -> str:
+    return " ".join(str(skill).lower().split())
+
+
+def _decode_skills(value) -> List[str]:
+    """Skills are stored as a stringified list in Chroma metadata."""
+    if isinstance(value, str):
+        try:
+            value = ast.literal_eval(value)
+        except Exception:
+            return []
+    return list(value) if isinstance(value, (list, tuple)) else []
+
+
+class RankWeights:
+    """Weights for the final score; defaults come from config."""
+
+    def __init__(
+        self,
+        similarity: float = RANK_WEIGHT_SIMILARITY,
+        skills: float = RANK_WEIGHT_SKILLS,
+        type_match: float = RANK_WEIGHT_TYPE,
+    ):
+        self.similarity = similarity
+        self.skills = skills
+        self.type_match = type_match
+
+
+class CatalogFeatures:
+    """Per-assessment feature arrays aligned by row with the catalog index."""
+
+    def __init__(self, ids: Sequence[str], metadatas: Sequence[Dict], documents: Optional[Sequence[str]] = None):
+        n = len(ids)
+        self.ids = list(ids)
+        self.documents = list(documents) if documents is not None else [""] * n
+        self.row_of = {item_id: row for row, item_id in enumerate(self.ids)}
+        self.names: List[str] = []
+        self.urls: List[str] = []
+        self.types: List[str] = []
+        self.durations: List[str] = []
+        self.skills: List[List[str]] = []
+        self.type_code = np.full(n, UNKNOWN_TYPE, dtype=np.int8)
+        self.duration_min = np.full(n, np.nan, dtype=np.float32)
+        self.duration_max = np.full(n, np.nan, dtype=np.float32)
+
+        self.skill_vocab: Dict[str, int] = {}
+        skill_rows: List[List[int]] = []
+        for row, meta in enumerate(metadatas):
+            meta = meta or {}
+            url = meta.get("url") or ""
+            name = meta.get("name") or ""
+            if not name and url:
+                slug = url.rstrip("/").split("/")[-1]
+                name = slug.replace("-", " ").replace("_", " ").title()
+            item_type = meta.get("type") or ""
+            duration = meta.get("duration") or ""
+            skills = _decode_skills(meta.get("skills"))
+
+            self.names.append(name)
+            self.urls.append(url)
+            self.types.append(item_type)
+            self.durations.append(duration)
+            self.skills.append(skills)
+            if item_type in TYPE_CODES:
+                self.type_code[row] = TYPE_CODES.index(item_type)
+            self.duration_min[row], self.duration_max[row] = parse_duration_bounds(duration)
+            skill_rows.append([
+                self.skill_vocab.setdefault(normalize_skill(s), len(self.skill_vocab))
+                for s in skills
+            ])
+
+        bits = np.zeros((n, max(len(self.skill_vocab), 1)), dtype=bool)
+        for row, cols in enumerate(skill_rows):
+            bits[row, cols] = True
+        self.skill_bits = np.packbits(bits, axis=1)
+
+        # Catalog statistics used to estimate filter selectivity
+        self.type_counts = np.bincount(self.type_code[self.type_code >= 0], minlength=len(TYPE_CODES))
+        finite = self.duration_max[np.isfinite(self.duration_max)]
+        self.sorted_duration_max = np.sort(finite)
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def type_share(self, letter: str) -> float:
+        """Fraction of the catalog with the given type letter."""
+        if not len(self) or letter not in TYPE_CODES:
+            return 0.0
+        return float(self.type_counts[TYPE_CODES.index(letter)]) / len(self)
+
+    def duration_selectivity(self, minutes: Optional[float]) -> float:
+        """Fraction of the catalog that passes the per-item duration filter."""
+        if not minutes:
+            return 1.0
+        if not len(self):
+            return 0.0
+        fits = np.searchsorted(self.sorted_duration_max, float(minutes), side="right")
+        return float(fits) / len(self)
+
+    def rows_for(self, ids: Iterable[str]) -> np.ndarray:
+        """Map index ids to feature rows (-1 for ids not in the catalog)."""
+        return np.fromiter((self.row_of.get(i, -1) for i in ids), dtype=np.int64)
+
+    def query_skill_bits(self, skills: Iterable[str]) -> Tuple[np.ndarray, int]:
+        """Pack query skills into a bitset row; returns (bits, number of known skills)."""
+        bits = np.zeros(self.skill_bits.shape[1] * 8, dtype=bool)
+        known = 0
+        for s in skills or []:
+            col = self.skill_vocab.get(normalize_skill(s))
+            if col is not None and not bits[col]:
+                bits[col] = True
+                known += 1
+        return np.packbits(bits), known
+
+
+def query_skills(analysis: Dict) -> List[str]:
+    """Collect the skill names extracted by the query parser."""
+    out: List[str] = []
+    for field in ("technical_skills", "soft_skills", "key_competencies"):
+        values = analysis.get(field) or []
+        if isinstance(values, str):
+            values = [values]
+        out.extend(values)
+    return out
+
+
+def score_candidates(
+    features: CatalogFeatures,
+    rows: np.ndarray,
+    similarity: np.ndarray,
+    analysis: Dict,
+    weights: Optional[RankWeights] = None,
+) -> np.ndarray:
+    """
+    Compute the weighted final score for candidate rows in one vectorized pass.
+
+    Candidates excluded by hard constraints (duration) score -inf.
+    """
+    weights = weights or RankWeights()
+    score = weights.similarity * similarity.astype(np.float32)
+
+    q_bits, n_query_skills = features.query_skill_bits(query_skills(analysis))
+    if n_query_skills and weights.skills:
+        overlap = _POPCOUNT[features.skill_bits[rows] & q_bits].sum(axis=1)
+        score += weights.skills * (overlap / n_query_skills)
+
+    if weights.type_match:
+        codes = features.type_code[rows]
+        if analysis.get("prefers_tech"):
+            score += weights.type_match * (codes == TYPE_TECH)
+        elif analysis.get("prefers_behavioral"):
+            score += weights.type_match * (codes == TYPE_BEHAVIORAL)
+
+    minutes = analysis.get("duration_minutes")
+    if minutes:
+        # Unknown durations cannot be shown to fit, so they are excluded too
+        too_long = ~(features.duration_max[rows] <= float(minutes))
+        score[too_long] = -np.inf
+    return score
+
+
+def top_k(scores: np.ndarray, k: int) -> np.ndarray:
+    """Positions of the k best finite scores, best first."""
+    valid = np.flatnonzero(np.isfinite(scores))
+    if k <= 0 or valid.size == 0:
+        return valid[:0]
+    if valid.size > k:
+        part = np.argpartition(-scores[valid], k - 1)[:k]
+        valid = valid[part]
+    return valid[np.argsort(-scores[valid], kind="stable")]
+
@@ -1,86 +1,683 @@
-from typing import List, Dict
-from .embedding import embed_query, embed_texts
+import logging
+import math
+import threading
+import time
+from collections import OrderedDict
+from typing import List, Dict, Optional
+import numpy as np
+from . import admission
+from . import expansion
+from . import field_index
+from . import lexical
+from . import metrics
+from . import ranking
+from . import reranker
+from . import selection
+from . import skill_index
+from . import timing
+from . import typeahead
+from .bundle import optimize_bundle
+from .config import (
+    BUNDLE_MAX_CANDIDATES,
+    EMBEDDING_PROVIDER,
+    QUERY_EMBED_CACHE_SIZE,
+    INDEX_FIELDS,
+    LEXICAL_FAST_PATH_MIN_COVERAGE,
+    PAGINATION_DEPTH,
+    RANK_WEIGHT_RERANK,
+    RERANK_ENABLED,
+    RERANK_TOP_N,
+    RETRIEVAL_POOL_GROWTH,
+    RETRIEVAL_POOL_HEADROOM,
+    RETRIEVAL_MODE,
+    RETRIEVAL_POOL_MIN,
+    RRF_K,
+    SKILL_FILTER_MODE,
+    TYPEAHEAD_MIN_CHARS,
+)
+from .providers import get_embedding_provider
+from .results import Recommendation
 from . import vector_store
 try:
     from .llm_query_parser import parse_query_with_llm as parse_query
 except ImportError:
     from .query_parser import parse_query
+from .query_parser import parse_query as heuristic_parse
 
+logger = logging.getLogger(__name__)
 
-def balance_recommendations(candidates: List[Dict], analysis: Dict, k: int) -> List[Dict]:
-    if not analysis.get("needs_balance"):
-        return candidates[:k]
-    tech = [c for c in candidates if c.get("type") == "K"]
-    beh = [c for c in candidates if c.get("type") == "P"]
-    tech_n = int(round(k * 0.6))
-    beh_n = k - tech_n
-    out = tech[:tech_n] + beh[:beh_n]
-    if len(out) < k:
-        rest = [c for c in candidates if c not in out]
-        out += rest[: k - len(out)]
-    return out[:k]
+_features = None
 
 
-def recommend_assessments(query: str, top_k: int = 10) -> List[Dict]:
-    analysis = parse_query(query)
-    q_emb = embed_query(query)
-    res = vector_store.query(q_emb, top_k=50)
+def _get_features() -> ranking.CatalogFeatures:
+    """Build the catalog feature arrays once from the index metadata."""
+    global _features
+    if _features is None:
+        res = vector_store.get_all()
+        _features = ranking.CatalogFeatures(
+            res.get("ids") or [], res.get("metadatas") or [], res.get("documents")
+        )
+    return _features
 
-    docs = res.get("documents", [[]])[0]
-    metas = res.get("metadatas", [[]])[0]
-    dists = res.get("distances", [[]])[0]
 
+_embedder = None
+
+
+def _get_embedder():
+    """Resolve the embedding provider once and check it against the index."""
+    global _embedder
+    if _embedder is None:
+        provider = get_embedding_provider()
+        vector_store.verify_signature(provider.signature)
+        _embedder = provider
+    return _embedder
+
+
+def _get_field_index() -> Optional[field_index.FieldIndex]:
+    """The multi-field index when INDEX_FIELDS='multi' and it has been built."""
+    if INDEX_FIELDS != "multi":
+        return None
+    fields = field_index.get_index()
+    if fields is not None and fields.signature and fields.signature != _get_embedder().signature:
+        raise vector_store.ProviderMismatchError(
+            f"Field index was built with '{fields.signature}' but queries use "
+            f"'{_get_embedder().signature}'. Rebuild the index or set EMBEDDING_PROVIDER to match."
+        )
+    return fields
+
+
+def _retrieval_mode(query: str) -> str:
+    """Pick 'vector', 'hybrid' or 'lexical' retrieval for a query."""
+    index = lexical.get_index()
+    if index is None:
+        return "vector"
+    if RETRIEVAL_MODE in ("vector", "lexical"):
+        return RETRIEVAL_MODE
+    if LEXICAL_FAST_PATH_MIN_COVERAGE > 0:
+        ids, _ = index.search(query, 1)
+        if ids and index.coverage(query, ids[0]) >= LEXICAL_FAST_PATH_MIN_COVERAGE:
+            return "lexical"
+    return "hybrid"
+
+
+_query_embeddings: "OrderedDict[str, List[float]]" = OrderedDict()
+_query_embeddings_lock = threading.Lock()
+
+
+def _cached_query_embeddings(texts: List[str]) -> Dict[str, List[float]]:
+    found = {}
+    with _query_embeddings_lock:
+        for text in texts:
+            emb = _query_embeddings.get(text)
+            if emb is not None:
+                _query_embeddings.move_to_end(text)
+                found[text] = emb
+    metrics.record_cache("query_embedding", len(found), len(texts) - len(found))
+    return found
+
+
+def _embed_texts(texts: List[str]) -> Dict[str, List[float]]:
+    """
+    Embed query texts in one provider call and cache them.
+
+    Returns an empty dict when the provider fails and a lexical index can
+    answer instead; otherwise the error propagates.
+    """
+    try:
+        embs = _get_embedder().embed_queries(texts)
+    except vector_store.ProviderMismatchError:
+        raise
+    except Exception:
+        metrics.PROVIDER_ERRORS.labels(EMBEDDING_PROVIDER, "embed").inc()
+        if lexical.get_index() is None:
+            raise
+        logger.warning("Query embedding failed, answering from the lexical index", exc_info=True)
+        return {}
+    out = dict(zip(texts, embs))
+    with _query_embeddings_lock:
+        _query_embeddings.update(out)
+        while len(_query_embeddings) > QUERY_EMBED_CACHE_SIZE:
+            _query_embeddings.popitem(last=False)
+    return out
+
+
+def _embed_query(query: str, mode: str, analysis: Optional[Dict] = None, degraded: bool = False):
+    """
+    Embed the query and its expansion sub-queries unless retrieval is lexical-only.
+
+    The sub-queries built from `analysis` are embedded in the same batched
+    provider call as the query, and embeddings are cached per text. In
+    degraded mode, or when the 'embed' admission queue is full, only cached
+    embeddings are used. When the query has no embedding (provider failure
+    or cache miss) and a lexical index exists, retrieval degrades to
+    lexical-only instead of failing the request. Without a lexical index
+    the mode is 'none' and the request gets an empty result; the provider
+    is never called past the admission limits.
+
+    Returns:
+        (query embedding or None, sub-query embeddings, retrieval mode)
+    """
+    if mode == "lexical":
+        return None, [], mode
+    subs = expansion.sub_queries(analysis) if analysis else []
+    texts = [query] + subs
+    found = _cached_query_embeddings(texts)
+    missing = [t for t in texts if t not in found]
+    if missing and not degraded:
+        with admission.stage_slot("embed") as granted:
+            if granted:
+                found.update(_embed_texts(missing))
+    if query not in found:
+        return None, [], "lexical" if lexical.get_index() is not None else "none"
+    return found[query], [found[s] for s in subs if s in found], mode
+
+
+def analyze_query(query: str, degraded: bool = False) -> Dict:
+    """LLM parse, or the heuristic parser when degraded or the 'parse' queue is full."""
+    with timing.stage("parse"):
+        if not degraded:
+            with admission.stage_slot("parse") as granted:
+                if granted:
+                    return parse_query(query)
+        return heuristic_parse(query)
+
+
+def _skill_candidates(analysis: Dict) -> Optional[List[str]]:
+    """Assessment ids matching the parsed skills, most matches first (None if unused)."""
+    index = skill_index.get_index()
+    skills = ranking.query_skills(analysis)
+    if SKILL_FILTER_MODE == "off" or index is None or not skills:
+        return None
+    if SKILL_FILTER_MODE == "filter":
+        # Prefer assessments covering every named skill, else any of them
+        narrowed = index.ids_all(skills) or index.ids_any(skills)
+        return [i for i in index.ranked(skills) if i in narrowed]
+    return index.ranked(skills) or None
+
+
+def _exact_similarities(vectors: List[List[float]], ids: List[str]) -> np.ndarray:
+    """
+    Cosine similarity of each query vector against stored vectors for specific
+    ids (0 if missing), from one fetch of the stored rows.
+
+    Returns:
+        Array of shape (len(vectors), len(ids))
+    """
+    stored = vector_store.get_embeddings(ids)
+    q = np.asarray(vectors, dtype=np.float32).reshape(len(vectors), -1)
+    q /= np.linalg.norm(q, axis=1, keepdims=True).clip(min=1e-12)
+    sims = np.zeros((len(vectors), len(ids)), dtype=np.float32)
+    found = [i for i, item_id in enumerate(ids) if stored.get(item_id) is not None]
+    if found:
+        v = np.asarray([stored[ids[i]] for i in found], dtype=np.float32)
+        v /= np.linalg.norm(v, axis=1, keepdims=True).clip(min=1e-12)
+        sims[:, found] = q @ v.T
+    return sims
+
+
+def _exact_similarity(q_emb: List[float], ids: List[str]) -> np.ndarray:
+    """Cosine similarity against stored vectors for specific ids (0 if missing)."""
+    return _exact_similarities([q_emb], ids)[0]
+
+
+def _lexical_similarity(query: str, ids: List[str]) -> np.ndarray:
+    """BM25 for specific ids, scaled to 0-1 by the best score among them."""
+    index = lexical.get_index()
+    scores = index.scores(query)
+    rows = [index.row_of.get(i) for i in ids]
+    sims = np.array([scores[r] if r is not None else 0.0 for r in rows], dtype=np.float32)
+    best = sims.max() if sims.size else 0.0
+    return sims / best if best > 0 else sims
+
+
+def _parser_tier(analysis: Dict) -> str:
+    """'llm' when the LLM parse succeeded, else 'heuristic'."""
+    return "llm" if analysis.get("llm_provider") else "heuristic"
+
+
+def _degraded(analysis: Dict, requested_mode: str, mode: str) -> List[str]:
+    """Stages that fell back to a cheaper path for this request."""
+    degraded = []
+    if _parser_tier(analysis) == "heuristic" and parse_query.__module__.endswith("llm_query_parser"):
+        degraded.append("parse")
+    if mode != requested_mode:
+        degraded.append("embed")
+    return degraded
+
+
+def _by_score(ids: List[str], sims: np.ndarray) -> List[str]:
+    return [ids[i] for i in np.argsort(-sims, kind="stable")]
+
+
+def _on_cosine_scale(fused: np.ndarray, cosine: np.ndarray) -> np.ndarray:
+    """
+    Map fused RRF scores linearly onto the range of the query's cosine
+    similarities, keeping their order. The skill and type boosts in
+    ranking.score_candidates are sized against cosine gaps; raw RRF scores
+    are spread differently and would let the boosts outweigh relevance.
+    """
+    if fused.size == 0 or cosine.size == 0:
+        return fused
+    lo, hi = float(np.min(cosine)), float(np.max(cosine))
+    f_lo, f_hi = float(fused.min()), float(fused.max())
+    if f_hi - f_lo < 1e-12:
+        return np.full_like(fused, hi)
+    return (lo + (fused - f_lo) * ((hi - lo) / (f_hi - f_lo))).astype(np.float32)
+
+
+def _retrieve(
+    query: str,
+    q_emb: Optional[List[float]],
+    mode: str,
+    pool: int,
+    features: ranking.CatalogFeatures,
+    skill_ids: Optional[List[str]] = None,
+    sub_embs: Optional[List[List[float]]] = None,
+):
+    """
+    Fetch up to `pool` candidates and map them onto catalog feature rows.
+
+    With SKILL_FILTER_MODE='filter' and skill matches, only those ids are
+    scored (exactly, without an ANN search). In 'boost' mode skill matches
+    missing from the pool are merged in. Expansion sub-queries are searched
+    together with the query in one multi-vector call (or scored against the
+    same fetched rows in filter mode) and their result lists join the rank
+    fusion. Fused scores are put back on the query's cosine scale so the
+    ranking boosts weigh the same as in vector mode.
+
+    Returns:
+        (rows, similarity per row, whether the source ran out of candidates)
+    """
+    if mode == "none":
+        return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.float32), True
+    if skill_ids and SKILL_FILTER_MODE == "filter":
+        ids = list(skill_ids)
+        if mode == "lexical":
+            sims = _lexical_similarity(query, ids)
+        else:
+            all_sims = _exact_similarities([q_emb] + list(sub_embs or []), ids)
+            sims = all_sims[0]
+            rankings = [_by_score(ids, s) for s in all_sims]
+            if mode == "hybrid":
+                rankings.append(_by_score(ids, _lexical_similarity(query, ids)))
+            if len(rankings) > 1:
+                cosine = sims
+                ids, fused = lexical.reciprocal_rank_fusion(rankings, k=RRF_K)
+                sims = _on_cosine_scale(fused, cosine)
+        exhausted = True
+    elif mode == "lexical":
+        ids, scores = lexical.get_index().search(query, pool)
+        # Scale BM25 to 0-1 relative to the best hit
+        sims = scores / scores[0] if scores.size else scores
+        exhausted = len(ids) < pool
+        seen = set(ids)
+        missing = [i for i in skill_ids or [] if i not in seen]
+        if missing:
+            all_ids = ids + missing
+            ids, sims = all_ids, _lexical_similarity(query, all_ids)
+    else:
+        vectors = [q_emb] + list(sub_embs or [])
+        fields = _get_field_index()
+        if fields is not None:
+            hits = fields.search_many(vectors, pool)
+        else:
+            # Ids and distances only; documents and metadata come from the feature arrays
+            res = vector_store.query_many(vectors, top_k=pool, include=("distances",))
+            hits = [
+                (ids, np.array([1.0 - d if d is not None else 0.0 for d in dists], dtype=np.float32))
+                for ids, dists in zip(res.get("ids") or [[]], res.get("distances") or [[]])
+            ]
+        ids, sims = hits[0]
+        expanded = [sub_ids for sub_ids, _ in hits[1:]]
+        exhausted = len(ids) < pool
+        if mode == "hybrid":
+            lex_ids, _ = lexical.get_index().search(query, pool)
+            rankings = [ids] + expanded + [lex_ids] + ([skill_ids] if skill_ids else [])
+            ids, fused = lexical.reciprocal_rank_fusion(rankings, k=RRF_K)
+            sims = _on_cosine_scale(fused, sims)
+        elif expanded:
+            rankings = [ids] + expanded + ([skill_ids] if skill_ids else [])
+            ids, fused = lexical.reciprocal_rank_fusion(rankings, k=RRF_K)
+            sims = _on_cosine_scale(fused, sims)
+        else:
+            seen = set(ids)
+            missing = [i for i in skill_ids or [] if i not in seen]
+            if missing:
+                ids = ids + missing
+                sims = np.concatenate([sims, _exact_similarity(q_emb, missing)])
+
+    rows = features.rows_for(ids)
+    known = np.flatnonzero(rows >= 0)
+    return rows[known], sims[known], exhausted
+
+
+def _to_items(features: ranking.CatalogFeatures, rows, scores, positions) -> List[Recommendation]:
     items = []
-    for doc, meta, dist in zip(docs, metas, dists):
-        score = 1.0 - dist if dist is not None else 0.0
-        url = (meta or {}).get("url") or ""
-        raw_name = (meta or {}).get("name") or ""
-
-        if not raw_name and url:
-            slug = url.rstrip("/").split("/")[-1]
-            raw_name = slug.replace("-", " ").replace("_", " ").title()
-
-        skills_meta = (meta or {}).get("skills")
-        if isinstance(skills_meta, str):
-            # Stored as string in metadata for Chroma compatibility
-            try:
-                import ast
-
-                skills = ast.literal_eval(skills_meta)
-                if not isinstance(skills, list):
-                    skills = []
-            except Exception:
-                skills = []
+    for pos in positions:
+        row = int(rows[pos])
+        items.append(Recommendation(
+            features.names[row],
+            features.urls[row],
+            features.types[row],
+            features.durations[row],
+            float(scores[pos]),
+            row,
+            features,
+        ))
+    return items
+
+
+def _initial_pool(features: ranking.CatalogFeatures, analysis: Dict, quotas: Dict, top_k: int) -> int:
+    """Size the first retrieval from top_k and the estimated filter selectivity."""
+    selectivity = features.duration_selectivity(analysis.get("duration_minutes"))
+    for letter, quota in quotas.items():
+        if quota.maximum == 0:
+            selectivity *= 1.0 - features.type_share(letter)
+    selectivity = max(selectivity, 1e-6)
+
+    needed = top_k / selectivity
+    for letter, quota in quotas.items():
+        share = features.type_share(letter)
+        if quota.minimum and share:
+            needed = max(needed, quota.minimum / (share * selectivity))
+    pool = max(int(math.ceil(needed * RETRIEVAL_POOL_HEADROOM)), RETRIEVAL_POOL_MIN)
+    return max(1, min(pool, len(features)))
+
+
+def _rerank(query: str, features, rows, scores, top_n: int, budget_ms: Optional[float]) -> bool:
+    """Blend cross-encoder scores into the top_n finite scores in place."""
+    top = ranking.top_k(scores, top_n)
+    if top.size == 0:
+        return False
+    ce = reranker.score_pairs(
+        query,
+        [features.ids[rows[p]] for p in top],
+        [features.documents[rows[p]] for p in top],
+        budget_ms=budget_ms,
+    )
+    if ce is None:
+        return False
+    scores[top] += RANK_WEIGHT_RERANK * ce
+    return True
+
+
+def recommend_assessments(
+    query: str,
+    top_k: int = 10,
+    trace: Optional[Dict] = None,
+    latency_budget_ms: Optional[float] = None,
+    rerank_top_n: Optional[int] = None,
+    degraded: bool = False,
+    analysis: Optional[Dict] = None,
+    more: Optional[List[Recommendation]] = None,
+    balance: bool = True,
+) -> List[Recommendation]:
+    """
+    Recommend up to top_k assessments for a query.
+
+    Args:
+        query: Natural language query or job description
+        top_k: Number of assessments to return
+        trace: Optional dict that receives retrieval diagnostics
+            ("pool": final candidate pool size, "rounds": retrieval rounds,
+            "sub_queries": expansion sub-queries searched,
+            "parser": 'llm' or 'heuristic', "degraded": stages that fell
+            back, e.g. 'parse', 'embed' or 'rerank' skipped for the budget,
+            "reranked": whether the cross-encoder stage ran,
+            "retrieval": 'vector', 'hybrid', 'lexical' or 'none')
+        latency_budget_ms: Total time allowed for the request; optional
+            stages are skipped when they would not fit
+        rerank_top_n: Candidates to re-score with the cross-encoder
+            (defaults to RERANK_TOP_N when RERANK_ENABLED, 0 disables)
+        degraded: Serve cheaply under load: heuristic parser, cached query
+            embeddings only and no cross-encoder
+        analysis: Query parse computed by the caller (skips parsing)
+        more: Optional list that receives the candidates ranked after the
+            selection, best first, up to PAGINATION_DEPTH results in total
+            (later pages; type quotas and re-ranking only apply to the first)
+        balance: Apply the type quotas the query asks for; False ranks by
+            score alone
+    """
+    start = time.perf_counter()
+    if rerank_top_n is None:
+        rerank_top_n = RERANK_TOP_N if RERANK_ENABLED else 0
+    if degraded:
+        rerank_top_n = 0
+    if analysis is None:
+        analysis = analyze_query(query, degraded)
+    with timing.stage("embed"):
+        requested_mode = _retrieval_mode(query)
+        q_emb, sub_embs, mode = _embed_query(query, requested_mode, analysis, degraded)
+    features = _get_features()
+    with timing.stage("filter"):
+        quotas = selection.derive_quotas(analysis, top_k) if balance else {}
+        quotas = selection.clip_quotas(quotas, features.type_counts)
+        skill_ids = _skill_candidates(analysis)
+
+    pool = _initial_pool(features, analysis, quotas, top_k)
+    rounds = 0
+    while True:
+        rounds += 1
+        with timing.stage("search"):
+            rows, sims, exhausted = _retrieve(query, q_emb, mode, pool, features, skill_ids, sub_embs)
+        with timing.stage("rank"):
+            scores = ranking.score_candidates(features, rows, sims, analysis)
+        reranked = False
+        if rerank_top_n > 0:
+            remaining = None
+            if latency_budget_ms is not None:
+                remaining = latency_budget_ms - (time.perf_counter() - start) * 1000
+            with timing.stage("rerank"):
+                reranked = _rerank(query, features, rows, scores, rerank_top_n, remaining)
+        with timing.stage("filter"):
+            picked = selection.constrained_top_k(scores, features.type_code[rows], top_k, quotas)
+        # Widen only when filters or quotas left the selection short
+        if picked.satisfied or exhausted or pool >= len(features):
+            break
+        pool = min(len(features), int(math.ceil(pool * RETRIEVAL_POOL_GROWTH)))
+
+    logger.debug("Retrieved %d %s candidates in %d round(s) for top_k=%d", pool, mode, rounds, top_k)
+    items = _to_items(features, rows, scores, picked.positions)
+    first_rows = rows[picked.positions]
+    if trace is not None:
+        trace["retrieval"] = mode
+        trace["skill_candidates"] = len(skill_ids or [])
+        trace["sub_queries"] = len(sub_embs)
+        trace["pool"] = pool
+        trace["rounds"] = rounds
+        trace["reranked"] = reranked
+        trace["parser"] = _parser_tier(analysis)
+        trace["degraded"] = _degraded(analysis, requested_mode, mode) + (
+            ["rerank"] if rerank_top_n > 0 and not reranked else []
+        )
+    if more is not None:
+        if pool < min(PAGINATION_DEPTH, len(features)) and not exhausted:
+            # Deeper pages come from a wider search with the same embedding, so
+            # the first page stays identical to an unpaginated request
+            with timing.stage("search"):
+                rows, sims, _ = _retrieve(query, q_emb, mode, PAGINATION_DEPTH, features, skill_ids, sub_embs)
+            with timing.stage("rank"):
+                deep_scores = ranking.score_candidates(features, rows, sims, analysis)
         else:
-            skills = skills_meta
-
-        items.append({
-            "name": raw_name,
-            "url": url,
-            "type": (meta or {}).get("type") or "",
-            "duration": (meta or {}).get("duration") or "",
-            "skills": skills,
-            "score": score,
-            "_doc": doc,
-        })
-
-    # Basic duration filter if present
-    minutes = analysis.get("duration_minutes")
-    if minutes:
-        def parse_minutes(s):
-            if not s:
-                return None
-            s = s.lower()
-            if "hour" in s:
-                m = [int(x) for x in s.split() if x.isdigit()]
-                return (m[0] if m else 1) * 60
-            m = [int(x) for x in s.split() if x.isdigit()]
-            return m[0] if m else None
-        items = [it for it in items if (parse_minutes(it.get("duration")) or 9999) <= minutes]
-
-    # Sort by score desc
-    items.sort(key=lambda x: x["score"], reverse=True)
-
-    # Balance K vs P if needed
-    items = balance_recommendations(items, analysis, top_k)
+            deep_scores = scores
+        rest = ranking.top_k(deep_scores, PAGINATION_DEPTH + len(picked.positions))
+        rest = rest[~np.isin(rows[rest], first_rows)][: max(PAGINATION_DEPTH - len(first_rows), 0)]
+        more.extend(_to_items(features, rows, deep_scores, rest))
     return items
+
+
+def recommend_bundle(
+    query: str,
+    top_k: int = 10,
+    budget_minutes: Optional[float] = None,
+    trace: Optional[Dict] = None,
+    degraded: bool = False,
+) -> Dict:
+    """
+    Recommend a battery of assessments whose total duration fits a time budget.
+
+    The budget defaults to the duration parsed from the query. Without any
+    budget this falls back to recommend_assessments. `degraded` has the
+    same meaning as there.
+
+    Returns:
+        {"items": [...], "total_minutes": float, "budget_minutes": float or None,
+         "unmet_types": [type letters that could not be included]}
+    """
+    analysis = analyze_query(query, degraded)
+    budget = budget_minutes or analysis.get("duration_minutes")
+    if not budget:
+        items = recommend_assessments(query, top_k=top_k, trace=trace, degraded=degraded, analysis=analysis)
+        return {"items": items, "total_minutes": _total_minutes(items), "budget_minutes": None, "unmet_types": []}
+
+    with timing.stage("embed"):
+        requested_mode = _retrieval_mode(query)
+        q_emb, sub_embs, mode = _embed_query(query, requested_mode, analysis, degraded)
+    features = _get_features()
+    with timing.stage("filter"):
+        quotas = selection.clip_quotas(selection.derive_quotas(analysis, top_k), features.type_counts)
+        skill_ids = _skill_candidates(analysis)
+
+    # The budget applies to the whole bundle, not to each item
+    per_item = dict(analysis, duration_minutes=None)
+    pool = min(BUNDLE_MAX_CANDIDATES, len(features))
+    with timing.stage("search"):
+        rows, sims, _ = _retrieve(query, q_emb, mode, pool, features, skill_ids, sub_embs)
+    if trace is not None:
+        trace["retrieval"] = mode
+        trace["pool"] = pool
+        trace["rounds"] = 1
+        trace["parser"] = _parser_tier(analysis)
+        trace["degraded"] = _degraded(analysis, requested_mode, mode)
+    with timing.stage("rank"):
+        scores = ranking.score_candidates(features, rows, sims, per_item)
+    with timing.stage("optimize"):
+        bundle = optimize_bundle(
+            scores, features.duration_max[rows], features.type_code[rows], float(budget), top_k, quotas
+        )
+    return {
+        "items": _to_items(features, rows, scores, bundle.positions),
+        "total_minutes": bundle.total_minutes,
+        "budget_minutes": float(budget),
+        "unmet_types": bundle.unmet,
+    }
+
+
+def recommend_preliminary(
+    query: str,
+    top_k: int = 10,
+    trace: Optional[Dict] = None,
+    degraded: bool = False,
+) -> List[Recommendation]:
+    """
+    Fast first answer that does not wait for the LLM parse.
+
+    Ranks by retrieval similarity alone: no duration filter, type quotas,
+    query expansion or re-ranking. The query embedding it computes is
+    cached, so a following recommend_assessments call does not pay for it
+    again. With degraded=True (admission overflow) only cached embeddings
+    and the lexical index are used, as in recommend_assessments.
+    """
+    return recommend_assessments(
+        query, top_k=top_k, trace=trace, rerank_top_n=0, degraded=degraded, analysis={"raw": query},
+        balance=False,
+    )
+
+
+def suggest_assessments(
+    query: str,
+    top_k: int = 5,
+    session_id: Optional[str] = None,
+    trace: Optional[Dict] = None,
+) -> List[Recommendation]:
+    """
+    Typeahead suggestions for a partially typed query.
+
+    Only local stages run: prefix-aware lexical matching (narrowed from the
+    session's previous keystroke when the query extends it), skills named
+    in the text, and the vector index when the exact text already has a
+    cached embedding. No LLM or embedding provider is called.
+
+    Args:
+        query: The text typed so far
+        top_k: Number of suggestions
+        session_id: Typing session whose previous candidate set may be reused
+        trace: Optional dict that receives "candidates", "prefix_reused",
+            "skills" and "cached_embedding"
+    """
+    if len((query or "").strip()) < TYPEAHEAD_MIN_CHARS:
+        return []
+    features = _get_features()
+    pool = max(top_k, RETRIEVAL_POOL_MIN)
+    rankings = []
+    with timing.stage("typeahead"):
+        index = lexical.get_index()
+        cons = typeahead.constraints(query)
+        reused = False
+        candidates = 0
+        if index is not None and cons:
+            apply, start = cons, None
+            if session_id:
+                prev_cons, prev_mask = typeahead.sessions.last(session_id)
+                delta = typeahead.changed(prev_cons, cons) if prev_cons is not None else None
+                if delta is not None and prev_mask is not None and prev_mask.size == len(index):
+                    apply, start, reused = delta, prev_mask, True
+                metrics.record_cache("typeahead_prefix", int(reused), int(not reused))
+            mask = typeahead.candidate_mask(index, apply, start)
+            if session_id:
+                typeahead.sessions.remember(session_id, cons, mask)
+            candidates = int(mask.sum())
+            rankings.append(typeahead.rank(index, cons, mask, pool))
+
+        skills = skill_index.get_index()
+        mentioned = skills.mentioned(query) if skills is not None else []
+        if mentioned:
+            rankings.append(skills.ranked(mentioned)[:pool])
+
+        with _query_embeddings_lock:
+            q_emb = _query_embeddings.get(query)
+        if q_emb is not None:
+            res = vector_store.query_many([q_emb], top_k=pool, include=("distances",))
+            rankings.append((res.get("ids") or [[]])[0])
+
+        rankings = [r for r in rankings if r]
+        ids, scores = lexical.reciprocal_rank_fusion(rankings, k=RRF_K) if rankings else ([], np.empty(0))
+        rows = features.rows_for(ids)
+        known = np.flatnonzero(rows >= 0)[:top_k]
+    if trace is not None:
+        trace["candidates"] = candidates
+        trace["prefix_reused"] = reused
+        trace["skills"] = mentioned
+        trace["cached_embedding"] = q_emb is not None
+    return _to_items(features, rows, scores, known)
+
+
+def preload():
+    """
+    Load everything the recommend path reads: catalog features, the vector
+    backend, the lexical, skill and field indexes and the embedding and
+    re-ranking model weights.
+
+    Called by scripts/serve.py before forking workers so they share these
+    pages copy-on-write. Models are loaded without running inference, which
+    would start thread pools that do not survive a fork. Anything that fails
+    to load is logged and loaded lazily by each worker instead.
+    """
+    steps = [
+        ("catalog features", _get_features),
+        ("embedding provider", lambda: _get_embedder().preload()),
+        ("lexical index", lexical.get_index),
+        ("skill index", skill_index.get_index),
+        ("field index", _get_field_index),
+    ]
+    if RERANK_ENABLED:
+        steps.append(("re-ranking model", reranker.get_model))
+    for name, load in steps:
+        try:
+            load()
+        except Exception:
+            logger.warning("Could not preload the %s; workers will load it on first use", name, exc_info=True)
+
+
+def _total_minutes(items: List[Recommendation]) -> float:
+    return float(np.nansum([ranking.parse_duration_bounds(it.get("duration"))[1] for it in items]))
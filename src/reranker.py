@@ -0,0 +1,126 @@
+"""
+Optional second-stage re-ranking with a local CPU cross-encoder.
+
+Only the top N candidates of the first-stage ranking are scored, in
+batches, as (query, assessment document) pairs. Pair scores are cached by
+(query hash, doc id) so repeated queries cost nothing, and the stage skips
+itself when its estimated cost does not fit the request's remaining
+latency budget. Each skip shrinks the estimate by RERANK_SKIP_DECAY, so a
+slow sample cannot disable the stage for good: a later request runs it
+and measures again.
+"""
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from typing import List, Optional, Sequence
+
+import numpy as np
+
+from . import metrics
+from .config import RERANK_BATCH_SIZE, RERANK_CACHE_SIZE, RERANK_MODEL, RERANK_SKIP_DECAY
+
+_model = None
+_model_lock = threading.Lock()
+_cache: "OrderedDict[tuple, float]" = OrderedDict()
+_cache_lock = threading.Lock()
+# Running estimate of milliseconds per scored pair, used for budget checks
+_ms_per_pair: Optional[float] = None
+
+
+def get_model():
+    """Lazy load the cross-encoder to save memory when re-ranking is off."""
+    global _model
+    if _model is None:
+        with _model_lock:
+            if _model is None:
+                from sentence_transformers import CrossEncoder
+
+                _model = CrossEncoder(RERANK_MODEL, max_length=256, device="cpu")
+    return _model
+
+
+def query_hash(query: str) -> str:
+    return hashlib.sha1(query.strip().lower().encode("utf-8")).hexdigest()[:16]
+
+
+def estimated_cost_ms(n_pairs: int) -> float:
+    """Estimated time to score n uncached pairs (0 before the first run)."""
+    return (_ms_per_pair or 0.0) * n_pairs
+
+
+def _cache_get(key):
+    with _cache_lock:
+        value = _cache.get(key)
+        if value is not None:
+            _cache.move_to_end(key)
+        return value
+
+
+def _cache_put(key, value: float):
+    with _cache_lock:
+        _cache[key] = value
+        _cache.move_to_end(key)
+        while len(_cache) > RERANK_CACHE_SIZE:
+            _cache.popitem(last=False)
+
+
+def score_pairs(
+    query: str,
+    doc_ids: Sequence[str],
+    docs: Sequence[str],
+    budget_ms: Optional[float] = None,
+) -> Optional[np.ndarray]:
+    """
+    Cross-encoder relevance (0-1) for each (query, doc) pair.
+
+    Args:
+        query: The user query
+        doc_ids: Stable ids used as cache keys
+        docs: Assessment document texts, aligned with doc_ids
+        budget_ms: Remaining latency budget; when the uncached pairs are
+            estimated to take longer the stage is skipped
+
+    Returns:
+        Array of scores aligned with docs, or None if skipped
+    """
+    global _ms_per_pair
+    qh = query_hash(query)
+    scores = np.empty(len(docs), dtype=np.float32)
+    missing: List[int] = []
+    for i, doc_id in enumerate(doc_ids):
+        cached = _cache_get((qh, doc_id))
+        if cached is None:
+            missing.append(i)
+        else:
+            scores[i] = cached
+    metrics.record_cache("rerank", len(doc_ids) - len(missing), len(missing))
+    if not missing:
+        return scores
+    if budget_ms is not None and estimated_cost_ms(len(missing)) > budget_ms:
+        _ms_per_pair *= RERANK_SKIP_DECAY
+        return None
+
+    # Loaded before the clock starts so the first call's load time is not counted as scoring
+    model = get_model()
+    start = time.perf_counter()
+    logits = model.predict(
+        [(query, docs[i]) for i in missing],
+        batch_size=RERANK_BATCH_SIZE,
+        show_progress_bar=False,
+        convert_to_numpy=True,
+    )
+    elapsed = (time.perf_counter() - start) * 1000
+    per_pair = elapsed / len(missing)
+    _ms_per_pair = per_pair if _ms_per_pair is None else 0.8 * _ms_per_pair + 0.2 * per_pair
+
+    probs = 1.0 / (1.0 + np.exp(-np.asarray(logits, dtype=np.float32)))
+    for i, p in zip(missing, probs):
+        scores[i] = p
+        _cache_put((qh, doc_ids[i]), float(p))
+    return scores
+
+
+def clear_cache():
+    with _cache_lock:
+        _cache.clear()
@@ -0,0 +1,53 @@
+"""
+Compact result records for recommendations.
+
+A Recommendation carries only what responses need (name, url, type,
+duration, score) in __slots__, plus the catalog row. Skills and the
+document text are read from the shared catalog features on demand instead
+of being copied into every result. Dict-style access (rec["name"],
+rec.get("url")) keeps older callers working.
+"""
+from typing import Any, Dict, List
+
+
+class Recommendation:
+    __slots__ = ("name", "url", "type", "duration", "score", "row", "_features")
+
+    def __init__(self, name: str, url: str, type: str, duration: str, score: float, row: int, features=None):
+        self.name = name
+        self.url = url
+        self.type = type
+        self.duration = duration
+        self.score = score
+        self.row = row
+        self._features = features
+
+    @property
+    def skills(self) -> List[str]:
+        return self._features.skills[self.row] if self._features is not None else []
+
+    @property
+    def document(self) -> str:
+        return self._features.documents[self.row] if self._features is not None else ""
+
+    def __getitem__(self, key: str) -> Any:
+        try:
+            return getattr(self, key)
+        except AttributeError:
+            raise KeyError(key) from None
+
+    def get(self, key: str, default: Any = None) -> Any:
+        return getattr(self, key, default)
+
+    def to_response(self) -> Dict[str, Any]:
+        """The /recommend JSON shape."""
+        return {
+            "assessment_name": self.name,
+            "assessment_url": self.url,
+            "relevance_score": self.score,
+            "test_type": self.type,
+            "duration": self.duration,
+        }
+
+    def __repr__(self) -> str:
+        return f"Recommendation({self.name!r}, score={self.score:.3f})"
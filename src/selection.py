@@ -0,0 +1,227 @@
+"""
+Constrained top-k selection with per-type minimum and maximum quotas.
+
+Quotas are derived from explicit wording in the parsed query ("include
+cognitive and personality tests", "no simulations", ...) and applied over the
+ranked candidate scores with heaps, so selection costs O(n + k log n)
+rather than repeated list rebuilding. When the pool cannot satisfy the
+quotas the shortfall is reported so the caller can widen retrieval.
+"""
+import heapq
+import re
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from .ranking import TYPE_CODES
+
+# Words that name an SHL test type. They only count inside an explicit
+# request ("include a personality test", "mix of cognitive and personality")
+# or exclusion ("no simulations"), never anywhere else in a job description
+TYPE_KEYWORDS = {
+    "K": ("technical", "knowledge", "skill", "skills", "coding", "programming"),
+    "P": ("personality", "behavioral", "behavioural", "behavior", "behaviour"),
+    "A": ("cognitive", "aptitude", "ability", "reasoning", "numerical", "verbal"),
+    "B": ("situational judgement", "situational judgment", "biodata", "sjt"),
+    "C": ("competency", "competencies"),
+    "D": ("development report", "360"),
+    "E": ("assessment exercise", "assessment centre", "assessment center", "exercises"),
+    "S": ("simulation", "simulations"),
+}
+_TYPE_TERMS = sorted(
+    ((tuple(term.split()), letter) for letter, terms in TYPE_KEYWORDS.items() for term in terms),
+    key=lambda item: -len(item[0]),
+)
+_TEST_NOUNS = {"test", "tests", "assessment", "assessments", "questionnaire", "questionnaires"}
+_FILLER = {"a", "an", "any", "some", "the", "and", "or", "&", "/", ",", "plus"}
+_REQUEST_RE = re.compile(
+    r"\b(?:include|including|add|with|using|use|need|needs|want|wants|require|requires|looking for"
+    r"|(?P<mix>mix of|combination of|blend of|both))\s+"
+)
+_NEGATION_RE = re.compile(r"\b(?:no|not|without|exclude|excluding|except|avoid)\s+")
+_WORD_RE = re.compile(r"[a-z0-9]+|[&/,]|[.;:!?()]")
+
+# Share of slots reserved for knowledge items when a query asks for both
+# technical and behavioural assessments (the remainder goes to personality)
+TECH_SHARE = 0.6
+
+
+class Quota:
+    """Minimum and maximum number of items of one test type."""
+
+    def __init__(self, minimum: int = 0, maximum: Optional[int] = None):
+        self.minimum = minimum
+        self.maximum = maximum
+
+    def __repr__(self) -> str:
+        return f"Quota(min={self.minimum}, max={self.maximum})"
+
+
+class Selection:
+    """Result of a constrained selection."""
+
+    def __init__(self, positions: np.ndarray, unmet: Dict[str, int], short: int):
+        self.positions = positions
+        # Type letter -> number of items missing to reach its minimum
+        self.unmet = unmet
+        # Slots left empty because the pool ran out of eligible candidates
+        self.short = short
+
+    @property
+    def satisfied(self) -> bool:
+        return not self.unmet and self.short == 0
+
+
+def _type_phrase(text: str, start: int, mix: bool = False) -> List[str]:
+    """
+    Test types named by the noun phrase at `start`, or [] if it is not one.
+
+    The phrase may only hold type words, articles and conjunctions, and must
+    end in a test noun ("cognitive and personality tests"), or, for a
+    standalone type noun or after 'mix of' with two or more types, at the
+    end of the clause ("no simulations", "mix of cognitive and personality").
+    """
+    words = _WORD_RE.findall(text[start:start + 120])
+    letters: List[str] = []
+    i = 0
+    while i < len(words):
+        word = words[i]
+        if word in _TEST_NOUNS:
+            return letters
+        if word in _FILLER:
+            i += 1
+            continue
+        for term, letter in _TYPE_TERMS:
+            if tuple(words[i:i + len(term)]) == term:
+                letters.append(letter)
+                i += len(term)
+                break
+        else:
+            break
+    at_end = i >= len(words) or not words[i].isalnum()
+    if not at_end or not letters:
+        return []
+    if mix:
+        return letters if len(set(letters)) >= 2 else []
+    return letters if words[i - 1] in ("simulations", "exercises", "personality", "sjt", "biodata") else []
+
+
+def derive_quotas(analysis: Dict, k: int) -> Dict[str, Quota]:
+    """
+    Build per-type quotas from a parsed query.
+
+    Only explicit wording sets quotas: the parse's test_type_preference
+    ('both' means technical plus behavioural), a request such as "include
+    cognitive and personality tests", or an exclusion such as "no
+    simulations". Types merely mentioned in a job description do not.
+    Excluded types get a maximum of zero. A single requested type gets a
+    minimum of one; two or more share k between them as minimums, and
+    technical plus behavioural keeps the 60/40 knowledge/personality split.
+    """
+    text = (analysis.get("raw") or "").lower()
+    quotas: Dict[str, Quota] = {}
+
+    excluded = set()
+    for match in _NEGATION_RE.finditer(text):
+        excluded.update(_type_phrase(text, match.end()))
+    for letter in excluded:
+        quotas[letter] = Quota(0, 0)
+
+    requested: List[str] = []
+    if analysis.get("test_type_preference") == "both":
+        requested += ["K", "P"]
+    for match in _REQUEST_RE.finditer(text):
+        requested += _type_phrase(text, match.end(), mix=bool(match.group("mix")))
+    requested = [letter for letter in dict.fromkeys(requested) if letter not in excluded]
+    if not requested:
+        return quotas
+
+    if len(requested) == 1:
+        # "Include a personality test": make sure one is there, without
+        # turning the whole list into that type
+        quotas[requested[0]] = Quota(min(1, k))
+    elif set(requested) == {"K", "P"}:
+        tech_n = int(round(k * TECH_SHARE))
+        quotas["K"] = Quota(tech_n)
+        quotas["P"] = Quota(k - tech_n)
+    else:
+        share = max(1, k // len(requested))
+        for letter in requested:
+            quotas[letter] = Quota(share)
+    return quotas
+
+
+def clip_quotas(quotas: Dict[str, Quota], type_counts: np.ndarray) -> Dict[str, Quota]:
+    """Lower each minimum to what the catalog can supply for that type."""
+    clipped = {}
+    for letter, quota in quotas.items():
+        available = int(type_counts[TYPE_CODES.index(letter)]) if letter in TYPE_CODES else 0
+        clipped[letter] = Quota(min(quota.minimum, available), quota.maximum)
+    return clipped
+
+
+def constrained_top_k(
+    scores: np.ndarray,
+    type_codes: np.ndarray,
+    k: int,
+    quotas: Optional[Dict[str, Quota]] = None,
+) -> Selection:
+    """
+    Pick up to k candidate positions maximizing score under type quotas.
+
+    Minimums are reserved first from each type's best candidates, then the
+    remaining slots are filled in score order while respecting maximums.
+    Candidates with non-finite scores are never selected.
+
+    Args:
+        scores: Final score per candidate
+        type_codes: Type code per candidate (index into TYPE_CODES, -1 unknown)
+        k: Number of items to select
+        quotas: Type letter -> Quota
+
+    Returns:
+        Selection with positions ordered best first
+    """
+    quotas = quotas or {}
+    valid = np.flatnonzero(np.isfinite(scores))
+    if k <= 0 or valid.size == 0:
+        unmet = {t: q.minimum for t, q in quotas.items() if q.minimum}
+        return Selection(valid[:0], unmet, max(k, 0))
+
+    by_code = {TYPE_CODES.index(t): q for t, q in quotas.items() if t in TYPE_CODES}
+    taken: Dict[int, int] = {}
+    chosen: List[int] = []
+    chosen_set = set()
+    unmet: Dict[str, int] = {}
+
+    # Reserve each type's minimum from its own best candidates
+    for code, quota in by_code.items():
+        need = quota.minimum
+        if quota.maximum is not None:
+            need = min(need, quota.maximum)
+        need = min(need, k - len(chosen))
+        if need <= 0:
+            continue
+        of_type = valid[type_codes[valid] == code]
+        best = heapq.nlargest(need, of_type.tolist(), key=lambda p: scores[p])
+        chosen.extend(best)
+        chosen_set.update(best)
+        taken[code] = len(best)
+        if len(best) < quota.minimum:
+            unmet[TYPE_CODES[code]] = quota.minimum - len(best)
+
+    # Fill the remaining slots in score order, honouring maximums
+    heap = [(-float(scores[p]), int(p)) for p in valid if p not in chosen_set]
+    heapq.heapify(heap)
+    while heap and len(chosen) < k:
+        _, pos = heapq.heappop(heap)
+        code = int(type_codes[pos])
+        quota = by_code.get(code)
+        if quota is not None and quota.maximum is not None and taken.get(code, 0) >= quota.maximum:
+            continue
+        chosen.append(pos)
+        taken[code] = taken.get(code, 0) + 1
+
+    positions = np.array(chosen, dtype=np.int64)
+    positions = positions[np.argsort(-scores[positions], kind="stable")]
+    return Selection(positions, unmet, k - len(chosen))
@@ -0,0 +1,91 @@
+"""
+Persisted inverted index from normalized skill to assessment ids.
+
+Built by build_index.py next to the vector store. Skills the query parser
+extracts are resolved to candidate id sets with set unions/intersections,
+which the recommender uses as a hard pre-filter or as an extra, boosted
+candidate source merged with the vector hits.
+"""
+import json
+import os
+import re
+from typing import Dict, Iterable, List, Optional, Sequence, Set
+
+from .config import SKILL_INDEX_PATH
+from .ranking import normalize_skill
+
+# Punctuation that separates words in free text; '+', '#', '.' and '-' occur in skill names
+_PUNCT_RE = re.compile(r"[^\w\s+#.-]")
+
+_index = None
+_loaded = False
+
+
+class SkillIndex:
+    def __init__(self, postings: Dict[str, Set[str]]):
+        self.postings = postings
+
+    @classmethod
+    def build(cls, ids: Sequence[str], skills: Sequence[Iterable[str]]) -> "SkillIndex":
+        postings: Dict[str, Set[str]] = {}
+        for item_id, item_skills in zip(ids, skills):
+            for s in item_skills or []:
+                postings.setdefault(normalize_skill(s), set()).add(item_id)
+        return cls(postings)
+
+    def save(self, path: str):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with open(path, "w") as f:
+            json.dump({s: sorted(ids) for s, ids in self.postings.items()}, f)
+
+    @classmethod
+    def load(cls, path: str) -> "SkillIndex":
+        with open(path, "r") as f:
+            data = json.load(f)
+        return cls({s: set(ids) for s, ids in data.items()})
+
+    def _known(self, skills: Iterable[str]) -> List[Set[str]]:
+        sets = []
+        for s in skills or []:
+            ids = self.postings.get(normalize_skill(s))
+            if ids:
+                sets.append(ids)
+        return sets
+
+    def ids_any(self, skills: Iterable[str]) -> Set[str]:
+        """Assessments covering at least one of the skills."""
+        return set().union(*self._known(skills))
+
+    def ids_all(self, skills: Iterable[str]) -> Set[str]:
+        """Assessments covering every known skill (unknown skills are ignored)."""
+        sets = self._known(skills)
+        return set.intersection(*sets) if sets else set()
+
+    def mentioned(self, text: str) -> List[str]:
+        """Indexed skills that occur as whole words in free text."""
+        words = (w.strip(".-") for w in _PUNCT_RE.sub(" ", (text or "").lower()).split())
+        padded = f" {' '.join(words)} "
+        return [s for s in self.postings if f" {s} " in padded]
+
+    def ranked(self, skills: Iterable[str]) -> List[str]:
+        """Assessments covering any of the skills, most matched skills first."""
+        counts: Dict[str, int] = {}
+        for ids in self._known(skills):
+            for item_id in ids:
+                counts[item_id] = counts.get(item_id, 0) + 1
+        return sorted(counts, key=lambda i: (-counts[i], i))
+
+
+def build_and_save(ids: Sequence[str], skills: Sequence[Iterable[str]], path: str = SKILL_INDEX_PATH) -> SkillIndex:
+    index = SkillIndex.build(ids, skills)
+    index.save(path)
+    return index
+
+
+def get_index() -> Optional[SkillIndex]:
+    """Load the persisted index once; None if it has not been built."""
+    global _index, _loaded
+    if not _loaded:
+        _index = SkillIndex.load(SKILL_INDEX_PATH) if os.path.exists(SKILL_INDEX_PATH) else None
+        _loaded = True
+    return _index
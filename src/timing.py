@@ -0,0 +1,52 @@
+"""
+Per-request stage timings.
+
+The recommend path wraps each stage (parse, embed, filter, search, rank,
+rerank, optimize) in stage(). Durations accumulate into a dict bound to the current
+request with start(); outside a request stage() only costs a clock read.
+count() keeps per-request tallies such as cache hits the same way.
+"""
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, Optional
+
+_timings: ContextVar[Optional[Dict[str, float]]] = ContextVar("stage_timings", default=None)
+_counters: ContextVar[Optional[Dict[str, int]]] = ContextVar("request_counters", default=None)
+
+
+def start() -> Dict[str, float]:
+    """Begin recording stage durations (ms) for the current request."""
+    timings: Dict[str, float] = {}
+    _timings.set(timings)
+    _counters.set({})
+    return timings
+
+
+def current() -> Optional[Dict[str, float]]:
+    """The current request's stage durations, if recording."""
+    return _timings.get()
+
+
+def counters() -> Optional[Dict[str, int]]:
+    """The current request's tallies, if recording."""
+    return _counters.get()
+
+
+def count(name: str, n: int = 1):
+    """Add n to the current request's `name` tally."""
+    tallies = _counters.get()
+    if tallies is not None and n:
+        tallies[name] = tallies.get(name, 0) + n
+
+
+@contextmanager
+def stage(name: str):
+    """Add the wall time of the block to the current request's `name` stage."""
+    start_time = time.perf_counter()
+    try:
+        yield
+    finally:
+        timings = _timings.get()
+        if timings is not None:
+            timings[name] = timings.get(name, 0.0) + (time.perf_counter() - start_time) * 1000
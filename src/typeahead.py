@@ -0,0 +1,158 @@
+"""
+Search-as-you-type matching over the lexical index.
+
+Each keystroke becomes a list of constraints: every complete query term
+must occur in an assessment, and the word still being typed must start
+one of its terms. Typing on only adds or tightens constraints, so the
+candidate set of the previous keystroke in the same session is the
+starting point for the next one and only the changed constraints are
+applied. Sessions also carry a sequence number so the API can drop
+requests that a newer keystroke has superseded.
+"""
+import re
+import threading
+import time
+from collections import OrderedDict
+from typing import List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from .config import TYPEAHEAD_MIN_PREFIX, TYPEAHEAD_SESSION_TTL_S, TYPEAHEAD_SESSIONS
+from .lexical import BM25Index, tokenize
+
+# (term, whether it is an unfinished word matched as a prefix)
+Constraint = Tuple[str, bool]
+
+_TRAILING_WORD_RE = re.compile(r"[a-z0-9][a-z0-9+#]*$")
+
+
+def constraints(query: str, min_prefix: int = TYPEAHEAD_MIN_PREFIX) -> List[Constraint]:
+    """
+    Complete terms in query order (deduplicated), then the unfinished word.
+
+    The last word counts as unfinished unless the query ends in whitespace
+    or punctuation; it is dropped when shorter than min_prefix characters.
+    """
+    text = (query or "").lower()
+    partial = _TRAILING_WORD_RE.search(text)
+    complete = tokenize(text[:partial.start()] if partial else text)
+    out: List[Constraint] = [(t, False) for t in dict.fromkeys(complete)]
+    if partial and len(partial.group()) >= min_prefix:
+        out.append((partial.group(), True))
+    return out
+
+
+def changed(previous: Sequence[Constraint], current: Sequence[Constraint]) -> Optional[List[Constraint]]:
+    """
+    Constraints to apply on top of the previous candidate set, or None.
+
+    None means the current query does not refine the previous one (e.g. a
+    backspace or an edit mid-query) and matching must start over.
+    """
+    if len(current) < len(previous):
+        return None
+    for (prev_term, prev_prefix), (term, is_prefix) in zip(previous, current):
+        if (term, is_prefix) != (prev_term, prev_prefix) and not (prev_prefix and term.startswith(prev_term)):
+            return None
+    return [c for i, c in enumerate(current) if i >= len(previous) or c != previous[i]]
+
+
+def _rows(index: BM25Index, term: str, is_prefix: bool) -> np.ndarray:
+    if not is_prefix:
+        return index.term_scores(term)[0]
+    rows = [index.term_scores(t)[0] for t in index.terms_with_prefix(term)]
+    return np.concatenate(rows) if rows else np.empty(0, dtype=np.int32)
+
+
+def candidate_mask(index: BM25Index, apply: Sequence[Constraint], start: Optional[np.ndarray] = None) -> np.ndarray:
+    """Documents satisfying every constraint, narrowed from `start` when given."""
+    mask = np.ones(len(index), dtype=bool) if start is None else start.copy()
+    for term, is_prefix in apply:
+        if not mask.any():
+            break
+        hit = np.zeros(len(index), dtype=bool)
+        hit[_rows(index, term, is_prefix)] = True
+        mask &= hit
+    return mask
+
+
+def rank(index: BM25Index, cons: Sequence[Constraint], mask: np.ndarray, top_k: int) -> List[str]:
+    """
+    Candidates by BM25, the unfinished word scoring as its best completion.
+
+    When no document satisfies every constraint, any document matching at
+    least one of them is ranked instead.
+    """
+    scores = np.zeros(len(index), dtype=np.float32)
+    for term, is_prefix in cons:
+        if not is_prefix:
+            rows, contrib = index.term_scores(term)
+            scores[rows] += contrib
+            continue
+        best = np.zeros(len(index), dtype=np.float32)
+        for t in index.terms_with_prefix(term):
+            rows, contrib = index.term_scores(t)
+            np.maximum.at(best, rows, contrib)
+        scores += best
+    hits = np.flatnonzero(mask & (scores > 0)) if mask.any() else np.flatnonzero(scores > 0)
+    if hits.size > top_k:
+        hits = hits[np.argpartition(-scores[hits], top_k - 1)[:top_k]]
+    hits = hits[np.argsort(-scores[hits], kind="stable")]
+    return [index.ids[i] for i in hits]
+
+
+class _Session:
+    __slots__ = ("seq", "constraints", "mask", "touched")
+
+    def __init__(self):
+        self.seq = 0
+        self.constraints: Optional[List[Constraint]] = None
+        self.mask: Optional[np.ndarray] = None
+        self.touched = time.monotonic()
+
+
+class Sessions:
+    """Per-session keystroke sequence and last candidate set, LRU-bounded with a TTL."""
+
+    def __init__(self, max_sessions: int = TYPEAHEAD_SESSIONS, ttl_s: float = TYPEAHEAD_SESSION_TTL_S):
+        self.max_sessions = max_sessions
+        self.ttl_s = ttl_s
+        self._items: "OrderedDict[str, _Session]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _get(self, session_id: str) -> _Session:
+        now = time.monotonic()
+        session = self._items.get(session_id)
+        if session is None or now - session.touched > self.ttl_s:
+            session = self._items[session_id] = _Session()
+        session.touched = now
+        self._items.move_to_end(session_id)
+        while len(self._items) > self.max_sessions:
+            self._items.popitem(last=False)
+        return session
+
+    def begin(self, session_id: str) -> int:
+        """Register a new keystroke; earlier ones of the session become superseded."""
+        with self._lock:
+            session = self._get(session_id)
+            session.seq += 1
+            return session.seq
+
+    def is_current(self, session_id: str, seq: int) -> bool:
+        with self._lock:
+            session = self._items.get(session_id)
+            return session is None or session.seq == seq
+
+    def last(self, session_id: str) -> Tuple[Optional[List[Constraint]], Optional[np.ndarray]]:
+        """(constraints, candidate mask) of the session's previous keystroke."""
+        with self._lock:
+            session = self._get(session_id)
+            return session.constraints, session.mask
+
+    def remember(self, session_id: str, cons: List[Constraint], mask: np.ndarray):
+        with self._lock:
+            session = self._get(session_id)
+            session.constraints, session.mask = cons, mask
+
+
+sessions = Sessions()
@@ -1,16 +1,26 @@
-import chromadb
-from chromadb.config import Settings
-from typing import List, Dict
-from .config import CHROMA_PERSIST_DIR
+from typing import List, Dict, Optional, Sequence
+from . import flat_index
+from .config import CHROMA_PERSIST_DIR, FLAT_INDEX_PATH, HNSW_CONSTRUCTION_EF, HNSW_M, HNSW_SEARCH_EF, VECTOR_BACKEND
 
 _client = None
 _collection = None
 _COLLECTION_NAME = "shl_catalog"
+# Collection metadata key holding the embedding provider signature
+# ("<provider>:<model>:<dimensions>") the index was built with
+SIGNATURE_KEY = "embedding_signature"
+
+
+class ProviderMismatchError(RuntimeError):
+    """Raised when queries are embedded with a different provider than the index."""
 
 
 def get_client():
     global _client
     if _client is None:
+        # Imported here so VECTOR_BACKEND=mmap workers never load Chroma
+        import chromadb
+        from chromadb.config import Settings
+
         # Disable telemetry to suppress harmless error messages
         settings = Settings(
             allow_reset=False,
@@ -20,25 +30,153 @@ def get_client():
     return _client
 
 
-def get_collection():
+def hnsw_metadata(m: int = HNSW_M, construction_ef: int = HNSW_CONSTRUCTION_EF,
+                  search_ef: int = HNSW_SEARCH_EF) -> Dict:
+    """Collection metadata for a cosine HNSW index with the given graph parameters."""
+    return {
+        "hnsw:space": "cosine",
+        "hnsw:M": m,
+        "hnsw:construction_ef": construction_ef,
+        "hnsw:search_ef": search_ef,
+    }
+
+
+def _flat() -> Optional[flat_index.FlatIndex]:
+    """The memory-mapped export when VECTOR_BACKEND='mmap', else None."""
+    if VECTOR_BACKEND != "mmap":
+        return None
+    index = flat_index.get_index()
+    if index is None:
+        raise RuntimeError(
+            f"VECTOR_BACKEND=mmap but {FLAT_INDEX_PATH} does not exist; run scripts/build_index.py first"
+        )
+    return index
+
+
+def get_collection(signature: Optional[str] = None):
+    """
+    Open the catalog collection, creating it if needed.
+
+    When the collection is created, `signature` and the configured HNSW
+    parameters are stored in its metadata so later readers can detect an
+    embedding provider mismatch. An existing collection's metadata is never
+    overwritten here.
+    """
     global _collection
     if _collection is None:
         client = get_client()
         # Important: Don't specify embedding_function to avoid default Gemini API calls
         # We handle embeddings manually in our code using local models
-        _collection = client.get_or_create_collection(
-            _COLLECTION_NAME, 
-            metadata={"hnsw:space": "cosine"},
-            embedding_function=None  # Explicitly disable to avoid API calls
-        )
+        try:
+            _collection = client.get_collection(_COLLECTION_NAME, embedding_function=None)
+        except ValueError:
+            metadata = hnsw_metadata()
+            if signature:
+                metadata[SIGNATURE_KEY] = signature
+            _collection = client.create_collection(
+                _COLLECTION_NAME,
+                metadata=metadata,
+                embedding_function=None  # Explicitly disable to avoid API calls
+            )
     return _collection
 
 
+def get_signature() -> Optional[str]:
+    """Return the provider signature stored with the index, if any."""
+    flat = _flat()
+    meta = flat.metadata if flat is not None else get_collection().metadata
+    return (meta or {}).get(SIGNATURE_KEY)
+
+
+def get_hnsw_params() -> Dict:
+    """HNSW parameters the collection was built with (None where Chroma's defaults apply)."""
+    flat = _flat()
+    meta = (flat.metadata if flat is not None else get_collection().metadata) or {}
+    return {key: meta.get(f"hnsw:{key}") for key in ("M", "construction_ef", "search_ef")}
+
+
+def verify_signature(signature: str):
+    """
+    Fail fast if the index was built with a different embedding provider.
+
+    Indexes built before signatures were recorded are accepted as-is.
+    """
+    stored = get_signature()
+    if stored and stored != signature:
+        raise ProviderMismatchError(
+            f"Index was built with '{stored}' but queries use '{signature}'. "
+            "Rebuild the index or set EMBEDDING_PROVIDER to match."
+        )
+
+
 def add_items(ids: List[str], embeddings: List[List[float]], metadatas: List[Dict], documents: List[str]):
     col = get_collection()
     col.add(ids=ids, embeddings=embeddings, metadatas=metadatas, documents=documents)
 
 
 def query(embedding: List[float], top_k: int = 20):
+    return query_many([embedding], top_k=top_k)
+
+
+def query_many(
+    embeddings: Sequence[Sequence[float]],
+    top_k: int = 20,
+    where: Optional[Dict] = None,
+    include: Sequence[str] = ("documents", "metadatas", "distances"),
+):
+    """
+    Search for several query vectors in a single Chroma call.
+
+    Args:
+        embeddings: Query vectors
+        top_k: Results per query
+        where: Optional metadata filter applied to every query
+        include: Fields to return besides ids; pass ("distances",) when only
+            ids and scores are needed to skip the document and metadata payload
+
+    Returns:
+        Chroma result dict with one list per query under each key
+    """
+    if len(embeddings) == 0:
+        return {"ids": [], **{key: [] for key in include}}
+    flat = _flat()
+    if flat is not None:
+        return flat.query_many(embeddings, top_k=top_k, where=where, include=include)
+    col = get_collection()
+    vectors = [list(map(float, e)) for e in embeddings]
+    return col.query(query_embeddings=vectors, n_results=top_k, where=where, include=list(include))
+
+
+def get_all():
+    """Return ids, metadatas and documents for every item in the index."""
+    flat = _flat()
+    if flat is not None:
+        return flat.get_all()
+    col = get_collection()
+    return col.get(include=["metadatas", "documents"])
+
+
+def get_embeddings(ids: List[str]) -> Dict[str, List[float]]:
+    """Fetch stored embeddings by id, without a similarity search."""
+    if not ids:
+        return {}
+    flat = _flat()
+    if flat is not None:
+        return flat.get_embeddings(ids)
+    res = get_collection().get(ids=list(ids), include=["embeddings"])
+    return dict(zip(res.get("ids") or [], res.get("embeddings") or []))
+
+
+def export_flat(path: str = FLAT_INDEX_PATH) -> flat_index.FlatIndex:
+    """Write the collection as the memory-mapped export VECTOR_BACKEND=mmap serves from."""
     col = get_collection()
-    return col.query(query_embeddings=[embedding], n_results=top_k)
+    res = col.get(include=["embeddings", "metadatas", "documents"])
+    index = flat_index.FlatIndex(
+        res.get("ids") or [],
+        res.get("metadatas") or [],
+        res.get("documents") or [],
+        res.get("embeddings") if res.get("embeddings") is not None else [],
+        dict(col.metadata or {}),
+    )
+    index.save(path)
+    return index
@@ -0,0 +1,133 @@
+"""Admission limits: bounded concurrency and queues, then rejection or degraded service."""
+import asyncio
+import threading
+import time
+
+import httpx
+import pytest
+
+from src import admission, lexical, recommender
+from src.admission import AsyncLimiter, Limiter, parse_limits
+from src.results import Recommendation
+
+
+def test_parse_limits():
+    assert parse_limits("request=8/32, parse=4/8,embed=2") == {"request": (8, 32), "parse": (4, 8), "embed": (2, 0)}
+    assert parse_limits("") == {}
+
+
+def test_limiter_turns_callers_away_beyond_the_queue():
+    limiter = Limiter("embed", concurrency=1, queue=1)
+    assert limiter.acquire()
+    results = []
+    waiter = threading.Thread(target=lambda: results.append(limiter.acquire(timeout=5)))
+    waiter.start()
+    while limiter.waiting == 0:
+        time.sleep(0.001)
+    # One running, one queued: the next caller is turned away without waiting
+    start = time.perf_counter()
+    assert not limiter.acquire(timeout=5)
+    assert time.perf_counter() - start < 1
+    limiter.release()
+    waiter.join()
+    assert results == [True] and limiter.active == 1
+
+
+def test_limiter_wait_times_out():
+    limiter = Limiter("parse", concurrency=1, queue=4)
+    assert limiter.acquire()
+    assert not limiter.acquire(timeout=0.01)
+    assert limiter.waiting == 0
+
+
+def test_stage_slot_releases_and_unlimited_stages_always_run(monkeypatch):
+    # set_limits replaces both; restore them afterwards
+    monkeypatch.setattr(admission, "_LIMITS", admission._LIMITS)
+    monkeypatch.setattr(admission, "_stage_limiters", admission._stage_limiters)
+    admission.set_limits("embed=1/0")
+    with admission.stage_slot("embed") as first:
+        with admission.stage_slot("embed") as second:
+            assert first and not second
+    with admission.stage_slot("embed") as again:
+        assert again
+    with admission.stage_slot("parse") as unlimited:
+        assert unlimited
+
+
+def test_async_limiter_overflow():
+    async def run():
+        limiter = AsyncLimiter("request", concurrency=1, queue=0)
+        assert await limiter.acquire()
+        assert not await limiter.acquire(timeout=0.01)
+        limiter.release()
+        assert await limiter.acquire()
+
+    asyncio.run(run())
+
+
+def _post_while_full(api, monkeypatch, overflow):
+    async def run():
+        limiter = AsyncLimiter("request", concurrency=1, queue=0)
+        await limiter.acquire()
+        monkeypatch.setattr(api, "_request_limiter", limiter)
+        monkeypatch.setattr(api, "ADMISSION_OVERFLOW", overflow)
+        transport = httpx.ASGITransport(app=api.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            return await client.post("/recommend?debug=true", json={"query": "java"})
+
+    return asyncio.run(run())
+
+
+def test_overflow_is_rejected_with_retry_after(monkeypatch):
+    import api.main as api
+
+    response = _post_while_full(api, monkeypatch, "reject")
+    assert response.status_code == 429
+    assert response.headers["retry-after"] == str(api.ADMISSION_RETRY_AFTER_S)
+
+
+def test_overflow_is_served_degraded(monkeypatch):
+    import api.main as api
+
+    seen = {}
+
+    def recommend(query, top_k=10, trace=None, degraded=False, more=None, latency_budget_ms=None):
+        seen["degraded"] = degraded
+        return [Recommendation("Java 8", "https://example.com/java", "K", "30 minutes", 0.9, 0)]
+
+    monkeypatch.setattr(api, "recommend_assessments", recommend)
+    response = _post_while_full(api, monkeypatch, "degrade")
+    assert response.status_code == 200
+    assert response.headers["x-degraded"] == "1"
+    assert seen["degraded"] is True
+    assert response.json()["debug"]["degraded"][0] == "admission"
+
+
+@pytest.fixture
+def counting_provider(monkeypatch):
+    class Provider:
+        calls = 0
+
+        def embed_queries(self, texts):
+            Provider.calls += 1
+            return [[1.0, 0.0] for _ in texts]
+
+    monkeypatch.setattr(recommender, "_get_embedder", lambda: Provider())
+    monkeypatch.setattr(recommender, "_query_embeddings", type(recommender._query_embeddings)())
+    return Provider
+
+
+def test_degraded_query_falls_back_to_lexical(monkeypatch, counting_provider):
+    monkeypatch.setattr(lexical, "get_index", lambda: lexical.BM25Index.build(["1"], ["java"]))
+    q_emb, _, mode = recommender._embed_query("java developer", "hybrid", degraded=True)
+    assert q_emb is None and mode == "lexical"
+    assert counting_provider.calls == 0
+
+
+def test_degraded_query_without_lexical_index_never_calls_the_provider(monkeypatch, counting_provider):
+    monkeypatch.setattr(lexical, "get_index", lambda: None)
+    q_emb, _, mode = recommender._embed_query("java developer", "vector", degraded=True)
+    assert q_emb is None and mode == "none"
+    assert counting_provider.calls == 0
+    rows, sims, exhausted = recommender._retrieve("java developer", None, "none", 20, None)
+    assert rows.size == 0 and sims.size == 0 and exhausted
@@ -0,0 +1,67 @@
+"""Bundle optimizer: exact DP for few required types, greedy fallback above the cap."""
+import itertools
+
+import numpy as np
+
+from src import bundle as bundle_module
+from src.bundle import optimize_bundle
+from src.ranking import TYPE_CODES
+from src.selection import Quota
+
+DURATIONS = [10, 15, 20, 25, 30, 45, 60]
+
+
+def _pool(n, seed=0, n_types=len(TYPE_CODES)):
+    rng = np.random.default_rng(seed)
+    scores = rng.random(n)
+    minutes = rng.choice(DURATIONS, n).astype(np.float64)
+    types = rng.integers(0, n_types, n).astype(np.int8)
+    return scores, minutes, types
+
+
+def _brute_force(scores, minutes, types, budget, max_items, required):
+    best = 0.0
+    for size in range(1, max_items + 1):
+        for combo in itertools.combinations(range(len(scores)), size):
+            combo = list(combo)
+            if minutes[combo].sum() <= budget and set(required) <= set(types[combo].tolist()):
+                best = max(best, scores[combo].sum())
+    return best
+
+
+def test_dp_is_exact_for_few_required_types():
+    scores, minutes, types = _pool(12, seed=3, n_types=3)
+    quotas = {"K": Quota(1), "P": Quota(1)}
+    bundle = optimize_bundle(scores, minutes, types, 60, 4, quotas)
+    expected = _brute_force(scores, minutes, types, 60, 4, [TYPE_CODES.index("K"), TYPE_CODES.index("P")])
+    assert bundle.satisfied
+    assert bundle.total_minutes <= 60
+    assert np.isclose(bundle.total_score, expected)
+
+
+def test_many_required_types_fall_back_to_greedy(monkeypatch):
+    scores, minutes, types = _pool(300)
+    quotas = {letter: Quota(1) for letter in TYPE_CODES}
+    calls = []
+    greedy = bundle_module._greedy_bundle
+    monkeypatch.setattr(bundle_module, "_greedy_bundle", lambda *a: calls.append(a) or greedy(*a))
+
+    optimize_bundle(scores, minutes, types, 60, 10, {"K": Quota(1), "P": Quota(1)}, max_required_types=3)
+    assert not calls
+    bundle = optimize_bundle(scores, minutes, types, 60, 10, quotas, max_required_types=3)
+    # Above the cap no 2^(required types) DP table is built
+    assert len(calls) == 1
+    assert bundle.total_minutes <= 60
+    assert len(bundle.positions) <= 10
+    covered = {TYPE_CODES[c] for c in types[bundle.positions]}
+    assert covered | set(bundle.unmet) == set(quotas)
+    assert not set(bundle.unmet) & covered
+
+
+def test_greedy_covers_required_types_when_they_fit():
+    scores, minutes, types = _pool(300, seed=1)
+    quotas = {letter: Quota(1) for letter in TYPE_CODES[:5]}
+    bundle = optimize_bundle(scores, minutes, types, 90, 10, quotas, max_required_types=3)
+    assert bundle.satisfied
+    assert set(quotas) <= {TYPE_CODES[c] for c in types[bundle.positions]}
+    assert bundle.total_minutes <= 90
@@ -0,0 +1,108 @@
+"""Embedding worker processes: serving, restart after a crash and failover between workers."""
+import os
+import signal
+import textwrap
+import time
+
+import pytest
+
+from src import embedding_service
+
+# Stands in for sentence-transformers in the worker processes; each vector carries the worker's pid
+FAKE_MODEL = textwrap.dedent("""
+    import os
+
+    import numpy as np
+
+
+    class SentenceTransformer:
+        def __init__(self, name):
+            self.name = name
+
+        def encode(self, texts, convert_to_numpy=True, show_progress_bar=False, batch_size=32):
+            if "boom" in texts:
+                raise ValueError("bad text")
+            out = np.zeros((len(texts), 4), dtype=np.float32)
+            out[:, 0] = os.getpid()
+            out[:, 1] = [len(t) for t in texts]
+            return out
+""")
+
+
+@pytest.fixture
+def workers(monkeypatch, tmp_path):
+    """Start workers on the fake model; they are stopped when the test ends."""
+    (tmp_path / "sentence_transformers.py").write_text(FAKE_MODEL)
+    monkeypatch.setenv("PYTHONPATH", os.pathsep.join(p for p in (str(tmp_path), os.environ.get("PYTHONPATH")) if p))
+    monkeypatch.setattr(embedding_service, "_connections", {})
+
+    def start(count, watch_interval_s=0.05):
+        monkeypatch.setattr(embedding_service, "_WATCH_INTERVAL_S", watch_interval_s)
+        embedding_service.start(workers=count, threads=1, batch_size=8, wait_ms=1, timeout=60)
+        return embedding_service._processes
+
+    yield start
+    embedding_service.stop()
+
+
+def _pid(vectors):
+    return int(vectors[0][0])
+
+
+def _kill(proc):
+    os.kill(proc.pid, signal.SIGKILL)
+    proc.wait(timeout=10)
+
+
+def _wait_for(condition, timeout=30):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "timed out"
+        time.sleep(0.05)
+
+
+def test_embed_answers_each_text_in_order(workers):
+    processes = workers(1)
+    vectors = embedding_service.embed(["a", "bbb", "cc"])
+    assert [v[1] for v in vectors] == [1.0, 3.0, 2.0]
+    assert _pid(vectors) == processes[0].pid
+    assert embedding_service.embed([]) == []
+
+
+def test_model_errors_reach_the_caller(workers):
+    workers(1)
+    with pytest.raises(RuntimeError, match="bad text"):
+        embedding_service.embed(["boom"])
+    # The worker keeps serving
+    assert embedding_service.embed(["ok"])
+
+
+def test_crashed_worker_is_restarted(workers):
+    processes = workers(1)
+    crashed = processes[0]
+    embedding_service.embed(["warm"])
+    _kill(crashed)
+    _wait_for(lambda: processes[0] is not crashed and os.path.exists(embedding_service._addresses[0]))
+
+    def served():
+        try:
+            return _pid(embedding_service.embed(["again"])) == processes[0].pid
+        except ConnectionError:
+            return False
+
+    _wait_for(served)
+    assert processes[0].pid != crashed.pid
+
+
+def test_requests_fail_over_to_the_workers_still_up(workers):
+    # Watch too rarely to restart anything during the test
+    processes = workers(2, watch_interval_s=60)
+    embedding_service.embed(["warm"])
+    survivor = processes[1].pid
+    _kill(processes[0])
+    for _ in range(4):
+        assert _pid(embedding_service.embed(["x"])) == survivor
+
+    _kill(processes[1])
+    with pytest.raises(ConnectionError):
+        embedding_service.embed(["x"])
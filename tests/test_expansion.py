@@ -0,0 +1,73 @@
+"""Sub-queries from the parse, embedded together with the query in one provider call."""
+from collections import OrderedDict
+
+import pytest
+
+from src import recommender
+from src.expansion import MAX_TERMS, sub_queries
+
+ANALYSIS = {
+    "raw": "Hiring a Java developer who can lead a team",
+    "job_role": "Java Developer",
+    "technical_skills": ["Java", "Spring", " "],
+    "soft_skills": "Leadership",
+    "key_competencies": [],
+}
+
+
+def test_one_sub_query_per_skill_group_plus_role():
+    assert sub_queries(ANALYSIS) == [
+        "Java Developer: Java, Spring",
+        "Java Developer: Leadership",
+        "Java Developer",
+    ]
+
+
+def test_limits_and_duplicates():
+    assert sub_queries(ANALYSIS, max_queries=1) == ["Java Developer: Java, Spring"]
+    assert sub_queries(ANALYSIS, max_queries=0) == []
+    # A role equal to the query itself adds nothing
+    assert sub_queries({"raw": "java developer", "job_role": "Java Developer"}) == []
+    many = sub_queries({"technical_skills": [f"s{i}" for i in range(20)]})
+    assert many == [", ".join(f"s{i}" for i in range(MAX_TERMS))]
+
+
+def test_heuristic_parse_without_fields_expands_to_nothing():
+    assert sub_queries({"raw": "python", "duration_minutes": 30}) == []
+
+
+class _Provider:
+    signature = "fake"
+
+    def __init__(self):
+        self.calls = []
+
+    def embed_queries(self, texts):
+        self.calls.append(list(texts))
+        return [[float(len(t)), 1.0] for t in texts]
+
+
+@pytest.fixture
+def provider(monkeypatch):
+    fake = _Provider()
+    monkeypatch.setattr(recommender, "_get_embedder", lambda: fake)
+    monkeypatch.setattr(recommender, "_query_embeddings", OrderedDict())
+    return fake
+
+
+def test_query_and_sub_queries_share_one_provider_call(provider):
+    q_emb, sub_embs, mode = recommender._embed_query(ANALYSIS["raw"], "vector", ANALYSIS)
+    assert provider.calls == [[ANALYSIS["raw"]] + sub_queries(ANALYSIS)]
+    assert q_emb == [float(len(ANALYSIS["raw"])), 1.0]
+    assert len(sub_embs) == 3 and mode == "vector"
+
+    # Everything is cached now
+    recommender._embed_query(ANALYSIS["raw"], "vector", ANALYSIS)
+    assert len(provider.calls) == 1
+
+
+def test_degraded_requests_use_cached_embeddings_only(provider):
+    recommender._embed_query(ANALYSIS["raw"], "vector")
+    q_emb, sub_embs, mode = recommender._embed_query(ANALYSIS["raw"], "vector", ANALYSIS, degraded=True)
+    assert len(provider.calls) == 1
+    assert q_emb is not None and sub_embs == [] and mode == "vector"
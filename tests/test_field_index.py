@@ -0,0 +1,78 @@
+"""Multi-field index: per-field vectors fused with weights at query time."""
+import zlib
+
+import numpy as np
+import pytest
+
+from src.field_index import FIELDS, FieldIndex, fuse, parse_weights
+
+DIM = 64
+
+ITEMS = [
+    {"name": "Java 8", "description": "Language features and collections", "skills": ["Java"]},
+    {"name": "SQL Server", "description": "Queries and joins", "skills": ["SQL"]},
+    {"name": "Personality Questionnaire", "description": "Workplace behaviour", "skills": []},
+    {"name": "Python", "description": "", "skills": ["Python", "Data Analysis"]},
+]
+
+
+def embed(texts):
+    """Bag of hashed words, so texts sharing words are similar."""
+    out = np.zeros((len(texts), DIM), dtype=np.float32)
+    for row, text in enumerate(texts):
+        for word in text.lower().replace(",", " ").split():
+            out[row, zlib.crc32(word.encode()) % DIM] += 1.0
+    return out.tolist()
+
+
+def _index():
+    return FieldIndex.build([str(i) for i in range(len(ITEMS))], ITEMS, embed)
+
+
+def test_parse_weights_ignores_unknown_fields():
+    assert parse_weights("name=0.5, skills=0.5,price=9") == {"name": 0.5, "description": 0.0, "skills": 0.5}
+
+
+def test_weighted_sum_renormalizes_over_present_fields():
+    weights = {"name": 0.5, "description": 0.2, "skills": 0.3}
+    sims = np.array([[1.0, 0.0, 1.0], [1.0, np.nan, np.nan]], dtype=np.float32)
+    np.testing.assert_allclose(fuse(sims, weights, "sum"), [0.8, 1.0], rtol=1e-6)
+
+
+def test_weighted_max_takes_best_weighted_field():
+    weights = {"name": 1.0, "description": 0.5, "skills": 0.0}
+    sims = np.array([[0.2, 0.9, 1.0], [np.nan, np.nan, np.nan]], dtype=np.float32)
+    np.testing.assert_allclose(fuse(sims, weights, "max"), [0.45, 0.0], rtol=1e-6)
+
+
+def test_build_skips_empty_fields():
+    index = _index()
+    assert len(index.field) == sum(1 for item in ITEMS for f in FIELDS if item.get(f))
+    assert np.allclose(np.linalg.norm(index.vectors, axis=1), 1.0)
+
+
+@pytest.mark.parametrize("fusion", ["sum", "max"])
+def test_search_finds_the_matching_field(fusion):
+    ids, scores = _index().search(embed(["sql server"])[0], 2, fusion=fusion)
+    assert ids[0] == "1"
+    assert scores[0] >= scores[1]
+
+
+def test_search_many_matches_search():
+    index = _index()
+    queries = embed(["java collections", "python data analysis", "workplace behaviour"])
+    for (ids, scores), q in zip(index.search_many(queries, 3), queries):
+        expected_ids, expected_scores = index.search(q, 3)
+        assert ids == expected_ids
+        np.testing.assert_allclose(scores, expected_scores, rtol=1e-5)
+
+
+def test_save_load_round_trip(tmp_path):
+    index = _index()
+    index.signature = "local:fake:64"
+    path = str(tmp_path / "fields.npz")
+    index.save(path, quantization="none")
+    loaded = FieldIndex.load(path, quantization="none")
+    assert loaded.ids == index.ids and loaded.signature == index.signature
+    q = embed(["python"])[0]
+    assert loaded.search(q, 4)[0] == index.search(q, 4)[0]
@@ -0,0 +1,81 @@
+"""Memory-mapped flat index: exact search in Chroma's result shape, shared read-only."""
+import numpy as np
+import pytest
+
+from src import vector_store
+from src.flat_index import FlatIndex
+
+N, DIM = 50, 12
+
+
+def _index(tmp_path):
+    """A saved and reloaded index, plus the raw vectors it was built from."""
+    rng = np.random.default_rng(0)
+    vectors = rng.normal(size=(N, DIM)).astype(np.float32) * 3
+    metas = [{"type": "K" if i % 2 else "P", "name": f"item {i}"} for i in range(N)]
+    index = FlatIndex([str(i) for i in range(N)], metas, [f"doc {i}" for i in range(N)], vectors, {"sig": "x"})
+    path = str(tmp_path / "flat.json")
+    index.save(path)
+    return FlatIndex.load(path), vectors
+
+
+def _unit(v):
+    return v / np.linalg.norm(v, axis=-1, keepdims=True)
+
+
+def test_saved_vectors_are_unit_length_and_mapped_read_only(tmp_path):
+    loaded, _ = _index(tmp_path)
+    assert isinstance(loaded.vectors, np.memmap)
+    assert not loaded.vectors.flags.writeable
+    np.testing.assert_allclose(np.linalg.norm(loaded.vectors, axis=1), 1.0, rtol=1e-5)
+    assert loaded.metadata == {"sig": "x"}
+
+
+def test_query_many_is_exact_cosine(tmp_path):
+    loaded, vectors = _index(tmp_path)
+    queries = np.random.default_rng(1).normal(size=(3, DIM)).astype(np.float32)
+    res = loaded.query_many(queries, top_k=5)
+    sims = _unit(queries) @ _unit(vectors).T
+    for j in range(3):
+        expected = np.argsort(-sims[j])[:5]
+        assert res["ids"][j] == [str(i) for i in expected]
+        np.testing.assert_allclose(res["distances"][j], 1.0 - sims[j, expected], atol=1e-5)
+        assert res["documents"][j][0] == f"doc {expected[0]}"
+
+
+def test_equality_filter_and_unsupported_operators(tmp_path):
+    loaded, _ = _index(tmp_path)
+    q = np.ones((1, DIM), np.float32)
+    res = loaded.query_many(q, top_k=10, where={"type": "K"}, include=("metadatas",))
+    assert set(res) == {"ids", "metadatas"}
+    assert all(m["type"] == "K" for m in res["metadatas"][0])
+    with pytest.raises(ValueError):
+        loaded.query_many(q, where={"type": {"$in": ["K"]}})
+
+
+def test_get_embeddings_skips_unknown_ids(tmp_path):
+    loaded, vectors = _index(tmp_path)
+    got = loaded.get_embeddings(["3", "missing"])
+    assert list(got) == ["3"]
+    np.testing.assert_allclose(got["3"], _unit(vectors[3]), rtol=1e-5)
+
+
+def test_vector_store_reads_from_the_export_in_mmap_mode(monkeypatch, tmp_path):
+    loaded, _ = _index(tmp_path)
+    monkeypatch.setattr(vector_store, "VECTOR_BACKEND", "mmap")
+    monkeypatch.setattr(vector_store.flat_index, "get_index", lambda: loaded)
+    assert vector_store.get_all()["ids"] == loaded.ids
+    assert vector_store.get_signature() is None
+
+    monkeypatch.setattr(vector_store.flat_index, "get_index", lambda: None)
+    with pytest.raises(RuntimeError, match="build_index"):
+        vector_store.get_all()
+
+
+def test_several_workers_need_the_mmap_backend(monkeypatch):
+    from scripts import serve
+    from src import config
+
+    monkeypatch.setattr(config, "VECTOR_BACKEND", "chroma")
+    with pytest.raises(SystemExit, match="VECTOR_BACKEND=mmap"):
+        serve.serve("127.0.0.1", 0, workers=2, preload=False)
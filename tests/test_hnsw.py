@@ -0,0 +1,64 @@
+"""HNSW parameters are recorded with the index when it is created and read back from either backend."""
+import numpy as np
+import pytest
+
+from src import vector_store
+from src.flat_index import FlatIndex
+
+
+class _FakeClient:
+    def __init__(self):
+        self.created = None
+
+    def get_collection(self, name, embedding_function=None):
+        raise ValueError("does not exist")
+
+    def create_collection(self, name, metadata=None, embedding_function=None):
+        self.created = type("Collection", (), {"metadata": metadata})()
+        return self.created
+
+
+@pytest.fixture
+def chroma_backend(monkeypatch):
+    client = _FakeClient()
+    monkeypatch.setattr(vector_store, "VECTOR_BACKEND", "chroma")
+    monkeypatch.setattr(vector_store, "_collection", None)
+    monkeypatch.setattr(vector_store, "get_client", lambda: client)
+    return client
+
+
+def test_metadata_is_cosine_with_given_graph_parameters():
+    assert vector_store.hnsw_metadata(32, 200, 50) == {
+        "hnsw:space": "cosine", "hnsw:M": 32, "hnsw:construction_ef": 200, "hnsw:search_ef": 50,
+    }
+
+
+def test_new_collection_records_configured_parameters_and_signature(chroma_backend):
+    vector_store.get_collection(signature="local:fake:16")
+    meta = chroma_backend.created.metadata
+    assert meta[vector_store.SIGNATURE_KEY] == "local:fake:16"
+    assert vector_store.get_hnsw_params() == {
+        "M": vector_store.HNSW_M,
+        "construction_ef": vector_store.HNSW_CONSTRUCTION_EF,
+        "search_ef": vector_store.HNSW_SEARCH_EF,
+    }
+
+
+def test_mmap_backend_reports_the_exported_parameters(monkeypatch):
+    index = FlatIndex(["a"], [{}], [""], np.ones((1, 4), np.float32), vector_store.hnsw_metadata(8, 64, 20))
+    monkeypatch.setattr(vector_store, "VECTOR_BACKEND", "mmap")
+    monkeypatch.setattr(vector_store.flat_index, "get_index", lambda: index)
+    assert vector_store.get_hnsw_params() == {"M": 8, "construction_ef": 64, "search_ef": 20}
+
+
+def test_sweep_measures_recall_against_exact():
+    pytest.importorskip("chromadb")
+    from scripts.bench_quantization import corpus, top
+    from scripts.sweep_hnsw import measure
+
+    docs, queries = corpus(500, 32, 8)
+    queries = queries[:20]
+    truth = [set(top(docs @ q, 10).tolist()) for q in queries]
+    result = measure(docs, queries, truth, 10, 16, 100, 100)
+    assert result["recall"] >= 0.9
+    assert result["p99_ms"] >= result["p50_ms"] > 0
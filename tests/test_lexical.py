@@ -0,0 +1,68 @@
+"""BM25 index, reciprocal rank fusion and the rescaling of fused scores for ranking."""
+import numpy as np
+
+from src import recommender
+from src.lexical import BM25Index, reciprocal_rank_fusion, tokenize
+
+DOCS = {
+    "java": "Java 8 (New)\nMulti-choice test of Java 8 language features\nSkills: Java",
+    "sql": "SQL Server\nQueries, joins and indexes in SQL Server\nSkills: SQL",
+    "automata": "Automata Fix\nFind and fix bugs in Java and Python code\nSkills: Java, Python",
+    "opq": "Occupational Personality Questionnaire\nWorkplace behaviour and style\nSkills: Personality",
+}
+
+
+def _index():
+    return BM25Index.build(list(DOCS), list(DOCS.values()))
+
+
+def test_tokenize_keeps_skill_punctuation_and_drops_stopwords():
+    assert tokenize("Looking for a C++ and C# developer with SQL") == ["c++", "c#", "developer", "sql"]
+
+
+def test_search_ranks_exact_tokens_and_skips_non_matches():
+    ids, scores = _index().search("Java 8 developer", 10)
+    assert ids[0] == "java"
+    assert set(ids) == {"java", "automata"}
+    assert np.all(np.diff(scores) <= 0)
+    assert _index().search("astronomy", 10)[0] == []
+
+
+def test_save_load_round_trip(tmp_path):
+    index = _index()
+    path = str(tmp_path / "bm25.json")
+    index.save(path)
+    loaded = BM25Index.load(path)
+    assert loaded.ids == index.ids
+    np.testing.assert_allclose(loaded.scores("sql server joins"), index.scores("sql server joins"), rtol=1e-6)
+
+
+def test_coverage_weighs_terms_by_idf():
+    index = _index()
+    assert index.coverage("sql server", "sql") == 1.0
+    assert index.coverage("sql server", "java") == 0.0
+    # Unknown terms count as rare, so they pull coverage down
+    assert 0.0 < index.coverage("java unknownword", "java") < 0.5
+
+
+def test_terms_with_prefix():
+    assert _index().terms_with_prefix("pe") == ["personality"]
+    assert _index().terms_with_prefix("zz") == []
+
+
+def test_rrf_normalizes_to_one_for_a_unanimous_winner():
+    ids, scores = reciprocal_rank_fusion([["a", "b", "c"], ["a", "c"], ["a"]], k=60)
+    assert ids[0] == "a"
+    assert scores[0] == np.float32(1.0)
+    assert ids.index("c") < ids.index("b")
+    assert np.all((scores > 0) & (scores <= 1))
+
+
+def test_fused_scores_are_mapped_onto_the_cosine_range():
+    fused = np.array([1.0, 0.6, 0.55, 0.5], dtype=np.float32)
+    cosine = np.array([0.42, 0.40, 0.31, 0.30], dtype=np.float32)
+    scaled = recommender._on_cosine_scale(fused, cosine)
+    assert np.isclose(scaled.max(), 0.42) and np.isclose(scaled.min(), 0.30)
+    np.testing.assert_array_equal(np.argsort(-scaled), np.argsort(-fused))
+    # A tie everywhere keeps the best cosine rather than dividing by zero
+    assert np.allclose(recommender._on_cosine_scale(np.ones(3, np.float32), cosine), 0.42)
@@ -0,0 +1,126 @@
+"""Cursor pagination over cached ranked lists, and the /recommend paging contract."""
+import asyncio
+
+import httpx
+import pytest
+
+from src import pages
+from src.pages import PageStore
+from src.results import Recommendation
+
+
+def _recs(n):
+    return [Recommendation(f"item {i}", f"https://example.com/{i}", "K", "30 minutes", 1.0 - i / 100, i) for i in range(n)]
+
+
+def _names(recs):
+    return [r.name for r in recs]
+
+
+def test_cursor_round_trip_walks_the_whole_list():
+    store = PageStore()
+    items = _recs(25)
+    cursor = store.put(items, page_size=10)
+    seen = items[:10]
+    while cursor:
+        page, cursor, total = store.page(cursor)
+        assert total == 25
+        seen += page
+    assert _names(seen) == _names(items)
+
+
+def test_limit_overrides_page_size():
+    store = PageStore()
+    page, cursor, _ = store.page(store.put(_recs(25), page_size=10), limit=3)
+    assert _names(page) == ["item 10", "item 11", "item 12"]
+    assert cursor.endswith(".13")
+
+
+def test_no_cursor_when_nothing_is_left():
+    assert PageStore().put(_recs(10), page_size=10) is None
+
+
+@pytest.mark.parametrize("page_size", [0, -1])
+def test_non_positive_page_size_is_refused(page_size):
+    with pytest.raises(ValueError):
+        PageStore().put(_recs(5), page_size=page_size)
+
+
+def test_expired_and_malformed_cursors():
+    store = PageStore(ttl_s=-1)
+    cursor = store.put(_recs(20), page_size=10)
+    assert store.page(cursor) is None
+    assert len(store) == 0 and store.total_items == 0
+    assert PageStore().page("not-a-cursor") is None
+
+
+def test_oldest_lists_are_evicted_beyond_the_item_bound():
+    store = PageStore(max_items=50)
+    first = store.put(_recs(30), page_size=10)
+    second = store.put(_recs(30), page_size=10)
+    assert store.page(first) is None
+    assert store.page(second) is not None
+    assert store.total_items == 30
+
+
+def _post(body):
+    import api.main as api
+
+    async def call():
+        transport = httpx.ASGITransport(app=api.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            response = await client.post("/recommend", json=body)
+            cursor = response.json().get("next_cursor") if response.status_code == 200 else None
+            page = await client.get("/recommend/page", params={"cursor": cursor}) if cursor else None
+            return response, page
+
+    return asyncio.run(call())
+
+
+@pytest.fixture
+def recommend_calls(monkeypatch):
+    """Stub recommender over 30 results; records the `more` list each call got."""
+    import api.main as api
+
+    calls = []
+
+    def recommend(query, top_k=10, trace=None, degraded=False, more=None, latency_budget_ms=None):
+        calls.append(more)
+        items = _recs(30)
+        if more is not None:
+            more.extend(items[top_k:])
+        return items[:top_k]
+
+    monkeypatch.setattr(api, "recommend_assessments", recommend)
+    monkeypatch.setattr(pages, "store", PageStore())
+    return calls
+
+
+def test_deep_list_is_only_built_when_paginating(recommend_calls):
+    response, _ = _post({"query": "java", "top_k": 5})
+    assert response.json()["next_cursor"] is None
+    assert recommend_calls == [None]
+
+    response, page = _post({"query": "java", "top_k": 5, "paginate": True})
+    assert response.status_code == 200
+    body = page.json()
+    assert [r["assessment_name"] for r in body["recommendations"]] == [f"item {i}" for i in range(5, 10)]
+    assert body["ranked_results"] == 30
+
+
+@pytest.mark.parametrize("top_k", [0, -3, 10_000])
+def test_top_k_out_of_range_is_rejected(recommend_calls, top_k):
+    response, _ = _post({"query": "java", "top_k": top_k})
+    assert response.status_code == 422
+    assert recommend_calls == []
+
+
+def test_unknown_cursor_is_gone():
+    import api.main as api
+
+    async def call():
+        transport = httpx.ASGITransport(app=api.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            return await client.get("/recommend/page", params={"cursor": "missing.10"})
+
+    assert asyncio.run(call()).status_code == 410
@@ -0,0 +1,84 @@
+"""Candidate pool sizing: estimated from filter selectivity, widened only when the selection falls short."""
+import math
+
+import numpy as np
+import pytest
+
+from src import recommender
+from src.config import RETRIEVAL_POOL_HEADROOM, RETRIEVAL_POOL_MIN
+from src.ranking import CatalogFeatures
+from src.selection import Quota
+
+
+def _features(n=1000, short_rows=(), rare_rows=()):
+    """Synthetic catalog: 60-minute 'K' items, 10-minute ones at short_rows, 'S' ones at rare_rows."""
+    short_rows, rare_rows = set(short_rows), set(rare_rows)
+    metas = [
+        {
+            "name": f"item {i}",
+            "url": f"https://example.com/{i}",
+            "type": "S" if i in rare_rows else "K",
+            "duration": "10 minutes" if i in short_rows else "60 minutes",
+            "skills": "[]",
+        }
+        for i in range(n)
+    ]
+    return CatalogFeatures([str(i) for i in range(n)], metas)
+
+
+def test_unfiltered_pool_is_top_k_with_headroom():
+    features = _features()
+    pool = recommender._initial_pool(features, {}, {}, 10)
+    assert pool == max(math.ceil(10 * RETRIEVAL_POOL_HEADROOM), RETRIEVAL_POOL_MIN)
+
+
+def test_selective_duration_filter_widens_the_first_pool():
+    features = _features(short_rows=range(100))
+    pool = recommender._initial_pool(features, {"duration_minutes": 15}, {}, 10)
+    # One item in ten passes, so about ten times as many candidates are needed
+    assert pool == math.ceil(10 / 0.1 * RETRIEVAL_POOL_HEADROOM)
+
+
+def test_rare_type_minimum_sizes_pool_and_caps_at_catalog():
+    features = _features(rare_rows=range(10))
+    pool = recommender._initial_pool(features, {}, {"S": Quota(5)}, 10)
+    assert pool == len(features)
+
+
+@pytest.fixture
+def fake_retrieval(monkeypatch):
+    """Retrieval that returns rows in index order with decreasing similarity."""
+    def setup(features):
+        def retrieve(query, q_emb, mode, pool, features_, skill_ids=None, sub_embs=None):
+            rows = np.arange(min(pool, len(features)))
+            return rows, np.linspace(1.0, 0.5, len(rows)).astype(np.float32), pool >= len(features)
+
+        monkeypatch.setattr(recommender, "_get_features", lambda: features)
+        monkeypatch.setattr(recommender, "_retrieval_mode", lambda query: "vector")
+        monkeypatch.setattr(recommender, "_embed_query", lambda *a, **k: ([1.0], [], "vector"))
+        monkeypatch.setattr(recommender, "_skill_candidates", lambda analysis: None)
+        monkeypatch.setattr(recommender, "_retrieve", retrieve)
+    return setup
+
+
+def test_one_round_when_the_estimate_holds(fake_retrieval):
+    fake_retrieval(_features(short_rows=range(100)))
+    trace = {}
+    recs = recommender.recommend_assessments(
+        "q", top_k=10, trace=trace, rerank_top_n=0, analysis={"raw": "q", "duration_minutes": 15}
+    )
+    assert len(recs) == 10
+    assert trace["rounds"] == 1
+
+
+def test_pool_grows_until_the_selection_is_filled(fake_retrieval):
+    # The only items that fit the duration rank last
+    features = _features(short_rows=range(900, 1000))
+    fake_retrieval(features)
+    trace = {}
+    recs = recommender.recommend_assessments(
+        "q", top_k=10, trace=trace, rerank_top_n=0, analysis={"raw": "q", "duration_minutes": 15}
+    )
+    assert [r.duration for r in recs] == ["10 minutes"] * 10
+    assert trace["rounds"] > 1
+    assert trace["pool"] == len(features)
@@ -0,0 +1,79 @@
+"""Index-time projection: truncation or PCA, applied identically to documents and queries."""
+import numpy as np
+import pytest
+
+from src import projection
+from src.projection import Projection, fit_projection
+from src.providers import Provider
+
+
+def _vectors(n=40, dim=32, seed=0):
+    rng = np.random.default_rng(seed)
+    v = rng.normal(size=(n, dim)).astype(np.float32)
+    return v / np.linalg.norm(v, axis=1, keepdims=True)
+
+
+@pytest.mark.parametrize("method", ["truncate", "pca"])
+def test_projected_vectors_are_unit_length(method):
+    proj = Projection.fit(_vectors(), method, 8)
+    out = proj.apply(_vectors(n=5, seed=1))
+    assert out.shape == (5, 8)
+    np.testing.assert_allclose(np.linalg.norm(out, axis=1), 1.0, rtol=1e-5)
+
+
+def test_truncate_keeps_leading_dimensions():
+    v = _vectors(n=3)
+    out = Projection.fit(v, "truncate", 4).apply(v)
+    np.testing.assert_allclose(out, v[:, :4] / np.linalg.norm(v[:, :4], axis=1, keepdims=True), rtol=1e-5)
+
+
+def test_pca_dimension_is_capped_by_the_catalog_size():
+    assert Projection.fit(_vectors(n=10), "pca", 256).dim == 9
+
+
+def test_pca_preserves_neighbours_of_low_rank_data():
+    rng = np.random.default_rng(2)
+    v = rng.normal(size=(200, 6)) @ rng.normal(size=(6, 64))
+    v = (v / np.linalg.norm(v, axis=1, keepdims=True)).astype(np.float32)
+    proj = Projection.fit(v, "pca", 8)
+    q = v[:10] + 0.01 * rng.normal(size=(10, 64)).astype(np.float32)
+    exact = np.argsort(-(q @ v.T), axis=1)[:, 0]
+    reduced = np.argsort(-(proj.apply(q) @ proj.apply(v).T), axis=1)[:, 0]
+    assert (exact == reduced).mean() >= 0.9
+
+
+def test_wrong_input_dimension_is_rejected():
+    with pytest.raises(ValueError):
+        Projection.fit(_vectors(dim=32), "truncate", 8).apply(np.ones((1, 16)))
+
+
+def test_none_means_no_projection():
+    assert fit_projection(_vectors().tolist(), "none", 8) is None
+
+
+@pytest.mark.parametrize("method", ["truncate", "pca"])
+def test_save_load_round_trip(tmp_path, method):
+    proj = Projection.fit(_vectors(), method, 8)
+    path = str(tmp_path / "projection.npz")
+    proj.save(path)
+    loaded = Projection.load(path)
+    assert loaded.tag == proj.tag
+    np.testing.assert_allclose(loaded.apply(_vectors(seed=3)), proj.apply(_vectors(seed=3)), rtol=1e-6)
+
+
+def test_wrapped_provider_projects_queries_and_tags_signature():
+    base = Provider("local", "fake", 32, embed_documents=lambda texts: _vectors(n=len(texts)).tolist())
+    proj = Projection.fit(_vectors(), "pca", 8)
+    wrapped = proj.wrap(base)
+    assert wrapped.dimensions == 8
+    assert wrapped.signature != base.signature and "pca8" in wrapped.signature
+    assert np.asarray(wrapped.embed_queries(["a", "b"])).shape == (2, 8)
+
+
+def test_saving_no_projection_removes_a_stale_one(tmp_path, monkeypatch):
+    path = str(tmp_path / "projection.npz")
+    Projection.fit(_vectors(), "truncate", 8).save(path)
+    monkeypatch.setattr(projection, "_projection", None)
+    monkeypatch.setattr(projection, "_loaded", False)
+    projection.save_projection(None, path)
+    assert not (tmp_path / "projection.npz").exists()
@@ -0,0 +1,94 @@
+"""int8 / binary codes with exact re-scoring must keep recall close to float32 search."""
+import numpy as np
+import pytest
+
+from src.field_index import FieldIndex
+from src.quantization import QuantizedVectors, rescore
+
+K = 10
+
+
+def _corpus(n=2000, dim=256, rank=32, n_queries=50, seed=0):
+    """Unit vectors with low-rank structure, like real text embeddings."""
+    rng = np.random.default_rng(seed)
+    basis = rng.normal(size=(rank, dim)).astype(np.float32)
+    latent = rng.normal(size=(n, rank)).astype(np.float32)
+    vectors = latent @ basis + 0.1 * np.sqrt(rank) * rng.normal(size=(n, dim)).astype(np.float32)
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+    queries = (latent[rng.integers(0, n, n_queries)] + 0.3 * rng.normal(size=(n_queries, rank))) @ basis
+    queries /= np.linalg.norm(queries, axis=1, keepdims=True)
+    return vectors, queries.astype(np.float32)
+
+
+def _top(scores, k):
+    return set(np.argsort(-scores)[:k].tolist())
+
+
+def test_int8_scores_approximate_cosine():
+    vectors, queries = _corpus(n=200)
+    codes = QuantizedVectors.encode(vectors, "int8")
+    assert codes.codes.dtype == np.int8
+    assert codes.nbytes < vectors.nbytes / 3
+    np.testing.assert_allclose(codes.approximate_scores(queries[0]), vectors @ queries[0], atol=0.02)
+
+
+def test_binary_codes_pack_signs():
+    codes = QuantizedVectors.encode(np.array([[1.0, -1.0, 0.5, -0.5, 1, 1, 1, 1, -1]], np.float32), "binary")
+    assert codes.codes.shape == (1, 2)
+    q = np.array([1.0, -1.0, 0.5, -0.5, 1, 1, 1, 1, -1], np.float32)
+    # Identical signs: no Hamming distance, so the full dimension count
+    assert codes.approximate_scores(q)[0] == 9
+
+
+def test_rescore_matches_exact_dot_products():
+    vectors, queries = _corpus(n=100)
+    rows = np.array([42, 3, 77, 3])
+    np.testing.assert_allclose(rescore(vectors, rows, queries[0]), vectors[rows] @ queries[0], rtol=1e-6)
+
+
+@pytest.mark.parametrize("mode, rescore_factor, min_recall", [("int8", 4, 0.99), ("binary", 4, 0.9)])
+def test_rescored_recall_against_float(mode, rescore_factor, min_recall):
+    vectors, queries = _corpus()
+    codes = QuantizedVectors.encode(vectors, mode)
+    hits = 0
+    for q in queries:
+        candidates = np.argsort(-codes.approximate_scores(q))[:K * rescore_factor]
+        exact = rescore(vectors, candidates, q)
+        hits += len(_top(vectors @ q, K) & set(candidates[np.argsort(-exact)[:K]].tolist()))
+    assert hits / (K * len(queries)) >= min_recall
+
+
+def _field_index(vectors):
+    n = len(vectors) // 3
+    return FieldIndex(
+        [str(i) for i in range(n)],
+        np.repeat(np.arange(n), 3),
+        np.tile(np.arange(3), n),
+        vectors[: n * 3],
+    )
+
+
+@pytest.mark.parametrize("mode", ["int8", "binary"])
+def test_quantized_field_index_recall_and_storage(tmp_path, mode):
+    vectors, queries = _corpus(n=1500)
+    path = str(tmp_path / "fields.npz")
+    _field_index(vectors).save(path, quantization=mode)
+    with np.load(path) as data:
+        stored = set(data.files)
+    other = "binary" if mode == "int8" else "int8"
+    assert f"{mode}_codes" in stored and f"{other}_codes" not in stored
+
+    exact = FieldIndex.load(path, quantization="none")
+    quantized = FieldIndex.load(path, quantization=mode)
+    hits = sum(
+        len(set(exact.search(q, K)[0]) & set(quantized.search(q, K, rescore_factor=4)[0])) for q in queries
+    )
+    assert hits / (K * len(queries)) >= 0.9
+
+
+def test_loading_codes_that_were_not_built_fails(tmp_path):
+    vectors, _ = _corpus(n=30)
+    path = str(tmp_path / "fields.npz")
+    _field_index(vectors).save(path, quantization="none")
+    with pytest.raises(ValueError, match="FIELD_QUANTIZATION"):
+        FieldIndex.load(path, quantization="int8")
@@ -0,0 +1,77 @@
+"""Result records, their response shape and the NDJSON batch stream."""
+import asyncio
+
+import httpx
+import orjson
+import pytest
+
+from src.ranking import CatalogFeatures
+from src.results import Recommendation
+
+META = {
+    "name": "Java 8",
+    "url": "https://example.com/java",
+    "type": "K",
+    "duration": "30 minutes",
+    "skills": "['Java', 'OOP']",
+}
+
+
+def _rec(score=0.75):
+    features = CatalogFeatures(["7"], [META], ["Java 8\nCore Java"])
+    return Recommendation(META["name"], META["url"], META["type"], META["duration"], score, 0, features)
+
+
+def test_response_shape():
+    assert _rec().to_response() == {
+        "assessment_name": "Java 8",
+        "assessment_url": "https://example.com/java",
+        "relevance_score": 0.75,
+        "test_type": "K",
+        "duration": "30 minutes",
+    }
+
+
+def test_records_read_like_dicts():
+    rec = _rec()
+    assert rec["url"] == rec.get("url") == META["url"]
+    assert rec.get("missing", "default") == "default"
+    with pytest.raises(KeyError):
+        rec["missing"]
+
+
+def test_skills_and_document_come_from_the_shared_features():
+    rec = _rec()
+    assert rec.skills == ["Java", "OOP"]
+    assert rec.document == "Java 8\nCore Java"
+    assert not hasattr(rec, "__dict__")
+    bare = Recommendation("x", "u", "K", "", 0.1, 0)
+    assert bare.skills == [] and bare.document == ""
+
+
+def test_orjson_round_trip():
+    assert orjson.loads(orjson.dumps([_rec().to_response()]))[0]["relevance_score"] == 0.75
+
+
+def test_batch_streams_one_line_per_query_and_reports_failures(monkeypatch):
+    import api.main as api
+
+    def recommend(query, top_k=10, degraded=False):
+        if query == "boom":
+            raise RuntimeError("provider down")
+        return [_rec()][:top_k]
+
+    monkeypatch.setattr(api, "recommend_assessments", recommend)
+
+    async def call():
+        transport = httpx.ASGITransport(app=api.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            return await client.post("/recommend/batch", json={"queries": ["java", "boom", "sql"], "top_k": 1})
+
+    response = asyncio.run(call())
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    lines = [orjson.loads(line) for line in response.content.splitlines()]
+    assert [line["query"] for line in lines] == ["java", "boom", "sql"]
+    assert lines[0]["total_results"] == 1 and lines[0]["recommendations"][0]["test_type"] == "K"
+    assert lines[1] == {"query": "boom", "error": "provider down"}
@@ -0,0 +1,66 @@
+"""Multi-vector retrieval: one call for the query and its sub-queries, fused by rank."""
+import numpy as np
+import pytest
+
+from src import recommender, vector_store
+from src.flat_index import FlatIndex
+from src.ranking import CatalogFeatures
+
+N = 6
+
+
+@pytest.fixture
+def flat(monkeypatch):
+    """mmap backend over one-hot vectors: item i is most similar to axis i."""
+    vectors = np.eye(N, dtype=np.float32) + 0.05
+    metas = [{"name": f"item {i}", "type": "K", "duration": "30 minutes", "skills": "[]"} for i in range(N)]
+    index = FlatIndex([str(i) for i in range(N)], metas, [""] * N, vectors)
+    monkeypatch.setattr(vector_store, "VECTOR_BACKEND", "mmap")
+    monkeypatch.setattr(vector_store.flat_index, "get_index", lambda: index)
+    monkeypatch.setattr(recommender, "_get_field_index", lambda: None)
+    return CatalogFeatures(index.ids, metas)
+
+
+def _axis(i):
+    v = np.zeros(N, dtype=np.float32)
+    v[i] = 1.0
+    return v.tolist()
+
+
+def test_query_many_returns_one_list_per_vector(flat):
+    res = vector_store.query_many([_axis(2), _axis(4)], top_k=3, include=("distances",))
+    assert [ids[0] for ids in res["ids"]] == ["2", "4"]
+    assert set(res) == {"ids", "distances"}
+    assert len(res["distances"][0]) == 3
+
+
+def test_exact_similarities_score_every_vector_from_one_fetch(flat, monkeypatch):
+    calls = []
+    get = vector_store.get_embeddings
+    monkeypatch.setattr(vector_store, "get_embeddings", lambda ids: calls.append(ids) or get(ids))
+    sims = recommender._exact_similarities([_axis(0), _axis(1)], ["0", "1", "missing"])
+    assert len(calls) == 1
+    assert sims.shape == (2, 3)
+    assert sims[0, 0] > sims[0, 1] and sims[1, 1] > sims[1, 0]
+    assert np.all(sims[:, 2] == 0)
+
+
+def test_sub_queries_join_the_fusion_in_vector_mode(flat):
+    rows, _, _ = recommender._retrieve("q", _axis(0), "vector", 1, flat)
+    assert list(rows) == [0]
+    fused_rows, _, _ = recommender._retrieve("q", _axis(0), "vector", 1, flat, sub_embs=[_axis(5), _axis(5)])
+    # Two sub-queries agreeing on item 5 outrank the main query's single vote
+    assert list(fused_rows) == [5, 0]
+
+
+def test_sub_queries_join_the_fusion_in_skill_filter_mode(flat, monkeypatch):
+    monkeypatch.setattr(recommender, "SKILL_FILTER_MODE", "filter")
+    skill_ids = ["0", "3", "5"]
+    rows, sims, exhausted = recommender._retrieve("q", _axis(0), "vector", N, flat, skill_ids)
+    assert exhausted and set(rows) == {0, 3, 5} and rows[0] == 0
+    rows, sims, _ = recommender._retrieve("q", _axis(0), "vector", N, flat, skill_ids, [_axis(3), _axis(3)])
+    assert set(rows) == {0, 3, 5}
+    assert rows[0] == 3
+    # Fused scores stay within the main query's cosine range
+    cosine = recommender._exact_similarity(_axis(0), skill_ids)
+    assert cosine.min() - 1e-6 <= sims.min() and sims.max() <= cosine.max() + 1e-6
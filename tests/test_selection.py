@@ -0,0 +1,61 @@
+"""Quota derivation must only react to explicit test-type requests and exclusions."""
+import os
+
+import pandas as pd
+import pytest
+
+from src.selection import derive_quotas
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data")
+
+
+def _dataset_queries():
+    frames = [pd.read_csv(os.path.join(DATA_DIR, name)) for name in ("train-set.csv", "test-set.csv")]
+    return list(dict.fromkeys(pd.concat(frames)["Query"].astype(str)))
+
+
+def _minimums(quotas):
+    return {letter: q.minimum for letter, q in quotas.items()}
+
+
+@pytest.mark.parametrize("query", [q for q in _dataset_queries() if len(q) > 1000])
+def test_long_job_descriptions_set_no_quota(query):
+    # Wording such as "ability to", "verbal and written communication",
+    # "knowledge of SQL" or "competencies" is not a request for a test type
+    assert derive_quotas({"raw": query}, 10) == {}
+
+
+def test_dataset_only_explicit_request_sets_quota():
+    fired = {q: _minimums(derive_quotas({"raw": q}, 10)) for q in _dataset_queries()}
+    fired = {q: m for q, m in fired.items() if m}
+    assert len(fired) == 1
+    (query, minimums), = fired.items()
+    assert "Cognitive and personality tests" in query
+    assert minimums == {"A": 5, "P": 5}
+
+
+@pytest.mark.parametrize("query, expected", [
+    ("Include cognitive and personality tests", {"A": 5, "P": 5}),
+    ("A mix of cognitive and personality", {"A": 5, "P": 5}),
+    ("Combination of technical and behavioural assessments", {"K": 6, "P": 4}),
+    ("Strong communication skills, both verbal and written", {}),
+    ("Knowledge of SQL and the ability to lead", {}),
+    ("Include a personality test", {"P": 1}),
+    ("No coding experience required, need simulations", {"S": 1}),
+])
+def test_requested_types(query, expected):
+    assert _minimums(derive_quotas({"raw": query}, 10)) == expected
+
+
+def test_parse_preference_both_splits_technical_and_behavioural():
+    assert _minimums(derive_quotas({"raw": "Java developer", "test_type_preference": "both"}, 10)) == {"K": 6, "P": 4}
+
+
+def test_negation_covers_only_the_following_noun_phrase():
+    quotas = derive_quotas({"raw": "No coding experience required. Need cognitive and personality tests, no simulations."}, 10)
+    assert "K" not in quotas
+    assert quotas["S"].maximum == 0
+    assert _minimums(quotas) == {"S": 0, "A": 5, "P": 5}
+    excluded = derive_quotas({"raw": "Please avoid personality or cognitive tests"}, 10)
+    assert {letter: q.maximum for letter, q in excluded.items()} == {"P": 0, "A": 0}
+
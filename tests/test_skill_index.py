@@ -0,0 +1,60 @@
+"""Skill inverted index and how the recommender turns parsed skills into candidates."""
+import pytest
+
+from src import recommender
+from src.ranking import query_skills
+from src.skill_index import SkillIndex
+
+ITEMS = {
+    "1": ["Java", "SQL"],
+    "2": ["Java"],
+    "3": ["Python", "SQL", "Data  Analysis"],
+    "4": ["Personality"],
+}
+
+
+def _index():
+    return SkillIndex.build(list(ITEMS), list(ITEMS.values()))
+
+
+def test_set_operations_normalize_skill_names():
+    index = _index()
+    assert index.ids_any(["java", "PYTHON"]) == {"1", "2", "3"}
+    assert index.ids_all(["Java", "sql"]) == {"1"}
+    # Unknown skills are ignored rather than emptying the intersection
+    assert index.ids_all(["java", "cobol"]) == {"1", "2"}
+    assert index.ids_any(["cobol"]) == set()
+
+
+def test_ranked_puts_most_matched_skills_first():
+    assert _index().ranked(["java", "sql"]) == ["1", "2", "3"]
+
+
+def test_mentioned_matches_whole_words_only():
+    index = _index()
+    assert sorted(index.mentioned("Java developer with data analysis and SQL")) == ["data analysis", "java", "sql"]
+    assert index.mentioned("JavaScript") == []
+
+
+def test_save_load_round_trip(tmp_path):
+    path = str(tmp_path / "skills.json")
+    _index().save(path)
+    assert SkillIndex.load(path).postings == _index().postings
+
+
+def test_query_skills_reads_every_parsed_skill_field():
+    analysis = {"technical_skills": ["Java"], "soft_skills": "Teamwork", "key_competencies": ["SQL"]}
+    assert query_skills(analysis) == ["Java", "Teamwork", "SQL"]
+
+
+@pytest.mark.parametrize("mode, expected", [
+    ("off", None),
+    ("boost", ["1", "2", "3"]),
+    # Only assessments covering every named skill
+    ("filter", ["1"]),
+])
+def test_skill_candidates_by_mode(monkeypatch, mode, expected):
+    monkeypatch.setattr(recommender.skill_index, "get_index", _index)
+    monkeypatch.setattr(recommender, "SKILL_FILTER_MODE", mode)
+    # key_competencies count too, as they do for the ranking boost
+    assert recommender._skill_candidates({"technical_skills": ["Java"], "key_competencies": ["SQL"]}) == expected
@@ -0,0 +1,73 @@
+"""Per-request stage timings and their Server-Timing / debug rendering."""
+import asyncio
+import threading
+import time
+
+import httpx
+
+from src import timing
+from src.results import Recommendation
+
+
+def test_stages_accumulate_per_request():
+    timings = timing.start()
+    with timing.stage("search"):
+        time.sleep(0.002)
+    with timing.stage("search"):
+        pass
+    with timing.stage("rank"):
+        pass
+    timing.count("pair_cache_hits", 2)
+    timing.count("pair_cache_hits")
+    assert timing.current() is timings
+    assert set(timings) == {"search", "rank"}
+    assert timings["search"] >= 2.0
+    assert timing.counters() == {"pair_cache_hits": 3}
+
+
+def test_requests_in_other_threads_do_not_share_timings():
+    seen = {}
+
+    def request(name):
+        timings = timing.start()
+        with timing.stage(name):
+            pass
+        seen[name] = dict(timings)
+
+    threads = [threading.Thread(target=request, args=(name,)) for name in ("parse", "embed")]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert set(seen["parse"]) == {"parse"} and set(seen["embed"]) == {"embed"}
+
+
+def test_server_timing_header_format():
+    from api.main import server_timing
+
+    assert server_timing({"parse": 812.44, "embed": 95.06}, 930.2) == "parse;dur=812.4, embed;dur=95.1, total;dur=930.2"
+
+
+def test_recommend_reports_stage_timings(monkeypatch):
+    import api.main as api
+
+    def recommend(query, top_k=10, trace=None, degraded=False, more=None, latency_budget_ms=None):
+        with timing.stage("search"):
+            pass
+        trace["retrieval"] = "vector"
+        return [Recommendation("Java 8", "https://example.com/java", "K", "30 minutes", 0.9, 0)]
+
+    monkeypatch.setattr(api, "recommend_assessments", recommend)
+
+    async def call():
+        transport = httpx.ASGITransport(app=api.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            return await client.post("/recommend?debug=true", json={"query": "java"})
+
+    response = asyncio.run(call())
+    assert response.status_code == 200
+    assert response.headers["server-timing"].startswith("search;dur=")
+    assert "total;dur=" in response.headers["server-timing"]
+    debug = response.json()["debug"]
+    assert set(debug["timings_ms"]) == {"search", "total"}
+    assert debug["retrieval"] == "vector"
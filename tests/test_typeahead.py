@@ -0,0 +1,140 @@
+"""Search-as-you-type: keystroke constraints, incremental narrowing, sessions and debouncing."""
+import asyncio
+
+import httpx
+import numpy as np
+import pytest
+
+from src import lexical, recommender, skill_index, typeahead
+from src.lexical import BM25Index
+from src.ranking import CatalogFeatures
+from src.typeahead import Sessions, candidate_mask, changed, constraints, rank
+
+DOCS = [
+    "Java 8 developer test",
+    "JavaScript developer test",
+    "Java Spring framework",
+    "Python developer test",
+    "Personality questionnaire",
+]
+
+
+def _index():
+    return BM25Index.build([str(i) for i in range(len(DOCS))], DOCS)
+
+
+def test_constraints_split_complete_terms_and_the_unfinished_word():
+    assert constraints("Java dev") == [("java", False), ("dev", True)]
+    assert constraints("Java dev ") == [("java", False), ("dev", False)]
+    assert constraints("java java sp") == [("java", False), ("sp", True)]
+    # Too short to match as a prefix yet
+    assert constraints("java d", min_prefix=2) == [("java", False)]
+
+
+@pytest.mark.parametrize("previous, current, expected", [
+    ("java", "java dev", [("java", False), ("dev", True)]),
+    ("java de", "java dev", [("dev", True)]),
+    ("java dev", "java dev test", [("dev", False), ("test", True)]),
+    # Backspace, shortening or editing an earlier word: start over
+    ("java dev", "java ", None),
+    ("java dev", "java", None),
+    ("java dev", "python dev", None),
+    ("java developer", "java dev", None),
+])
+def test_changed(previous, current, expected):
+    delta = changed(constraints(previous), constraints(current))
+    assert delta == expected
+
+
+def test_incremental_narrowing_matches_a_fresh_match():
+    index = _index()
+    keystrokes = ["ja", "jav", "java", "java ", "java d", "java dev", "java developer ", "java developer te"]
+    previous, mask = None, None
+    for text in keystrokes:
+        cons = constraints(text)
+        delta = changed(previous, cons) if previous is not None else None
+        mask = candidate_mask(index, delta, mask) if delta is not None else candidate_mask(index, cons)
+        np.testing.assert_array_equal(mask, candidate_mask(index, cons), err_msg=text)
+        previous = cons
+    assert [index.ids[i] for i in np.flatnonzero(mask)] == ["0"]
+
+
+def test_prefix_matches_every_completion():
+    index = _index()
+    assert set(rank(index, constraints("jav"), candidate_mask(index, constraints("jav")), 10)) == {"0", "1", "2"}
+
+
+def test_rank_falls_back_to_partial_matches():
+    index = _index()
+    cons = constraints("java cobol ")
+    mask = candidate_mask(index, cons)
+    assert not mask.any()
+    assert set(rank(index, cons, mask, 10)) == {"0", "2"}
+
+
+def test_newer_keystroke_supersedes_the_older_one():
+    sessions = Sessions()
+    first = sessions.begin("s")
+    second = sessions.begin("s")
+    assert not sessions.is_current("s", first)
+    assert sessions.is_current("s", second)
+    assert sessions.is_current("unknown", 1)
+
+
+def test_sessions_are_bounded_and_expire():
+    sessions = Sessions(max_sessions=2, ttl_s=-1)
+    sessions.remember("a", constraints("java"), np.ones(3, bool))
+    assert sessions.last("a") == (None, None)
+    bounded = Sessions(max_sessions=2)
+    for sid in ("a", "b", "c"):
+        bounded.begin(sid)
+    assert list(bounded._items) == ["b", "c"]
+
+
+@pytest.fixture
+def local_indexes(monkeypatch):
+    index = _index()
+    metas = [{"name": doc, "url": f"https://example.com/{i}", "type": "K", "skills": "[]"} for i, doc in enumerate(DOCS)]
+    features = CatalogFeatures(index.ids, metas)
+    monkeypatch.setattr(lexical, "get_index", lambda: index)
+    monkeypatch.setattr(skill_index, "get_index", lambda: None)
+    monkeypatch.setattr(recommender, "_get_features", lambda: features)
+
+    def no_provider():
+        raise AssertionError("typeahead must not call the embedding provider")
+
+    monkeypatch.setattr(recommender, "_get_embedder", no_provider)
+    monkeypatch.setattr(typeahead, "sessions", Sessions())
+
+
+def test_suggestions_reuse_the_previous_keystroke(local_indexes):
+    traces = []
+    for text in ("jav", "java", "java dev", "java"):
+        trace = {}
+        recs = recommender.suggest_assessments(text, top_k=3, session_id="s", trace=trace)
+        traces.append(trace["prefix_reused"])
+    assert traces == [False, True, True, False]
+    # Back to a prefix: JavaScript matches again
+    assert {r.url for r in recs} == {f"https://example.com/{i}" for i in (0, 1, 2)}
+
+
+def test_superseded_keystrokes_get_no_suggestions(monkeypatch):
+    import api.main as api
+
+    calls = []
+    monkeypatch.setattr(api, "TYPEAHEAD_DEBOUNCE_MS", 50)
+    monkeypatch.setattr(api.typeahead, "sessions", Sessions())
+    monkeypatch.setattr(api, "suggest_assessments", lambda q, **kwargs: calls.append(q) or [])
+
+    async def call():
+        transport = httpx.ASGITransport(app=api.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            first = asyncio.ensure_future(client.get("/typeahead", params={"q": "jav", "session": "s"}))
+            await asyncio.sleep(0.01)
+            second = await client.get("/typeahead", params={"q": "java", "session": "s"})
+            return (await first).json(), second.json()
+
+    first, second = asyncio.run(call())
+    assert first["superseded"] is True and first["suggestions"] == []
+    assert second["superseded"] is False
+    assert calls == ["java"]